@@ -0,0 +1,234 @@
+"""
+Cassettes - Record and replay watsonx.ai chat calls
+Every chat request made by the intake steps (replies, question analysis,
+extraction, summaries) passes through WatsonIntakeAssistant._run/_arun.
+In record mode each request/response pair is captured with its timing; in
+replay mode responses are served back by normalized request, optionally
+with the recorded latency, so benchmark runs are deterministic and free.
+
+Cassettes are gzipped JSON. Requests are stored as a hash plus a small
+summary (message count, prompt size, token budget) instead of the full
+prompt, which keeps them compact. Responses are stored verbatim, so record
+scripted conversations, not real applicants.
+
+    WATSON_CASSETTE=cassettes/intake.json.gz
+    WATSON_CASSETTE_MODE=record | replay
+    WATSON_CASSETTE_LATENCY=true     # replay with recorded response times
+"""
+
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.Backend.prompts import estimate_tokens
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+CASSETTE_VERSION = 1
+
+# Request fields that change the model's output; timeout and stop_when only
+# change how the client waits for it
+KEY_FIELDS = ("messages", "max_tokens", "temperature", "top_p", "stop", "frequency_penalty")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded response for a request (the prompt pipeline changed; re-record)."""
+
+
+class RecordedError(RuntimeError):
+    """Replay of a call that failed while recording, so fallback paths replay too."""
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Stable hash of a chat request; whitespace-only differences in content are ignored."""
+    normalized: Dict[str, Any] = {}
+    for name in KEY_FIELDS:
+        value = request.get(name)
+        if name == "messages":
+            value = [
+                {"role": message.get("role"), "content": _WHITESPACE.sub(" ", message.get("content", "")).strip()}
+                for message in value or []
+            ]
+        elif isinstance(value, float):
+            value = round(value, 4)
+        normalized[name] = value
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+
+def request_summary(request: Dict[str, Any]) -> Dict[str, Any]:
+    messages = request.get("messages") or []
+    return {
+        "messages": len(messages),
+        "prompt_tokens": sum(estimate_tokens(message.get("content", "")) for message in messages),
+        "max_tokens": request.get("max_tokens"),
+        "streamed": request.get("stop_when") is not None,
+    }
+
+
+class Cassette:
+    """Recorded chat interactions for one benchmark scenario."""
+
+    def __init__(self, path: str, mode: str = MODE_REPLAY, playback_latency: bool = False):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r}; use '{MODE_RECORD}' or '{MODE_REPLAY}'")
+        self.path = path
+        self.mode = mode
+        self.playback_latency = playback_latency
+        self.interactions: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._plays: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {
+            "calls": 0,
+            "misses": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "recorded_seconds": 0.0,
+        }
+        if mode == MODE_REPLAY:
+            self.load()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """Cassette configured by WATSON_CASSETTE / WATSON_CASSETTE_MODE, if any."""
+        path = os.getenv("WATSON_CASSETTE")
+        if not path:
+            return None
+        mode = os.getenv("WATSON_CASSETTE_MODE", MODE_REPLAY).lower()
+        cassette = cls(path, mode, os.getenv("WATSON_CASSETTE_LATENCY", "false").lower() == "true")
+        if mode == MODE_RECORD:
+            # Long-running servers record until shutdown
+            atexit.register(cassette.save)
+        print(f"📼 Watson cassette {path} ({mode}, {len(cassette.interactions)} interactions)")
+        return cassette
+
+    # ---- persistence ----
+
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')!r} in {self.path}")
+        self.interactions = data["interactions"]
+        self._by_key = {}
+        for interaction in self.interactions:
+            self._by_key.setdefault(interaction["key"], []).append(interaction)
+
+    def save(self) -> None:
+        if self.mode != MODE_RECORD:
+            return
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "recorded_at": time.time(), "interactions": list(self.interactions)}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+
+    # ---- calls ----
+
+    def call(self, request: Dict[str, Any], send: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+        """Serve ``request`` from the cassette, or send it and record the response."""
+        if self.mode == MODE_REPLAY:
+            interaction = self._next(request)
+            if self.playback_latency:
+                time.sleep(interaction["elapsed"])
+            return self._replayed(interaction)
+
+        started = time.perf_counter()
+        try:
+            response = send(**request)
+        except Exception as e:
+            self._record(request, None, time.perf_counter() - started, error=e)
+            raise
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    async def acall(self, request: Dict[str, Any], send: Callable[..., Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Async variant of call()."""
+        if self.mode == MODE_REPLAY:
+            interaction = self._next(request)
+            if self.playback_latency:
+                await asyncio.sleep(interaction["elapsed"])
+            return self._replayed(interaction)
+
+        started = time.perf_counter()
+        try:
+            response = await send(**request)
+        except Exception as e:
+            self._record(request, None, time.perf_counter() - started, error=e)
+            raise
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    def _replayed(self, interaction: Dict[str, Any]) -> Dict[str, Any]:
+        if interaction.get("error"):
+            raise RecordedError(interaction["error"])
+        return dict(interaction["response"])
+
+    def _next(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Recorded responses for a key are served in recording order; once they
+        run out the last one repeats, so identical scripted conversations can
+        replay a single recording.
+        """
+        key = request_key(request)
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded response for request {key} ({request_summary(request)})")
+            index = self._plays.get(key, 0)
+            self._plays[key] = index + 1
+            interaction = recorded[min(index, len(recorded) - 1)]
+            self._count(interaction)
+        return interaction
+
+    def _record(
+        self,
+        request: Dict[str, Any],
+        response: Optional[Dict[str, Any]],
+        elapsed: float,
+        error: Optional[Exception] = None,
+    ) -> None:
+        summary = request_summary(request)
+        response = response or {}
+        usage = dict(response.get("usage") or {})
+        usage.setdefault("prompt_tokens", summary["prompt_tokens"])
+        usage.setdefault("completion_tokens", estimate_tokens(response.get("text", "")))
+        interaction = {
+            "key": request_key(request),
+            "request": summary,
+            "response": {
+                "text": response.get("text", ""),
+                "usage": usage,
+                "finish_reason": response.get("finish_reason"),
+                "cancelled": response.get("cancelled", False),
+            },
+            "elapsed": round(elapsed, 4),
+        }
+        if error is not None:
+            interaction["error"] = f"{type(error).__name__}: {error}"
+        with self._lock:
+            self.interactions.append(interaction)
+            self._by_key.setdefault(interaction["key"], []).append(interaction)
+            self._count(interaction)
+
+    def _count(self, interaction: Dict[str, Any]) -> None:
+        usage = interaction["response"]["usage"]
+        self.stats["calls"] += 1
+        self.stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        self.stats["completion_tokens"] += usage.get("completion_tokens", 0)
+        self.stats["recorded_seconds"] += interaction["elapsed"]
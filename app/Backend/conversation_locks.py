@@ -0,0 +1,150 @@
+"""
+Conversation Locks - Per-conversation turn serialization
+Turns of one conversation mutate the same in-memory ConversationState, so
+they must run one at a time; turns of different conversations share nothing
+and run fully in parallel. Each busy conversation gets a FIFO of waiters that
+is handed ownership directly on release. Waiters may be threads (sync views,
+turn workers) or asyncio tasks (async views) on any event loop, and the same
+conversation can be contended from both at once. Acquisitions and wait
+times are exported on /metrics.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from app.Backend.metrics import CONVERSATION_LOCK_ACQUISITIONS, CONVERSATION_LOCK_WAIT_SECONDS
+
+
+class _Waiter:
+    """One queued turn; ``granted`` is set under the table mutex on hand-off."""
+
+    __slots__ = ("wake", "granted")
+
+    def __init__(self, wake: Callable[[], None]) -> None:
+        self.wake = wake
+        self.granted = False
+
+
+class ConversationLocks:
+    """
+    Table of per-conversation locks plus contention metrics.
+    Only conversations with a turn in flight have an entry, so the table
+    stays as small as the number of concurrently active conversations.
+    """
+
+    def __init__(self) -> None:
+        self._mutex = threading.Lock()
+        # conversation id -> waiters queued behind the current holder
+        self._queues: Dict[str, Deque[_Waiter]] = {}
+        self._acquired = 0
+        self._contended = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._peak_depth = 0
+
+    # ----- acquisition -------------------------------------------------
+
+    def _enqueue(self, conversation_id: str, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Take the lock if free (returns None), otherwise queue a waiter."""
+        with self._mutex:
+            queue = self._queues.get(conversation_id)
+            if queue is None:
+                self._queues[conversation_id] = deque()
+                return None
+            waiter = _Waiter(wake)
+            queue.append(waiter)
+            self._peak_depth = max(self._peak_depth, len(queue))
+            return waiter
+
+    def _release(self, conversation_id: str) -> None:
+        with self._mutex:
+            queue = self._queues[conversation_id]
+            if not queue:
+                del self._queues[conversation_id]
+                return
+            waiter = queue.popleft()
+            waiter.granted = True
+        waiter.wake()
+
+    def _abandon(self, conversation_id: str, waiter: _Waiter) -> None:
+        """A waiter gave up (task cancelled); pass the lock on if it was already handed over."""
+        with self._mutex:
+            if not waiter.granted:
+                self._queues[conversation_id].remove(waiter)
+                return
+        self._release(conversation_id)
+
+    def _record(self, waited: Optional[float]) -> None:
+        with self._mutex:
+            self._acquired += 1
+            if waited is not None:
+                self._contended += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+        CONVERSATION_LOCK_ACQUISITIONS.inc(contended="true" if waited is not None else "false")
+        if waited is not None:
+            CONVERSATION_LOCK_WAIT_SECONDS.observe(waited)
+
+    @contextmanager
+    def hold(self, conversation_id: str) -> Iterator[None]:
+        """Hold the conversation's lock in the calling thread."""
+        started = time.perf_counter()
+        event = threading.Event()
+        waiter = self._enqueue(conversation_id, event.set)
+        if waiter is not None:
+            event.wait()
+        self._record(time.perf_counter() - started if waiter is not None else None)
+        try:
+            yield
+        finally:
+            self._release(conversation_id)
+
+    @asynccontextmanager
+    async def ahold(self, conversation_id: str) -> AsyncIterator[None]:
+        """Hold the conversation's lock from a coroutine without blocking the event loop."""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._enqueue(conversation_id, wake)
+        if waiter is not None:
+            try:
+                await granted
+            except BaseException:
+                self._abandon(conversation_id, waiter)
+                raise
+        self._record(time.perf_counter() - started if waiter is not None else None)
+        try:
+            yield
+        finally:
+            self._release(conversation_id)
+
+    def busy(self, conversation_id: str) -> bool:
+        """True while a turn of the conversation holds or waits for its lock."""
+        with self._mutex:
+            return conversation_id in self._queues
+
+    # ----- metrics -----------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Point-in-time queue depths plus cumulative wait-time counters."""
+        with self._mutex:
+            depths = [len(queue) for queue in self._queues.values()]
+            return {
+                "active_conversations": len(depths),
+                "queued_turns": sum(depths),
+                "max_queue_depth": max(depths, default=0),
+                "peak_queue_depth": self._peak_depth,
+                "acquisitions": self._acquired,
+                "contended_acquisitions": self._contended,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+                "wait_seconds_avg": round(self._wait_total / self._contended, 6) if self._contended else 0.0,
+            }
@@ -0,0 +1,315 @@
+"""
+Eligibility Screening - Deterministic program rules for SNAP, Medi-Cal, SSI and CalWORKs
+Each program is a list of criteria evaluated in order. A single case is
+screened with plain comparisons; a whole case table is screened with NumPy
+arithmetic over pandas columns. Every result records the rule that decided it.
+Limits are approximate monthly figures for California and are a screening
+aid for caseworkers, not a determination.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+ELIGIBILITY_RULES_VERSION = "1"
+
+STATUS_ELIGIBLE = "eligible"
+STATUS_INELIGIBLE = "ineligible"
+STATUS_UNKNOWN = "unknown"
+_STATUS_NAMES = np.array([STATUS_UNKNOWN, STATUS_ELIGIBLE, STATUS_INELIGIBLE], dtype=object)
+
+# Gross monthly income limits: (base for one person, added per extra member)
+SNAP_INCOME_LIMIT = (2266, 814)
+MEDI_CAL_INCOME_LIMIT = (1732, 600)
+CALWORKS_INCOME_LIMIT = (1100, 400)
+SSI_INCOME_LIMIT = 1000
+SSI_ASSET_LIMITS = (2000, 3000)  # individual, couple
+SSI_MIN_AGE = 65
+
+# Statuses that rule out federally funded benefits
+EXCLUDED_STATUSES = ("undocumented",)
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(number) else number
+
+
+def _numbers(frame: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in frame:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=float)
+
+
+def _flags(frame: pd.DataFrame, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(is True, is known) for a nullable boolean column."""
+    if column not in frame:
+        empty = np.zeros(len(frame), dtype=bool)
+        return empty, empty
+    flags = frame[column].astype("boolean")
+    return flags.fillna(False).to_numpy(dtype=bool), flags.notna().to_numpy(dtype=bool)
+
+
+def _money(value: float) -> str:
+    return f"${value:,.0f}"
+
+
+# ============================================
+# CRITERIA
+# ============================================
+# check() returns (passed, explanation) with passed=None when facts are missing.
+# mask() returns (passed, known) arrays with the same semantics.
+
+@dataclass(frozen=True)
+class IncomeLimit:
+    rule_id: str
+    base: float
+    per_member: float = 0
+    strict: bool = False  # "under" rather than "at or under"
+
+    def limit(self, size: float) -> float:
+        return self.base + self.per_member * (max(size, 1) - 1)
+
+    def check(self, facts: Dict[str, Any]) -> Tuple[Optional[bool], str]:
+        income = _number(facts.get("monthly_income"))
+        if income is None:
+            return None, "Monthly income not provided"
+        size = _number(facts.get("household_size"))
+        limit = self.limit(size or 1)
+        passed = income < limit if self.strict else income <= limit
+        if size is None and not passed:
+            return None, "Household size needed to apply the income limit"
+        household = f" for a household of {int(size)}" if size else ""
+        verb = "is within" if passed else "exceeds"
+        return passed, f"Monthly income {_money(income)} {verb} the {_money(limit)} limit{household}"
+
+    def mask(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        income = _numbers(frame, "monthly_income")
+        size = _numbers(frame, "household_size")
+        limit = self.base + self.per_member * (np.fmax(np.nan_to_num(size, nan=1.0), 1) - 1)
+        passed = income < limit if self.strict else income <= limit
+        known = ~np.isnan(income) & (passed | ~np.isnan(size))
+        return passed & known, known
+
+
+@dataclass(frozen=True)
+class AssetLimit:
+    rule_id: str
+    individual: float
+    couple: float
+
+    def check(self, facts: Dict[str, Any]) -> Tuple[Optional[bool], str]:
+        assets = _number(facts.get("total_assets"))
+        if assets is None:
+            return None, "Total assets not provided"
+        size = _number(facts.get("household_size")) or 1
+        limit = self.couple if size >= 2 else self.individual
+        verb = "are within" if assets <= limit else "exceed"
+        return assets <= limit, f"Assets {_money(assets)} {verb} the {_money(limit)} limit"
+
+    def mask(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        assets = _numbers(frame, "total_assets")
+        size = np.nan_to_num(_numbers(frame, "household_size"), nan=1.0)
+        limit = np.where(size >= 2, self.couple, self.individual)
+        known = ~np.isnan(assets)
+        return (assets <= limit) & known, known
+
+
+@dataclass(frozen=True)
+class AgedOrDisabled:
+    rule_id: str
+    min_age: int
+
+    def check(self, facts: Dict[str, Any]) -> Tuple[Optional[bool], str]:
+        age = _number(facts.get("age"))
+        disabled = facts.get("has_disability")
+        if disabled is True:
+            return True, "Has a disability"
+        if age is not None and age >= self.min_age:
+            return True, f"Age {int(age)} is {self.min_age} or older"
+        if age is None or disabled is None:
+            return None, "Age and disability status needed"
+        return False, f"Under {self.min_age} and not disabled"
+
+    def mask(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        age = _numbers(frame, "age")
+        disabled, disabled_known = _flags(frame, "has_disability")
+        passed = disabled | (age >= self.min_age)
+        known = passed | (~np.isnan(age) & disabled_known)
+        return passed, known
+
+
+@dataclass(frozen=True)
+class HasChildren:
+    rule_id: str
+
+    def check(self, facts: Dict[str, Any]) -> Tuple[Optional[bool], str]:
+        has_children = facts.get("has_children")
+        if has_children is None:
+            return None, "Whether there are children in the household is unknown"
+        return bool(has_children), "Has children under 18" if has_children else "No children in household"
+
+    def mask(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        return _flags(frame, "has_children")
+
+
+@dataclass(frozen=True)
+class StatusAllowed:
+    """Fails only on a reported status that rules the program out; a missing status is left to the caseworker."""
+
+    rule_id: str
+    excluded: Tuple[str, ...] = EXCLUDED_STATUSES
+
+    def check(self, facts: Dict[str, Any]) -> Tuple[Optional[bool], str]:
+        for key in ("citizenship_status", "immigration_status"):
+            status = str(facts.get(key) or "").lower()
+            if any(word in status for word in self.excluded):
+                return False, f"Reported status '{facts.get(key)}' is not eligible"
+        return True, "No disqualifying immigration status reported"
+
+    def mask(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        pattern = "|".join(self.excluded)
+        excluded = np.zeros(len(frame), dtype=bool)
+        for key in ("citizenship_status", "immigration_status"):
+            if key in frame:
+                column = frame[key].fillna("").astype(str).str.lower()
+                excluded |= column.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        return ~excluded, np.ones(len(frame), dtype=bool)
+
+
+@dataclass(frozen=True)
+class ProgramRule:
+    program: str
+    rule_id: str
+    criteria: Tuple[Any, ...]
+
+
+PROGRAM_RULES: List[ProgramRule] = [
+    ProgramRule("SNAP", "snap", (
+        StatusAllowed("snap.status"),
+        IncomeLimit("snap.gross_income", *SNAP_INCOME_LIMIT),
+    )),
+    ProgramRule("Medi-Cal", "medi_cal", (
+        StatusAllowed("medi_cal.status"),
+        IncomeLimit("medi_cal.income", *MEDI_CAL_INCOME_LIMIT),
+    )),
+    ProgramRule("SSI", "ssi", (
+        AgedOrDisabled("ssi.aged_or_disabled", SSI_MIN_AGE),
+        StatusAllowed("ssi.status"),
+        IncomeLimit("ssi.income", SSI_INCOME_LIMIT, strict=True),
+        AssetLimit("ssi.assets", *SSI_ASSET_LIMITS),
+    )),
+    ProgramRule("CalWORKs", "calworks", (
+        HasChildren("calworks.children"),
+        StatusAllowed("calworks.status"),
+        IncomeLimit("calworks.income", *CALWORKS_INCOME_LIMIT),
+    )),
+]
+
+# Where each fact lives in the nested intake extraction
+FACT_SOURCES: Dict[str, Tuple[str, str]] = {
+    "age": ("personal", "age"),
+    "household_size": ("household", "size"),
+    "has_children": ("household", "has_children"),
+    "monthly_income": ("financial", "monthly_income"),
+    "total_assets": ("financial", "total_assets"),
+    "has_disability": ("health", "has_disability"),
+    "citizenship_status": ("legal", "citizenship_status"),
+    "immigration_status": ("legal", "immigration_status"),
+}
+
+FACT_COLUMNS: List[str] = list(FACT_SOURCES)
+
+
+def facts_from_intake(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the nested extraction dict into the facts the rules read."""
+    facts = {}
+    for fact, (section, key) in FACT_SOURCES.items():
+        facts[fact] = (data.get(section) or {}).get(key)
+    return facts
+
+
+# ============================================
+# SCREENING
+# ============================================
+
+def screen_program(rule: ProgramRule, facts: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Screen one program. The first failing criterion makes the case ineligible;
+    otherwise the first criterion with missing facts makes it unknown.
+    """
+    first_unknown = None
+    reasons = []
+    for criterion in rule.criteria:
+        passed, explanation = criterion.check(facts)
+        if passed is False:
+            return {"program": rule.program, "status": STATUS_INELIGIBLE, "rule": criterion.rule_id, "reason": explanation}
+        if passed is None:
+            first_unknown = first_unknown or (criterion.rule_id, explanation)
+        else:
+            reasons.append(explanation)
+
+    if first_unknown:
+        return {"program": rule.program, "status": STATUS_UNKNOWN, "rule": first_unknown[0], "reason": first_unknown[1]}
+    return {"program": rule.program, "status": STATUS_ELIGIBLE, "rule": rule.rule_id, "reason": "; ".join(reasons)}
+
+
+def screen_case(facts: Dict[str, Any], rules: List[ProgramRule] = PROGRAM_RULES) -> Dict[str, Any]:
+    """Screen one case against every program."""
+    results = [screen_program(rule, facts) for rule in rules]
+    return {
+        "programs": [result["program"] for result in results if result["status"] == STATUS_ELIGIBLE],
+        "results": results,
+        "rules_version": ELIGIBILITY_RULES_VERSION,
+    }
+
+
+def screen_frame(frame: pd.DataFrame, rules: List[ProgramRule] = PROGRAM_RULES) -> pd.DataFrame:
+    """
+    Screen every row of ``frame`` (one column per fact) against every program.
+    Returns a frame with ``<rule_id>_status`` and ``<rule_id>_rule`` columns
+    per program plus an ``eligible_programs`` list column, index-aligned with
+    the input. Decisions match screen_case() row for row.
+    """
+    rows = len(frame)
+    output: Dict[str, Any] = {}
+    eligible_sets = np.zeros((len(rules), rows), dtype=bool)
+
+    for program_index, rule in enumerate(rules):
+        pending = np.ones(rows, dtype=bool)
+        status = np.zeros(rows, dtype=np.int8)           # 0 unknown, 1 eligible, 2 ineligible
+        decided_by = np.full(rows, -1, dtype=np.int16)    # criterion index, -1 = the program rule
+        first_unknown = np.full(rows, -1, dtype=np.int16)
+
+        for index, criterion in enumerate(rule.criteria):
+            passed, known = criterion.mask(frame)
+            failed = pending & known & ~passed
+            status[failed] = 2
+            decided_by[failed] = index
+            pending &= ~failed
+            first_unknown[pending & ~known & (first_unknown < 0)] = index
+
+        unknown = pending & (first_unknown >= 0)
+        status[unknown] = 0
+        decided_by[unknown] = first_unknown[unknown]
+        status[pending & ~unknown] = 1
+
+        rule_names = np.array([criterion.rule_id for criterion in rule.criteria] + [rule.rule_id], dtype=object)
+        output[f"{rule.rule_id}_status"] = _STATUS_NAMES[status]
+        output[f"{rule.rule_id}_rule"] = rule_names[decided_by]
+        eligible_sets[program_index] = status == 1
+
+    # Build each distinct program list once and share it across rows
+    bits = np.left_shift(np.int64(1), np.arange(len(rules), dtype=np.int64))
+    combos, inverse = np.unique(bits @ eligible_sets.astype(np.int64), return_inverse=True)
+    lists = [[rule.program for index, rule in enumerate(rules) if int(combo) >> index & 1] for combo in combos]
+    output["eligible_programs"] = [lists[i] for i in inverse.ravel()]
+    return pd.DataFrame(output, index=frame.index)
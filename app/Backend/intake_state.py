@@ -0,0 +1,317 @@
+"""
+Intake State - Compact typed representation of in-memory conversations
+Each live intake is a slotted ConversationState holding its history as
+(role, content) tuples with interned roles and its collected facts as slotted
+section records, instead of lists of dicts and a nested JSON dict rebuilt
+every turn. Dicts only appear at the boundaries (API payloads, views).
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field, fields
+from typing import Any, ClassVar, Dict, List, NamedTuple, Optional, Tuple, get_args, get_origin, get_type_hints
+
+from app.Backend.json_repair import Schema, compile_schema
+from app.Backend.token_usage import UsageLedger
+
+
+ROLE_SYSTEM = sys.intern("system")
+ROLE_USER = sys.intern("user")
+ROLE_ASSISTANT = sys.intern("assistant")
+_ROLES = {role: role for role in (ROLE_SYSTEM, ROLE_USER, ROLE_ASSISTANT)}
+
+FAKE_NAMES = frozenset({"John Doe", "Jane Doe", "Jane Smith", "John Smith"})
+EMPTY_VALUES = (None, "", [], {})
+
+
+class Message(NamedTuple):
+    """One chat turn. A plain tuple, so it costs no per-instance dict."""
+
+    role: str
+    content: str
+
+    @classmethod
+    def make(cls, role: str, content: str) -> "Message":
+        return cls(_ROLES.get(role) or sys.intern(role), content)
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
+# ============================================
+# INTAKE SECTIONS
+# ============================================
+
+class _Section:
+    """Shared behaviour for the slotted section records below."""
+
+    __slots__ = ()
+    FIELD_NAMES: ClassVar[Tuple[str, ...]] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        values = {}
+        for key in self.FIELD_NAMES:
+            value = getattr(self, key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def merge(self, updates: Dict[str, Any], overwrite: bool = True) -> List[str]:
+        """Apply non-empty updates; returns keys that were not fields of this section."""
+        unknown = []
+        for key, value in updates.items():
+            if key not in self.FIELD_NAMES:
+                unknown.append(key)
+                continue
+            if value in EMPTY_VALUES:
+                continue
+            if overwrite or getattr(self, key) in EMPTY_VALUES:
+                setattr(self, key, value)
+        return unknown
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, key) in EMPTY_VALUES for key in self.FIELD_NAMES)
+
+
+@dataclass(slots=True)
+class PersonalInfo(_Section):
+    full_name: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    age: Optional[int] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+
+
+@dataclass(slots=True)
+class HouseholdInfo(_Section):
+    size: Optional[int] = None
+    has_children: Optional[bool] = None
+    members: Optional[List[Dict[str, Any]]] = None
+
+
+@dataclass(slots=True)
+class EmploymentInfo(_Section):
+    status: Optional[str] = None
+    employer: Optional[str] = None
+    job_title: Optional[str] = None
+    duration: Optional[str] = None
+    looking_for_work: Optional[bool] = None
+
+
+@dataclass(slots=True)
+class FinancialInfo(_Section):
+    monthly_income: Optional[float] = None
+    income_sources: Optional[List[str]] = None
+    total_assets: Optional[float] = None
+    monthly_rent: Optional[float] = None
+    monthly_utilities: Optional[float] = None
+    monthly_medical: Optional[float] = None
+    monthly_childcare: Optional[float] = None
+    other_expenses: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class HousingInfo(_Section):
+    status: Optional[str] = None
+    address: Optional[str] = None
+    at_risk_of_homelessness: Optional[bool] = None
+
+
+@dataclass(slots=True)
+class HealthInfo(_Section):
+    has_disability: Optional[bool] = None
+    disability_details: Optional[str] = None
+    has_insurance: Optional[bool] = None
+    has_medical_expenses: Optional[bool] = None
+    monthly_medical_costs: Optional[float] = None
+
+
+@dataclass(slots=True)
+class LegalInfo(_Section):
+    citizenship_status: Optional[str] = None
+    immigration_status: Optional[str] = None
+
+
+@dataclass(slots=True)
+class CurrentBenefits(_Section):
+    receiving_benefits: Optional[bool] = None
+    programs: Optional[List[str]] = None
+
+
+@dataclass(slots=True)
+class EmergencyInfo(_Section):
+    has_urgent_needs: Optional[bool] = None
+    details: Optional[str] = None
+
+
+SECTIONS: Dict[str, type] = {
+    "personal": PersonalInfo,
+    "household": HouseholdInfo,
+    "employment": EmploymentInfo,
+    "financial": FinancialInfo,
+    "housing": HousingInfo,
+    "health": HealthInfo,
+    "legal": LegalInfo,
+    "current_benefits": CurrentBenefits,
+    "emergency": EmergencyInfo,
+}
+
+for _section_type in SECTIONS.values():
+    _section_type.FIELD_NAMES = tuple(f.name for f in fields(_section_type))
+
+
+def _schema_type(annotation: Any) -> Any:
+    """Map a field annotation onto the json_repair schema spec language."""
+    if get_origin(annotation) is not None and type(None) in get_args(annotation):
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    origin = get_origin(annotation)
+    if origin is list:
+        item = get_args(annotation)[0]
+        return [dict if get_origin(item) is dict else item]
+    if origin is dict:
+        return dict
+    return annotation
+
+
+def intake_schema_spec() -> Dict[str, Dict[str, Any]]:
+    """The extraction JSON shape, derived from the section records."""
+    return {
+        name: {key: _schema_type(hint) for key, hint in get_type_hints(section_type).items() if key in section_type.FIELD_NAMES}
+        for name, section_type in SECTIONS.items()
+    }
+
+
+INTAKE_SCHEMA: Schema = compile_schema(intake_schema_spec())
+
+
+@dataclass(slots=True)
+class IntakeState:
+    """
+    Everything collected during one intake.
+    Sections are created on first write so an early conversation holds almost
+    nothing; keys the model invents outside the known fields go to ``extras``.
+    """
+
+    personal: Optional[PersonalInfo] = None
+    household: Optional[HouseholdInfo] = None
+    employment: Optional[EmploymentInfo] = None
+    financial: Optional[FinancialInfo] = None
+    housing: Optional[HousingInfo] = None
+    health: Optional[HealthInfo] = None
+    legal: Optional[LegalInfo] = None
+    current_benefits: Optional[CurrentBenefits] = None
+    emergency: Optional[EmergencyInfo] = None
+    extras: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], validate: bool = True) -> "IntakeState":
+        """
+        Build state from extraction output. Pass ``validate=False`` when the
+        dict already went through INTAKE_SCHEMA (e.g. the streaming decoder).
+        """
+        state = cls()
+        if data:
+            state.merge(INTAKE_SCHEMA.validate(data) if validate else data)
+        return state
+
+    def section(self, name: str) -> _Section:
+        current = getattr(self, name)
+        if current is None:
+            current = SECTIONS[name]()
+            setattr(self, name, current)
+        return current
+
+    def merge(self, updates: Dict[str, Any], overwrite: bool = True) -> "IntakeState":
+        """
+        Merge nested extraction results in place.
+        Empty values never clobber existing data; with ``overwrite=False`` only
+        missing fields are filled.
+        """
+        for name, values in updates.items():
+            if name not in SECTIONS or not isinstance(values, dict):
+                self._merge_extra(name, values, overwrite)
+                continue
+            if all(value in EMPTY_VALUES for value in values.values()):
+                continue
+            unknown = self.section(name).merge(values, overwrite)
+            if unknown:
+                self._merge_extra(name, {key: values[key] for key in unknown}, overwrite)
+        return self
+
+    def _merge_extra(self, name: str, values: Any, overwrite: bool) -> None:
+        if values in EMPTY_VALUES:
+            return
+        if self.extras is None:
+            self.extras = {}
+        current = self.extras.get(name)
+        if isinstance(values, dict) and isinstance(current, dict):
+            for key, value in values.items():
+                if value not in EMPTY_VALUES and (overwrite or current.get(key) in EMPTY_VALUES):
+                    current[key] = value
+        elif overwrite or current in EMPTY_VALUES:
+            self.extras[name] = dict(values) if isinstance(values, dict) else values
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Nested dict for API responses and storage; unset fields are omitted."""
+        data: Dict[str, Any] = {}
+        for name in SECTIONS:
+            current = getattr(self, name)
+            if current is not None:
+                data[name] = current.to_dict()
+        if self.extras:
+            for name, values in self.extras.items():
+                if isinstance(values, dict) and isinstance(data.get(name), dict):
+                    data[name].update(values)
+                else:
+                    data[name] = values
+        return data
+
+    def is_empty(self) -> bool:
+        return not self.extras and all(
+            getattr(self, name) is None or getattr(self, name).is_empty() for name in SECTIONS
+        )
+
+    def drop_fake_name(self) -> None:
+        """Models sometimes fill in placeholder names; never keep them."""
+        if self.personal is not None and self.personal.full_name in FAKE_NAMES:
+            self.personal.full_name = None
+
+
+# ============================================
+# CONVERSATION STATE
+# ============================================
+
+@dataclass(slots=True)
+class ConversationState:
+    """One live intake conversation held by WatsonIntakeAssistant."""
+
+    system_prompt: str
+    history: List[Message] = field(default_factory=list)
+    data: IntakeState = field(default_factory=IntakeState)
+    questions_asked: int = 0
+    started_at: float = field(default_factory=time.time)
+    # Refreshed on every turn; idle conversations are evicted from memory
+    last_active: float = field(default_factory=time.time)
+    completed: bool = False
+    usage: UsageLedger = field(default_factory=UsageLedger)
+
+    def add(self, role: str, content: str) -> None:
+        self.history.append(Message.make(role, content))
+
+    def recent(self, count: int) -> List[Dict[str, str]]:
+        """The last ``count`` turns as chat API message dicts."""
+        return [message.as_dict() for message in self.history[-count:]]
+
+    def transcript(self) -> List[Dict[str, str]]:
+        return [message.as_dict() for message in self.history if message.role != ROLE_SYSTEM]
+
+    def pending_question(self) -> str:
+        """The assistant message the user is about to answer."""
+        for message in reversed(self.history):
+            if message.role == ROLE_ASSISTANT:
+                return message.content
+            if message.role == ROLE_USER:
+                break
+        return ""
@@ -0,0 +1,504 @@
+"""
+JSON Repair - Tolerant, incremental decoding of LLM JSON output
+Accepts the usual model defects (code fences, chatter around the object,
+single quotes, Python literals, "null" strings, trailing commas, truncated
+output), validates the result against a compiled schema and keeps running
+statistics about which repairs were needed, exported on /metrics.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.Backend.metrics import LLM_JSON_PARSES, LLM_JSON_REPAIRS
+from app.Backend.rule_extractor import parse_amount
+
+
+_NUMBER_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+_STRUCTURAL = ",:}]"
+NULL_STRINGS = frozenset({"null", "none", "n/a", "na", "undefined", "unknown"})
+
+
+@dataclass(slots=True)
+class ParsedJSON:
+    """Outcome of a tolerant parse."""
+
+    value: Any = None
+    repairs: Dict[str, int] = field(default_factory=dict)
+    complete: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.value is not None
+
+
+class RepairStats:
+    """Thread-safe running totals of parses and repairs."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.parses = 0
+        self.failures = 0
+        self.repaired = 0
+        self.repairs: Dict[str, int] = {}
+
+    def record(self, result: ParsedJSON) -> None:
+        with self._lock:
+            self.parses += 1
+            if not result.ok:
+                self.failures += 1
+            if result.repairs:
+                self.repaired += 1
+            for kind, count in result.repairs.items():
+                self.repairs[kind] = self.repairs.get(kind, 0) + count
+        LLM_JSON_PARSES.inc(outcome="failed" if not result.ok else "repaired" if result.repairs else "clean")
+        for kind, count in result.repairs.items():
+            LLM_JSON_REPAIRS.inc(count, kind=kind)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "parses": self.parses,
+                "failures": self.failures,
+                "repaired": self.repaired,
+                "repairs": dict(self.repairs),
+            }
+
+
+repair_stats = RepairStats()
+
+
+class _Truncated(Exception):
+    pass
+
+
+class _TolerantParser:
+    """Recursive-descent parser that never gives up on recoverable input."""
+
+    def __init__(self, text: str, repairs: Dict[str, int]) -> None:
+        self.text = text
+        self.pos = 0
+        self.n = len(text)
+        self.repairs = repairs
+
+    def note(self, kind: str) -> None:
+        self.repairs[kind] = self.repairs.get(kind, 0) + 1
+
+    def skip_ws(self) -> None:
+        while self.pos < self.n:
+            char = self.text[self.pos]
+            if char.isspace():
+                self.pos += 1
+            elif self.text.startswith("//", self.pos):
+                end = self.text.find("\n", self.pos)
+                self.pos = self.n if end == -1 else end
+                self.note("comment")
+            else:
+                break
+
+    def next_significant(self, start: int) -> str:
+        index = start
+        while index < self.n and self.text[index].isspace():
+            index += 1
+        return self.text[index] if index < self.n else ""
+
+    def parse_value(self) -> Any:
+        self.skip_ws()
+        if self.pos >= self.n:
+            raise _Truncated()
+        char = self.text[self.pos]
+        if char == "{":
+            return self.parse_object()
+        if char == "[":
+            return self.parse_array()
+        if char in "\"'":
+            return self.parse_string()
+        if char in "-0123456789.":
+            match = _NUMBER_RE.match(self.text, self.pos)
+            if match:
+                self.pos = match.end()
+                number = match.group()
+                return float(number) if any(c in number for c in ".eE") else int(number)
+        return self.parse_bare_word()
+
+    def parse_object(self) -> Dict[str, Any]:
+        self.pos += 1
+        obj: Dict[str, Any] = {}
+        while True:
+            self.skip_ws()
+            if self.pos >= self.n:
+                self.note("truncated")
+                return obj
+            char = self.text[self.pos]
+            if char == "}":
+                self.pos += 1
+                return obj
+            if char == ",":
+                self.pos += 1
+                if self.next_significant(self.pos) == "}":
+                    self.note("trailing_comma")
+                continue
+            if char in "\"'":
+                key = self.parse_string()
+            else:
+                key = self.parse_bare_word(stop=":,}")
+                self.note("unquoted_key")
+                key = "" if key is None else str(key)
+            self.skip_ws()
+            if self.pos >= self.n:
+                self.note("truncated")
+                obj[key] = None
+                return obj
+            if self.text[self.pos] == ":":
+                self.pos += 1
+            else:
+                self.note("missing_colon")
+            self.skip_ws()
+            if self.pos >= self.n:
+                self.note("truncated")
+                obj[key] = None
+                return obj
+            if self.text[self.pos] in ",}":
+                self.note("missing_value")
+                obj[key] = None
+                continue
+            try:
+                obj[key] = self.parse_value()
+            except _Truncated:
+                self.note("truncated")
+                obj[key] = None
+                return obj
+            self.skip_ws()
+            if self.pos < self.n and self.text[self.pos] not in ",}":
+                self.note("missing_comma")
+
+    def parse_array(self) -> List[Any]:
+        self.pos += 1
+        items: List[Any] = []
+        while True:
+            self.skip_ws()
+            if self.pos >= self.n:
+                self.note("truncated")
+                return items
+            char = self.text[self.pos]
+            if char == "]":
+                self.pos += 1
+                return items
+            if char == ",":
+                self.pos += 1
+                if self.next_significant(self.pos) == "]":
+                    self.note("trailing_comma")
+                continue
+            try:
+                items.append(self.parse_value())
+            except _Truncated:
+                self.note("truncated")
+                return items
+            self.skip_ws()
+            if self.pos < self.n and self.text[self.pos] not in ",]":
+                self.note("missing_comma")
+
+    def parse_string(self) -> str:
+        quote = self.text[self.pos]
+        if quote == "'":
+            self.note("single_quotes")
+        self.pos += 1
+        chars: List[str] = []
+        while self.pos < self.n:
+            char = self.text[self.pos]
+            if char == "\\" and self.pos + 1 < self.n:
+                escaped = self.text[self.pos + 1]
+                if escaped == "u" and self.pos + 6 <= self.n:
+                    try:
+                        chars.append(chr(int(self.text[self.pos + 2:self.pos + 6], 16)))
+                        self.pos += 6
+                        continue
+                    except ValueError:
+                        pass
+                chars.append({"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}.get(escaped, escaped))
+                self.pos += 2
+                continue
+            if char == quote:
+                # Only a quote followed by structure (or the end) closes the string;
+                # anything else is an unescaped quote or apostrophe inside it.
+                following = self.next_significant(self.pos + 1)
+                if following == "" or following in _STRUCTURAL:
+                    self.pos += 1
+                    return "".join(chars)
+                self.note("unescaped_quote")
+            chars.append(char)
+            self.pos += 1
+        self.note("truncated")
+        return "".join(chars)
+
+    def parse_bare_word(self, stop: str = ",}]\n") -> Any:
+        start = self.pos
+        while self.pos < self.n and self.text[self.pos] not in stop:
+            self.pos += 1
+        word = self.text[start:self.pos].strip()
+        if self.pos == start:
+            # Stray structural character; step over it so parsing can continue
+            self.pos += 1
+            self.note("stray_character")
+            return None
+        if word in ("true", "false", "null"):
+            return {"true": True, "false": False, "null": None}[word]
+        if word in ("True", "False", "None"):
+            self.note("python_literal")
+            return {"True": True, "False": False, "None": None}[word]
+        if word in ("undefined", "NaN"):
+            self.note("python_literal")
+            return None
+        self.note("bare_word")
+        return word
+
+
+def _replace_null_strings(value: Any, repairs: Dict[str, int]) -> Any:
+    if isinstance(value, dict):
+        return {key: _replace_null_strings(item, repairs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace_null_strings(item, repairs) for item in value]
+    if isinstance(value, str) and value.strip().lower() in NULL_STRINGS:
+        repairs["null_string"] = repairs.get("null_string", 0) + 1
+        return None
+    return value
+
+
+def parse_llm_json(text: str, schema: Optional["Schema"] = None, record: bool = True) -> ParsedJSON:
+    """
+    Decode model output into JSON, repairing what can be repaired.
+    Returns a ``ParsedJSON`` whose ``value`` is None when nothing usable was found.
+    """
+    repairs: Dict[str, int] = {}
+    result = ParsedJSON(repairs=repairs)
+
+    if "```" in text:
+        text = _FENCE_RE.sub("", text)
+        repairs["code_fence"] = 1
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        if record:
+            repair_stats.record(result)
+        return result
+    start = min(starts)
+    if text[:start].strip():
+        repairs["leading_text"] = 1
+
+    parser = _TolerantParser(text, repairs)
+    parser.pos = start
+    try:
+        value = parser.parse_value()
+    except _Truncated:
+        value = None
+    parser.skip_ws()
+    if parser.pos < parser.n:
+        repairs["trailing_text"] = 1
+
+    result.value = _replace_null_strings(value, repairs)
+    result.complete = "truncated" not in repairs
+    if schema is not None and result.value is not None:
+        result.value = schema.validate(result.value, repairs)
+    if record:
+        repair_stats.record(result)
+    return result
+
+
+class StreamingJSONDecoder:
+    """
+    Incremental decoder for JSON that arrives in chunks.
+    ``update`` can be passed as a streaming ``stop_when`` callback: it scans
+    only the new text and returns True once the top-level value has closed,
+    so generation of trailing chatter can be cancelled.
+    """
+
+    def __init__(self, schema: Optional["Schema"] = None) -> None:
+        self.schema = schema
+        self.buffer = ""
+        self._scanned = 0
+        self._depth = 0
+        self._started = False
+        self._in_string: Optional[str] = None
+        self._escape = False
+        self._last_structural = ""
+        self.complete = False
+
+    def feed(self, chunk: str) -> bool:
+        """Append a chunk; True once the top-level value is complete."""
+        return self.update(self.buffer + chunk)
+
+    def update(self, text: str) -> bool:
+        """Scan everything in ``text`` past what has already been seen."""
+        self.buffer = text
+        for char in text[self._scanned:]:
+            self._scanned += 1
+            if self.complete:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == self._in_string:
+                    self._in_string = None
+                continue
+            if char in "{[":
+                self._started = True
+                self._depth += 1
+            elif char in "}]" and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+            elif self._started and (char == '"' or (char == "'" and self._last_structural in "{[,:")):
+                self._in_string = char
+            if not char.isspace():
+                self._last_structural = char
+        return self.complete
+
+    def snapshot(self) -> ParsedJSON:
+        """Best-effort parse of what has arrived so far (not recorded in stats)."""
+        return parse_llm_json(self.buffer, self.schema, record=False)
+
+    def result(self) -> ParsedJSON:
+        """Final parse of the whole buffer."""
+        return parse_llm_json(self.buffer, self.schema)
+
+
+# ============================================
+# SCHEMAS
+# ============================================
+
+Coercer = Callable[[Any, Dict[str, int]], Any]
+
+
+def _note(repairs: Dict[str, int], kind: str) -> None:
+    repairs[kind] = repairs.get(kind, 0) + 1
+
+
+def _coerce_int(value: Any, repairs: Dict[str, int]) -> Any:
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    number = parse_amount(value) if not isinstance(value, bool) else None
+    if number is None:
+        _note(repairs, "schema_invalid")
+        return None
+    _note(repairs, "schema_coerced")
+    return int(round(number))
+
+
+def _coerce_float(value: Any, repairs: Dict[str, int]) -> Any:
+    if value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)):
+        return value
+    number = parse_amount(value) if not isinstance(value, bool) else None
+    if number is None:
+        _note(repairs, "schema_invalid")
+        return None
+    _note(repairs, "schema_coerced")
+    return number
+
+
+def _coerce_bool(value: Any, repairs: Dict[str, int]) -> Any:
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("yes", "y", "true", "t"):
+            _note(repairs, "schema_coerced")
+            return True
+        if lowered in ("no", "n", "false", "f"):
+            _note(repairs, "schema_coerced")
+            return False
+    if isinstance(value, (int, float)):
+        _note(repairs, "schema_coerced")
+        return bool(value)
+    _note(repairs, "schema_invalid")
+    return None
+
+
+def _coerce_str(value: Any, repairs: Dict[str, int]) -> Any:
+    if value is None or isinstance(value, str):
+        return value
+    _note(repairs, "schema_coerced")
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value)
+    return str(value)
+
+
+def _any(value: Any, repairs: Dict[str, int]) -> Any:
+    return value
+
+
+_SCALARS: Dict[Any, Coercer] = {
+    int: _coerce_int,
+    float: _coerce_float,
+    bool: _coerce_bool,
+    str: _coerce_str,
+    Any: _any,
+}
+
+
+def _compile(spec: Any) -> Coercer:
+    if not isinstance(spec, (list, dict)) and spec in _SCALARS:
+        return _SCALARS[spec]
+
+    if spec is dict or spec is list:
+        kind = spec
+
+        def coerce_container(value: Any, repairs: Dict[str, int]) -> Any:
+            if value is None or isinstance(value, kind):
+                return value
+            _note(repairs, "schema_invalid")
+            return kind()
+        return coerce_container
+
+    if isinstance(spec, list):
+        item = _compile(spec[0]) if spec else _any
+
+        def coerce_list(value: Any, repairs: Dict[str, int]) -> Any:
+            if value is None:
+                return []
+            if not isinstance(value, list):
+                _note(repairs, "schema_coerced")
+                value = [value]
+            return [item(entry, repairs) for entry in value]
+        return coerce_list
+
+    if isinstance(spec, dict):
+        fields = {key: _compile(sub) for key, sub in spec.items()}
+
+        def coerce_object(value: Any, repairs: Dict[str, int]) -> Any:
+            if value is None:
+                return {}
+            if not isinstance(value, dict):
+                _note(repairs, "schema_invalid")
+                return {}
+            cleaned = dict(value)
+            for key, coerce in fields.items():
+                if key in cleaned:
+                    cleaned[key] = coerce(cleaned[key], repairs)
+            return cleaned
+        return coerce_object
+
+    raise TypeError(f"Unsupported schema spec: {spec!r}")
+
+
+class Schema:
+    """
+    A schema compiled into nested coercion functions.
+    Specs use Python types (``int``, ``float``, ``bool``, ``str``, ``dict``,
+    ``list``), ``[spec]`` for typed lists and nested dicts for objects.
+    Unknown keys are kept; known keys are coerced or nulled.
+    """
+
+    def __init__(self, spec: Any) -> None:
+        self.spec = spec
+        self._coerce = _compile(spec)
+
+    def validate(self, value: Any, repairs: Optional[Dict[str, int]] = None) -> Any:
+        return self._coerce(value, repairs if repairs is not None else {})
+
+
+def compile_schema(spec: Any) -> Schema:
+    return Schema(spec)
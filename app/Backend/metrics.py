@@ -0,0 +1,300 @@
+"""
+Metrics - In-process registry in the Prometheus text format
+Counters, gauges and histograms for the intake pipeline, served by the
+/metrics endpoint (chatbot.views.metrics) for Prometheus or any compatible
+scraper. Values live in this process only: with several server workers,
+each worker reports its own series, and the scraper sums them.
+
+The pipeline's metrics are declared at the bottom of this module so the
+full inventory can be read in one place.
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; spans a cached IAM token up to a slow full extraction
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _series(name: str, labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{label}="{_escape(value)}"' for label, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return f"{name}{{{','.join(pairs)}}}" if pairs else name
+
+
+class Metric:
+    """Base for labelled metrics; one value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        # Unlabelled series report 0 before their first update
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError(f"{self.name} can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{_series(self.name, self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Metric):
+    """Current value; either set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        # Unlabelled series report 0 before their first update
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Report ``function()`` on every scrape (unlabelled gauges only)."""
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels; set values instead")
+        self._function = function
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{_series(self.name, self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts..., sum]
+        self._values: Dict[LabelValues, List[float]] = {} if self.labelnames else {(): self._empty()}
+
+    def _empty(self) -> List[float]:
+        return [0] * len(self.buckets) + [0.0]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = self._empty()
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[index] += 1
+                    break
+            entry[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(entry)) for key, entry in self._values.items())
+        lines = []
+        for key, entry in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                bucket = _series(f"{self.name}_bucket", self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{bucket} {int(cumulative)}")
+            lines.append(f"{_series(f'{self.name}_sum', self.labelnames, key)} {_format_value(entry[-1])}")
+            lines.append(f"{_series(f'{self.name}_count', self.labelnames, key)} {int(cumulative)}")
+        return lines
+
+
+class Registry:
+    """All metrics of this process, rendered together for a scrape."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Content type of the text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ============================================
+# INTAKE PIPELINE METRICS
+# ============================================
+
+WATSON_CALL_SECONDS = histogram(
+    "claimit_watsonx_call_seconds",
+    "watsonx.ai chat call latency by intake task (reply, question_analysis, extraction, summary)",
+    ["task", "outcome"],
+)
+WATSON_TOKENS = counter(
+    "claimit_watsonx_tokens_total",
+    "Tokens reported by watsonx.ai (estimated when usage is missing) by intake task",
+    ["task", "kind"],
+)
+WATSON_IAM_REFRESHES = counter(
+    "claimit_watsonx_iam_refreshes_total",
+    "IBM Cloud IAM access token fetches",
+    ["outcome"],
+)
+SUPABASE_SYNCS = counter(
+    "claimit_supabase_syncs_total",
+    "Supabase sync calls by operation and outcome",
+    ["operation", "outcome"],
+)
+SUPABASE_SYNC_SECONDS = histogram(
+    "claimit_supabase_sync_seconds",
+    "Supabase sync call latency by operation",
+    ["operation"],
+)
+CONVERSATIONS_IN_MEMORY = gauge(
+    "claimit_intake_conversations_in_memory",
+    "Intake conversations currently held in memory by this process",
+)
+CONVERSATIONS_EVICTED = counter(
+    "claimit_intake_conversations_evicted_total",
+    "Idle intake conversations dropped from memory",
+)
+INTAKES_STARTED = counter(
+    "claimit_intakes_started_total",
+    "Intake conversations started; completion rate is completed / started",
+)
+INTAKES_COMPLETED = counter(
+    "claimit_intakes_completed_total",
+    "Intake conversations that reached completion",
+)
+TURNS_PER_INTAKE = histogram(
+    "claimit_intake_turns",
+    "Applicant messages needed to complete an intake",
+    buckets=(5, 10, 15, 20, 25, 30, 40, 50, 75),
+)
+INTAKE_EXTRACTIONS = counter(
+    "claimit_intake_extractions_total",
+    "Turns by extraction path: llm_calls (full), focused_calls (last exchange only), rule_only or skipped (no LLM call)",
+    ["path"],
+)
+REPLY_EARLY_STOPS = counter(
+    "claimit_watsonx_reply_early_stops_total",
+    "Streamed intake replies cancelled once they held a complete question",
+)
+REPLY_TOKENS_SAVED = counter(
+    "claimit_watsonx_reply_tokens_saved_total",
+    "Upper bound of completion tokens not generated thanks to early stops (max_tokens - generated)",
+)
+LLM_JSON_PARSES = counter(
+    "claimit_llm_json_parses_total",
+    "Model JSON outputs decoded, by outcome: clean, repaired or failed",
+    ["outcome"],
+)
+LLM_JSON_REPAIRS = counter(
+    "claimit_llm_json_repairs_total",
+    "Repairs applied to model JSON output, by kind (code_fence, trailing_comma, truncated, ...)",
+    ["kind"],
+)
+CONVERSATION_LOCK_ACQUISITIONS = counter(
+    "claimit_conversation_lock_acquisitions_total",
+    "Per-conversation turn locks taken; contended=\"true\" when the turn queued behind another",
+    ["contended"],
+)
+CONVERSATION_LOCK_WAIT_SECONDS = histogram(
+    "claimit_conversation_lock_wait_seconds",
+    "Time a contended turn waited for its conversation's lock",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0),
+)
+CONVERSATION_LOCKS_ACTIVE = gauge(
+    "claimit_conversation_locks_active",
+    "Conversations with a turn holding or waiting for their lock",
+)
+CONVERSATION_TURNS_QUEUED = gauge(
+    "claimit_conversation_turns_queued",
+    "Turns waiting behind another turn of the same conversation",
+)
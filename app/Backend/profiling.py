@@ -0,0 +1,255 @@
+"""
+Profiling - Opt-in sampling profiler for single requests
+chatbot.middleware.ProfilingMiddleware profiles a request when it carries a
+valid signed X-Profile header or is picked by PROFILING_SAMPLE_RATE. A
+daemon thread samples the handling thread's stack every few milliseconds
+(sys._current_frames), so profiled code runs unmodified, and the result is
+written as a speedscope file (https://www.speedscope.app) or as folded
+stacks for flamegraph.pl. Only the slowest PROFILING_KEEP profiles are kept.
+
+With neither a secret nor a sample rate configured the middleware removes
+itself at startup, so a disabled profiler costs nothing per request.
+
+    PROFILING_SECRET=...            # enables signed X-Profile headers
+    PROFILING_SAMPLE_RATE=0.001     # also profile a random fraction of requests
+    PROFILING_DIR=/tmp/claimit-profiles
+    PROFILING_KEEP=20
+    PROFILING_INTERVAL_MS=5
+    PROFILING_FORMAT=speedscope | folded
+
+Sign a header valid for ten minutes:
+
+    python -m app.Backend.profiling --sign 600
+    curl -H "X-Profile: <value>" ...
+
+Under an ASGI server the event-loop thread is sampled, so time spent
+awaiting shows up as the loop's selector and concurrent requests on the
+same loop appear in the profile too. Async views behind a WSGI server
+(e.g. runserver) run on asgiref's own loop thread, and the profile only
+shows the request thread waiting for it.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+PROFILING_SECRET = os.getenv("PROFILING_SECRET", "")
+SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILING_DIR") or os.path.join(tempfile.gettempdir(), "claimit-profiles")
+KEEP = int(os.getenv("PROFILING_KEEP", "20"))
+INTERVAL_SECONDS = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000
+OUTPUT_FORMAT = os.getenv("PROFILING_FORMAT", "speedscope").lower()
+
+MAX_STACK_DEPTH = 256
+# Signed headers may not be valid for longer than this
+MAX_SIGNATURE_TTL = 24 * 3600
+
+# (function, file, first line of the function)
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+_FILENAME = re.compile(r"^(\d{9})ms-")
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def enabled() -> bool:
+    return bool(PROFILING_SECRET) or SAMPLE_RATE > 0
+
+
+# ============================================
+# SIGNED TRIGGER HEADER
+# ============================================
+
+def _signature(expires: int) -> str:
+    return hmac.new(PROFILING_SECRET.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def sign(ttl_seconds: int) -> str:
+    """X-Profile header value that triggers profiling until ``ttl_seconds`` from now."""
+    if not PROFILING_SECRET:
+        raise ValueError("PROFILING_SECRET is not set")
+    expires = int(time.time()) + min(ttl_seconds, MAX_SIGNATURE_TTL)
+    return f"{expires}.{_signature(expires)}"
+
+
+def verify(header: Optional[str]) -> bool:
+    """True for an unexpired header produced by sign() with this process's secret."""
+    if not PROFILING_SECRET or not header:
+        return False
+    expires, _, signature = header.strip().partition(".")
+    if not expires.isdigit():
+        return False
+    remaining = int(expires) - time.time()
+    if remaining < 0 or remaining > MAX_SIGNATURE_TTL:
+        return False
+    return hmac.compare_digest(signature, _signature(int(expires)))
+
+
+# ============================================
+# SAMPLER
+# ============================================
+
+class StackSampler:
+    """Samples one thread's call stack on a daemon thread until stopped."""
+
+    def __init__(self, thread_id: int, interval: float = INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.started = 0.0
+        self.duration = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="request-profiler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stopped.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    def _loop(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._stack(frame)] += 1
+
+    @staticmethod
+    def _stack(frame) -> Stack:
+        """Root-first stack of the frame's callers."""
+        stack: List[Frame] = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+
+# ============================================
+# OUTPUT
+# ============================================
+
+def _short_path(path: str) -> str:
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and path.startswith(prefix.rstrip(os.sep) + os.sep):
+            return path[len(prefix.rstrip(os.sep)) + 1:]
+    return path
+
+
+def speedscope(sampler: StackSampler, name: str) -> Dict:
+    """Sampled profile in speedscope's file format."""
+    frames: List[Dict] = []
+    index: Dict[Frame, int] = {}
+    samples, weights = [], []
+    interval_ms = sampler.interval * 1000
+    for stack, count in sampler.samples.items():
+        indexed = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": _short_path(frame[1]), "line": frame[2]})
+            indexed.append(index[frame])
+        samples.append(indexed)
+        weights.append(count * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "claimit profiling",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+def folded(sampler: StackSampler) -> str:
+    """Folded stacks ("a;b;c count" per line) for flamegraph.pl or speedscope."""
+    lines = []
+    for stack, count in sampler.samples.items():
+        names = ";".join(f"{frame[0]} ({_short_path(frame[1])}:{frame[2]})" for frame in stack)
+        lines.append(f"{names} {count}")
+    return "\n".join(lines) + "\n"
+
+
+# ============================================
+# RETENTION
+# ============================================
+
+_write_lock = threading.Lock()
+
+
+def _kept_profiles() -> List[Tuple[int, str]]:
+    """(duration ms, filename) of stored profiles, slowest first."""
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    kept = []
+    for filename in names:
+        match = _FILENAME.match(filename)
+        if match:
+            kept.append((int(match.group(1)), filename))
+    return sorted(kept, reverse=True)
+
+
+def save(sampler: StackSampler, name: str) -> Optional[str]:
+    """
+    Store the profile if it is among the slowest KEEP, evicting the fastest
+    kept one; returns the file path, or None when it was not slow enough.
+    """
+    duration_ms = int(sampler.duration * 1000)
+    extension = "folded.txt" if OUTPUT_FORMAT == "folded" else "speedscope.json"
+    filename = f"{duration_ms:09d}ms-{_UNSAFE.sub('_', name).strip('_')[:80]}-{int(time.time() * 1000)}.{extension}"
+    with _write_lock:
+        kept = _kept_profiles()
+        if len(kept) >= KEEP and kept and duration_ms <= kept[-1][0]:
+            return None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, filename)
+        with open(path, "w") as f:
+            if extension == "folded.txt":
+                f.write(folded(sampler))
+            else:
+                json.dump(speedscope(sampler, name), f)
+        for _, stale in kept[max(KEEP - 1, 0):]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, stale))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Request profiling helpers")
+    parser.add_argument("--sign", type=int, metavar="SECONDS", help="Print an X-Profile header value valid this long")
+    parser.add_argument("--list", action="store_true", help="List kept profiles, slowest first")
+    args = parser.parse_args()
+    if args.sign:
+        print(sign(args.sign))
+    if args.list or not args.sign:
+        for duration_ms, filename in _kept_profiles():
+            print(f"{duration_ms:>8,} ms  {os.path.join(PROFILE_DIR, filename)}")
+
+
+if __name__ == "__main__":
+    main()
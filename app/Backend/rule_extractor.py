@@ -0,0 +1,501 @@
+"""
+Rule Extractor - Deterministic fast path for single-fact answers
+Pulls phones, emails, dates of birth, ages, household sizes and dollar amounts
+out of a user message with precompiled patterns, so short answers like
+"555-123-4567" or "$1,200" don't need an LLM extraction call.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+
+PHONE_RE = re.compile(r"(?<![\d$])(?:\+?1[\s.-]?)?\(?(\d{3})\)?[\s.-]?(\d{3})[\s.-]?(\d{4})(?!\d)")
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH_NAME = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+US_DATE_RE = re.compile(r"\b(\d{1,2})[/-](\d{1,2})[/-](\d{4})\b")
+MONTH_FIRST_RE = re.compile(r"\b" + _MONTH_NAME + r"\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b", re.IGNORECASE)
+DAY_FIRST_RE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH_NAME + r",?\s+(\d{4})\b", re.IGNORECASE)
+
+# Ages stated outright ("34 years old", "aged 34", "age: 34")
+AGE_RE = re.compile(
+    r"\b(\d{1,3})\s*(?:years?|yrs?)[\s-]+old\b"
+    r"|\b(?:aged|age(?:\s+is)?:?)\s+(\d{1,3})\b",
+    re.IGNORECASE,
+)
+# Looser forms ("I'm 34", "34 years") only count as an answer to an age question
+AGE_ANSWER_RE = re.compile(
+    r"\b(\d{1,3})\s*(?:years?|yrs?)\b"
+    r"|\b(?:i'?m|i am)\s+(\d{1,3})\b(?!\s*(?:[a-z%$/-]|\d))",
+    re.IGNORECASE,
+)
+# A pending question about age or birth date, or a message that talks about birth
+AGE_QUESTION_RE = re.compile(r"\b(?:how old|age|date of birth|birth ?date|birthday|born|dob)\b")
+BIRTH_MENTION_RE = re.compile(r"\b(?:born|birthday|date of birth|birth ?date|dob)\b", re.IGNORECASE)
+# "My son is 7 years old" is a household member's age, not the applicant's
+OTHER_PERSON_RE = re.compile(
+    r"\b(?:son|daughter|kids?|child(?:ren)?|baby|boy|girl|wife|husband|partner|mom|mother|dad|father"
+    r"|brother|sister|grand\w*|he|she|they)\b"
+)
+SELF_RE = re.compile(r"\b(?:i'?m|i am|i was|myself)\b")
+MAX_AGE = 120
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_COUNT = r"(\d{1,2}|one|two|three|four|five|six|seven|eight|nine|ten)"
+HOUSEHOLD_RE = re.compile(
+    r"\b" + _COUNT + r"\s+(?:people|persons|of us|members|in (?:my|the|our) (?:household|house|home|family))\b"
+    r"|\bfamily of\s+" + _COUNT + r"\b",
+    re.IGNORECASE,
+)
+LIVES_ALONE_RE = re.compile(r"\b(?:just me|only me|by myself|live alone|living alone|i'?m alone|i am alone)\b", re.IGNORECASE)
+
+MONEY_RE = re.compile(
+    r"\$\s?(\d[\d,]*(?:\.\d+)?)\s?(k\b)?"
+    r"|\b(\d[\d,]*(?:\.\d+)?)\s?(k\b)?\s*(?:dollars|bucks|usd)\b"
+    r"|\b(\d+(?:\.\d+)?)\s?(k)\b",
+    re.IGNORECASE,
+)
+NO_INCOME_RE = re.compile(
+    r"\b(?:no income|zero income|don'?t have (?:any )?income|not making (?:any )?money|no money coming in)\b",
+    re.IGNORECASE,
+)
+# Pay periods around an amount. Weekly, biweekly and yearly amounts are
+# converted to monthly; hourly and daily ones depend on hours worked and are
+# left to the LLM extraction.
+YEARLY_RE = re.compile(r"(?:\b(?:a|per|each|every)\s+|/\s*)(?:year|yr)\b|\bannual(?:ly)?\b|\byearly\b", re.IGNORECASE)
+BIWEEKLY_RE = re.compile(r"\bevery (?:two|2|other) weeks?\b|\bbi-?weekly\b", re.IGNORECASE)
+WEEKLY_RE = re.compile(r"(?:\b(?:a|per|each|every)\s+|/\s*)(?:week|wk)\b|\bweekly\b", re.IGNORECASE)
+HOURLY_RE = re.compile(
+    r"(?:\b(?:an?|per|each|every)\s+|/\s*)(?:hour|hr|day|shift)\b|\bhourly\b|\bdaily\b",
+    re.IGNORECASE,
+)
+BARE_NUMBER_RE = re.compile(r"^\s*(\d{1,3})\s*[.!]?\s*$")
+
+# Keyword -> financial field. The first field whose keyword appears in the
+# clause around an amount (or in the pending question) wins.
+AMOUNT_FIELDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("monthly_rent", ("rent", "mortgage")),
+    ("monthly_utilities", ("utilit", "electric", "gas bill", "water bill", "power bill")),
+    ("monthly_childcare", ("childcare", "child care", "daycare", "day care", "babysit")),
+    ("monthly_medical", ("medical", "medicine", "prescription", "doctor", "copay")),
+    ("total_assets", ("savings", "saved", "in the bank", "bank account", "assets", "checking")),
+    ("monthly_income", ("income", "earn", "make", "salary", "wage", "paid", "paycheck", "unemployment", "ssi", "social security", "bring in")),
+]
+
+# Words that carry no information beyond the facts matched above. If a message
+# has nothing else left, the rule pass explains the whole turn. Amount keywords
+# ("rent", "unemployment", ...) are not filler: they can name an income source
+# or expense the rules don't record, so they send the turn to the LLM.
+FILLER_WORDS = frozenset("""
+a about and approximately are around at bill bills born bring brings but cell currently dollars
+email exactly family get gets give have home house household i i'm im in including is it it's
+its just like live lives living me mine month monthly my now number of ok okay old on our per
+phone pay pays people person persons right roughly so sure that's the there there's total us
+was we we're were week weekly weeks with year yearly years yes yeah yep annual annually
+""".split())
+
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+@dataclass(slots=True)
+class RuleExtraction:
+    """Result of the deterministic pass over one user message."""
+
+    updates: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    fully_explained: bool = False
+    matched_fields: List[str] = field(default_factory=list)
+
+    def set(self, section: str, key: str, value: Any) -> None:
+        self.updates.setdefault(section, {})[key] = value
+        self.matched_fields.append(f"{section}.{key}")
+
+
+def parse_amount(value: Any) -> float | None:
+    """Parse a dollar amount like "$1,200", "1.5k" or 900 into a float."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = value.lower().replace("usd", "").replace(",", "").replace("$", " ").strip()
+        multiplier = 1.0
+        if cleaned.endswith("k"):
+            multiplier = 1000.0
+            cleaned = cleaned[:-1]
+        match = re.search(r"-?\d+(\.\d+)?", cleaned)
+        if not match:
+            return None
+        try:
+            return float(match.group()) * multiplier
+        except ValueError:
+            return None
+    return None
+
+
+def _to_iso(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def _age_from_dob(dob_iso: str, today: Optional[date] = None) -> int:
+    today = today or date.today()
+    born = date.fromisoformat(dob_iso)
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def _find_date(message: str) -> Optional[Tuple[str, Tuple[int, int]]]:
+    match = ISO_DATE_RE.search(message)
+    if match:
+        iso = _to_iso(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if iso:
+            return iso, match.span()
+    match = US_DATE_RE.search(message)
+    if match:
+        iso = _to_iso(int(match.group(3)), int(match.group(1)), int(match.group(2)))
+        if iso:
+            return iso, match.span()
+    match = MONTH_FIRST_RE.search(message)
+    if match:
+        iso = _to_iso(int(match.group(3)), MONTHS[match.group(1).lower()], int(match.group(2)))
+        if iso:
+            return iso, match.span()
+    match = DAY_FIRST_RE.search(message)
+    if match:
+        iso = _to_iso(int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1)))
+        if iso:
+            return iso, match.span()
+    return None
+
+
+def _amount_field(context: str) -> Optional[str]:
+    for field_name, keywords in AMOUNT_FIELDS:
+        if any(keyword in context for keyword in keywords):
+            return field_name
+    return None
+
+
+def _clause_around(message_lower: str, start: int, end: int) -> str:
+    """The clause an amount sits in, bounded by sentence punctuation and 'and'/'but'."""
+    left = max(message_lower.rfind(sep, 0, start) for sep in (".", ";", "!", "?", " and ", " but "))
+    rights = [pos for pos in (message_lower.find(sep, end) for sep in (".", ";", "!", "?", " and ", " but ")) if pos != -1]
+    right = min(rights) if rights else len(message_lower)
+    return message_lower[left + 1:right]
+
+
+def _applicant_age(match: re.Match, message_lower: str) -> bool:
+    """A plausible age that the clause attributes to the applicant."""
+    if not 0 < int(match.group(1) or match.group(2)) < MAX_AGE:
+        return False
+    clause = _clause_around(message_lower, *match.span())
+    return not OTHER_PERSON_RE.search(clause) or bool(SELF_RE.search(clause))
+
+
+def extract_facts(message: str, pending_question: str = "", today: Optional[date] = None) -> RuleExtraction:
+    """
+    Run the deterministic extractor over one user message.
+    ``pending_question`` is the assistant message the user is answering; it
+    decides where bare answers like "45" or "$1,200" belong, and whether
+    dates and loosely phrased ages are the applicant's own.
+    """
+    result = RuleExtraction()
+    message_lower = message.lower()
+    question_lower = pending_question.lower()
+    consumed: List[Tuple[int, int]] = []
+
+    for match in EMAIL_RE.finditer(message):
+        result.set("personal", "email", match.group(0))
+        consumed.append(match.span())
+        break
+
+    # Dates and ages are only read as the applicant's when age or birth is the
+    # subject; "I lost my job on 03/15/2024" or "unemployed for 2 years" are not.
+    asks_age = bool(AGE_QUESTION_RE.search(question_lower))
+    found_date = _find_date(message) if asks_age or BIRTH_MENTION_RE.search(message) else None
+    if found_date:
+        iso, span = found_date
+        age = _age_from_dob(iso, today)
+        if 0 <= age < MAX_AGE:
+            result.set("personal", "date_of_birth", iso)
+            result.set("personal", "age", age)
+            consumed.append(span)
+
+    for match in PHONE_RE.finditer(message):
+        if any(start <= match.start() < end for start, end in consumed):
+            continue
+        result.set("personal", "phone", f"{match.group(1)}-{match.group(2)}-{match.group(3)}")
+        consumed.append(match.span())
+        break
+
+    if "personal.age" not in result.matched_fields:
+        for pattern in (AGE_RE, AGE_ANSWER_RE) if asks_age else (AGE_RE,):
+            match = next((m for m in pattern.finditer(message) if _applicant_age(m, message_lower)), None)
+            if match:
+                result.set("personal", "age", int(match.group(1) or match.group(2)))
+                consumed.append(match.span())
+                break
+
+    match = HOUSEHOLD_RE.search(message)
+    if match:
+        raw = (match.group(1) or match.group(2)).lower()
+        result.set("household", "size", NUMBER_WORDS.get(raw) or int(raw))
+        consumed.append(match.span())
+    else:
+        match = LIVES_ALONE_RE.search(message)
+        if match:
+            result.set("household", "size", 1)
+            consumed.append(match.span())
+
+    for match in MONEY_RE.finditer(message):
+        raw = (match.group(1) or match.group(3) or match.group(5)) + ("k" if (match.group(2) or match.group(4) or match.group(6)) else "")
+        amount = parse_amount(raw)
+        if amount is None:
+            continue
+        clause = _clause_around(message_lower, *match.span())
+        field_name = _amount_field(clause) or _amount_field(question_lower)
+        if field_name is None or f"financial.{field_name}" in result.matched_fields:
+            continue
+        if HOURLY_RE.search(clause):
+            continue
+        if YEARLY_RE.search(clause):
+            amount = round(amount / 12, 2)
+        elif BIWEEKLY_RE.search(clause):
+            amount = round(amount * 26 / 12, 2)
+        elif WEEKLY_RE.search(clause):
+            amount = round(amount * 52 / 12, 2)
+        result.set("financial", field_name, amount)
+        consumed.append(match.span())
+
+    match = NO_INCOME_RE.search(message)
+    if match and "financial.monthly_income" not in result.matched_fields:
+        result.set("financial", "monthly_income", 0.0)
+        consumed.append(match.span())
+
+    # Bare numbers only make sense against the question being answered
+    match = BARE_NUMBER_RE.match(message)
+    if match and not result.matched_fields:
+        number = int(match.group(1))
+        if "how many" in question_lower and any(word in question_lower for word in ("people", "household", "live with")):
+            result.set("household", "size", number)
+            consumed.append(match.span())
+        elif asks_age:
+            if 0 < number < MAX_AGE:
+                result.set("personal", "age", number)
+                consumed.append(match.span())
+
+    if result.matched_fields:
+        residue = list(message_lower)
+        for start, end in consumed:
+            residue[start:end] = " " * (end - start)
+        leftover = [word for word in _WORD_RE.findall("".join(residue)) if word not in FILLER_WORDS]
+        result.fully_explained = not leftover
+
+    return result
+
+
+def merge_extracted(base: Dict[str, Any], updates: Dict[str, Any], overwrite: bool = True) -> Dict[str, Any]:
+    """
+    Merge nested extraction results into a copy of ``base``.
+    Empty values never clobber existing data; with ``overwrite=False`` only
+    missing fields are filled.
+    """
+    merged = {key: (dict(value) if isinstance(value, dict) else value) for key, value in base.items()}
+    for section, values in updates.items():
+        if not isinstance(values, dict):
+            if values not in (None, "", [], {}) and (overwrite or merged.get(section) in (None, "", [], {})):
+                merged[section] = values
+            continue
+        target = merged.setdefault(section, {})
+        if not isinstance(target, dict):
+            target = merged[section] = {}
+        for key, value in values.items():
+            if value in (None, "", [], {}):
+                continue
+            if overwrite or target.get(key) in (None, "", [], {}):
+                target[key] = value
+    return merged
+
+
+# ============================================
+# INFORMATION GATE
+# ============================================
+# Decides, without any model call, whether a user message could change the
+# structured intake state at all.
+
+GATE_SKIP = "skip"        # nothing to extract ("ok", "thanks", "hi")
+GATE_ANSWER = "answer"    # yes/no to a pending boolean question, handled locally
+GATE_FOCUS = "focus"      # short answer - extract from the last exchange only
+GATE_FULL = "full"        # regular extraction over recent history
+
+ACK_WORDS = frozenset("""
+ok okay k kk thanks thank thx ty you hi hello hey hiya morning afternoon evening good great
+cool alright sure got it sounds fine perfect awesome nice wonderful yes yeah yep yup no nope
+understood appreciate appreciated that much so very please bye
+""".split())
+YES_WORDS = frozenset("yes yeah yep yup yea sure correct right absolutely definitely".split())
+NO_WORDS = frozenset("no nope nah none never".split())
+YES_NO_WORDS = YES_WORDS | NO_WORDS
+YES_PHRASES = ("i do", "i am", "i'm", "i have", "we do", "we are", "we have", "that's right", "that is right")
+NO_PHRASES = ("i don't", "i do not", "i'm not", "i am not", "i haven't", "we don't", "we do not", "not really", "not at all")
+# Replies that hedge ("I don't know", "not sure", "maybe") are not a yes or a no
+UNCERTAIN_WORDS = frozenset("know maybe think remember unsure idk dunno perhaps possibly probably guess".split())
+# Words that may accompany a yes/no without changing it ("No thanks", "I do have one")
+YES_NO_FILLER = frozenset("a an any one it that them right now currently thanks thank you please".split())
+
+YES_NO_QUESTION_RE = re.compile(r"^(?:do|does|did|are|is|was|were|have|has|any)\b")
+_QUESTION_SENTENCE_RE = re.compile(r"[^.!?]*\?")
+
+# Yes/no question phrasings -> (section, field, value for yes, value for no,
+# applicant only). Phrasings are specific on purpose: a wrong hit records a
+# fact and skips the extraction for the turn. A value of None means that
+# answer can't be recorded locally.
+BOOLEAN_QUESTIONS: List[Tuple[Pattern[str], str, str, Any, Any, bool]] = [
+    (re.compile(r"\b(?:do you have (?:a |any )?disabilit|are you (?:currently )?disabled\b)"),
+     "health", "has_disability", True, False, True),
+    (re.compile(r"\bdo you have (?:any )?(?:ongoing |regular |monthly |high )?medical (?:expenses|bills|costs)\b"),
+     "health", "has_medical_expenses", True, False, True),
+    (re.compile(r"\b(?:do you (?:currently )?have (?:any )?(?:health |medical )?insurance|are you (?:currently )?insured)\b"),
+     "health", "has_insurance", True, False, True),
+    (re.compile(r"\bare you (?:currently )?(?:looking|searching) for (?:work|a job)\b"),
+     "employment", "looking_for_work", True, False, True),
+    # Present risk only: "have you ever been evicted?" is history, not risk
+    (re.compile(r"\b(?:are you (?:currently )?(?:at risk of (?:losing your (?:home|housing|apartment)|eviction|being evicted|homelessness)"
+                r"|facing (?:an )?eviction|being evicted|homeless)\b|do you have an eviction notice\b)"),
+     "housing", "at_risk_of_homelessness", True, False, False),
+    (re.compile(r"\b(?:is there anything|do you have any(?:thing)?|are there any) (?:urgent|immediate)\b|\bis this an emergency\b"),
+     "emergency", "has_urgent_needs", True, False, False),
+    (re.compile(r"\b(?:are|do) you (?:currently )?(?:receiv(?:e|ing)|get|getting) (?:any )?(?:[a-z-]+ )?"
+                r"(?:benefits|public assistance|government assistance|snap|food stamps|calfresh|medicaid|medi-cal|tanf|ssi|ssdi)\b"),
+     "current_benefits", "receiving_benefits", True, False, False),
+    (re.compile(r"\bdo you have (?:any )?(?:children|kids)(?: (?:living with you|at home|under \d+))?\s*\?"),
+     "household", "has_children", True, False, False),
+    (re.compile(r"\bare you (?:a )?(?:us |united states |american )?citizen\b"),
+     "legal", "citizenship_status", "US_citizen", None, True),
+]
+# Questions that also mention someone else ("do you or your son have...")
+# never answer a fact about the applicant
+HOUSEHOLD_MEMBER_RE = re.compile(
+    r"\b(?:anyone|anybody|someone|household|family|members?|spouse|partner|wife|husband|sons?|daughters?|child|children|kids)\b"
+)
+
+SHORT_ANSWER_TOKENS = 4
+FOCUS_ANSWER_TOKENS = 12
+
+
+@dataclass(slots=True)
+class GateDecision:
+    """What the information gate decided for one user message."""
+
+    action: str
+    updates: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    reason: str = ""
+
+
+def _has_entities(message: str) -> bool:
+    """Digits, emails or capitalised words past the first one (likely names)."""
+    if any(char.isdigit() for char in message) or "@" in message:
+        return True
+    words = message.split()
+    return any(word[:1].isupper() and word not in ("I", "I'm", "I've", "I'll") for word in words[1:])
+
+
+def _last_question(pending_question: str) -> str:
+    questions = _QUESTION_SENTENCE_RE.findall(pending_question.lower().replace("u.s.", "us"))
+    return questions[-1].strip() if questions else ""
+
+
+def _uncertain(words: List[str]) -> bool:
+    return bool(UNCERTAIN_WORDS.intersection(words)) or ("sure" in words and "not" in words)
+
+
+def _yes_or_no(words: List[str], question: str) -> Optional[bool]:
+    """
+    True/False only for a whole yes or no: yes/no words alone ("no", "yes
+    thanks"), optionally leading into a yes/no phrase whose remaining words
+    come from the question itself ("no, I don't have a disability").
+    Anything else, including hedges like "I don't know", is None.
+    """
+    if not words or _uncertain(words):
+        return None
+    answers = set()
+    index = 0
+    while index < len(words) and words[index] in YES_NO_WORDS:
+        answers.add(words[index] in YES_WORDS)
+        index += 1
+    rest = [word for word in words[index:] if word not in YES_NO_FILLER] if answers else words[index:]
+    if rest:
+        text = " ".join(rest)
+        # No phrases first: "i am not" also starts with "i am"
+        for phrases, value in ((NO_PHRASES, False), (YES_PHRASES, True)):
+            phrase = next((p for p in phrases if text == p or text.startswith(p + " ")), None)
+            if phrase is not None:
+                answers.add(value)
+                rest = rest[len(phrase.split()):]
+                break
+        else:
+            return None
+        question_words = set(_WORD_RE.findall(question))
+        if any(word not in question_words and word not in YES_NO_FILLER for word in rest):
+            return None
+    return answers.pop() if len(answers) == 1 else None
+
+
+def _boolean_question(question: str) -> Optional[Tuple[str, str, Any, Any]]:
+    """
+    The field a yes/no question asks about, only when exactly one phrasing in
+    BOOLEAN_QUESTIONS matches; ambiguous questions are left to the extraction.
+    """
+    if not question or not YES_NO_QUESTION_RE.match(question):
+        return None
+    about_others = HOUSEHOLD_MEMBER_RE.search(question) is not None
+    matches = [
+        (section, key, yes_value, no_value)
+        for pattern, section, key, yes_value, no_value, applicant_only in BOOLEAN_QUESTIONS
+        if pattern.search(question) and not (applicant_only and about_others)
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+
+def assess_information(message: str, pending_question: str = "") -> GateDecision:
+    """
+    Cheap information-content gate for a user message.
+    Uses the token count, an entity/number presence test and, for short
+    replies, whether they answer a pending yes/no question.
+    """
+    message_lower = message.lower().strip()
+    words = _WORD_RE.findall(message_lower)
+    has_entities = _has_entities(message)
+
+    if _uncertain(words) and len(words) <= FOCUS_ANSWER_TOKENS:
+        # "I don't know" is not a no; let the extraction read what was said
+        return GateDecision(GATE_FOCUS, reason="uncertain answer")
+
+    if len(words) <= SHORT_ANSWER_TOKENS and not has_entities:
+        question = _last_question(pending_question)
+        answer = _yes_or_no(words, question)
+        target = _boolean_question(question) if answer is not None else None
+        if target is not None:
+            section, key, yes_value, no_value = target
+            value = yes_value if answer else no_value
+            if value is not None:
+                return GateDecision(GATE_ANSWER, {section: {key: value}}, f"yes/no answer for {section}.{key}")
+        # A bare yes/no is only information-free when nothing was asked; a
+        # reply mixing both ("yes, no") is left to the extraction
+        mixed = bool(YES_WORDS.intersection(words)) and bool(NO_WORDS.intersection(words))
+        if all(word in ACK_WORDS for word in words) and not mixed and (answer is None or "?" not in pending_question):
+            return GateDecision(GATE_SKIP, reason="acknowledgement without facts")
+
+    if len(words) <= FOCUS_ANSWER_TOKENS:
+        return GateDecision(GATE_FOCUS, reason="short answer")
+    return GateDecision(GATE_FULL, reason="long answer")
@@ -0,0 +1,243 @@
+"""
+Structured Logging - Leveled, sampled, non-blocking logs without applicant PII
+Modules log through the standard library (logging.getLogger(__name__)) with
+%-style arguments, so nothing is formatted for records below LOG_LEVEL.
+Large payloads are wrapped in LazyJSON, which serializes (and redacts) only
+if the record is actually emitted.
+
+configure_logging() (called from ChatbotConfig.ready) routes the "app",
+"chatbot" and "forms" loggers through a bounded queue: the request thread
+only renders the message and enqueues it, and a listener thread formats and
+writes. When the queue is full records are dropped and counted rather than
+blocking a turn. Applicant PII (names, contact details, addresses, ...) is
+redacted from messages and structured fields before anything is written.
+
+    LOG_LEVEL=INFO                  # DEBUG shows per-turn extracted data
+    LOG_FORMAT=text | json          # json: one object per line for log shippers
+    LOG_SAMPLING=chatbot.supabase_sync=0.1,app.Backend.watson_intake=0.5
+    LOG_REDACT_PII=true
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from app.Backend.metrics import counter
+from app.Backend.tracing import current_trace
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+REDACT_PII = os.getenv("LOG_REDACT_PII", "true").lower() != "false"
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Loggers owned by this project; Django's own keep their defaults
+APP_LOGGERS = ("app", "chatbot", "forms")
+
+LOGS_DROPPED = counter(
+    "claimit_log_records_dropped_total",
+    "Log records dropped because the logging queue was full",
+)
+
+# ============================================
+# PII REDACTION
+# ============================================
+
+REDACTED = "[redacted]"
+
+# Keys whose values identify an applicant (intake fields and model columns)
+PII_KEYS = frozenset({
+    "full_name", "first_name", "last_name", "name", "date_of_birth", "phone", "email",
+    "address", "employer", "current_employer", "disability_details", "citizenship_status",
+    "immigration_status", "details", "emergency_details", "members", "ssn",
+    "content", "user_message", "applicant_message",
+})
+
+_PII_PATTERNS = (
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "[email]"),
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "[ssn]"),
+    (re.compile(r"(?:\+?1[\s.-]?)?\(?\b\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b"), "[phone]"),
+)
+
+
+def redact_text(text: str) -> str:
+    """Mask e-mail addresses, SSNs and phone numbers in free text."""
+    for pattern, replacement in _PII_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def redact(value: Any) -> Any:
+    """Copy of ``value`` with PII keys masked and PII patterns removed from strings."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in PII_KEYS and value[key] not in (None, "", [], {}) else redact(value[key])
+            for key in value
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+class LazyJSON:
+    """Log argument that is serialized, and redacted, only if its record is emitted."""
+
+    __slots__ = ("value", "indent")
+
+    def __init__(self, value: Any, indent: Optional[int] = None):
+        self.value = value
+        self.indent = indent
+
+    def __str__(self) -> str:
+        value = redact(self.value) if REDACT_PII else self.value
+        return json.dumps(value, indent=self.indent, default=str)
+
+
+# ============================================
+# FILTERS, HANDLER, FORMATTERS
+# ============================================
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "trace_id"}
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS}
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """``"chatbot.supabase_sync=0.1,app=0.5"`` -> {logger prefix: kept fraction}"""
+    rates: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of INFO and DEBUG records per logger prefix; warnings and errors always pass."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix wins
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return rate >= 1.0 or random.random() < rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Renders the message in the calling thread (so mutable arguments are
+    captured as they were) and hands formatting and I/O to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        trace = current_trace()
+        record.trace_id = trace.trace_id if trace is not None else None
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks are formatted here; exc_info holds frames that must not outlive the call
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOGS_DROPPED.inc()
+
+
+def _redacted_record(record: logging.LogRecord) -> Dict[str, Any]:
+    message = record.getMessage()
+    extras = _extra_fields(record)
+    if REDACT_PII:
+        message = redact_text(message)
+        extras = redact(extras)
+    return {"message": message, "extras": extras}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        rendered = _redacted_record(record)
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": rendered["message"],
+            "thread": record.threadName,
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        entry.update(rendered["extras"])
+        if record.exc_text:
+            entry["exception"] = redact_text(record.exc_text) if REDACT_PII else record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line with structured fields appended as key=value."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        rendered = _redacted_record(record)
+        timestamp = datetime.fromtimestamp(record.created).strftime("%H:%M:%S")
+        line = f"{timestamp} {record.levelname:<7} {record.name}: {rendered['message']}"
+        fields = " ".join(f"{key}={value}" for key, value in rendered["extras"].items())
+        if fields:
+            line = f"{line} [{fields}]"
+        if record.exc_text:
+            line = f"{line}\n{redact_text(record.exc_text) if REDACT_PII else record.exc_text}"
+        return line
+
+
+# ============================================
+# SETUP
+# ============================================
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def configure_logging() -> None:
+    """Route the project's loggers through the queue; safe to call more than once."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(parse_sampling(LOG_SAMPLING)))
+
+        for name in APP_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.setLevel(LOG_LEVEL)
+            logger.addHandler(handler)
+            logger.propagate = False
+
+        _listener = QueueListener(log_queue, output)
+        _listener.start()
+        # Flush what is still queued on shutdown
+        atexit.register(_listener.stop)
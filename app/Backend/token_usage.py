@@ -0,0 +1,89 @@
+"""
+Token Usage - Per-conversation watsonx.ai token and cost accounting
+Every chat call an intake makes is charged to its conversation's ledger by
+task (reply, question_analysis, extraction, summary). The ledger is stored
+with the case submission (additional_data["token_usage"]) and rolled up for
+the caseworker dashboard, so prompt trimming and call fusion can be judged
+by what a finished intake actually cost.
+
+Costs are estimates from list prices per million tokens:
+
+    WATSON_PROMPT_PRICE_PER_MILLION=0.20
+    WATSON_COMPLETION_PRICE_PER_MILLION=0.20
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+# granite-3-8b-instruct list price (USD per million tokens, input and output)
+PROMPT_PRICE_PER_MILLION = float(os.getenv("WATSON_PROMPT_PRICE_PER_MILLION", "0.20"))
+COMPLETION_PRICE_PER_MILLION = float(os.getenv("WATSON_COMPLETION_PRICE_PER_MILLION", "0.20"))
+
+COUNTERS = ("calls", "prompt_tokens", "completion_tokens")
+
+
+def estimated_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """USD at the configured prices."""
+    cost = prompt_tokens * PROMPT_PRICE_PER_MILLION + completion_tokens * COMPLETION_PRICE_PER_MILLION
+    return round(cost / 1_000_000, 6)
+
+
+def _with_totals(counts: Dict[str, int]) -> Dict[str, Any]:
+    summary: Dict[str, Any] = dict(counts)
+    summary["total_tokens"] = counts["prompt_tokens"] + counts["completion_tokens"]
+    summary["estimated_cost_usd"] = estimated_cost(counts["prompt_tokens"], counts["completion_tokens"])
+    return summary
+
+
+@dataclass(slots=True)
+class UsageLedger:
+    """Token counts for one conversation, per task."""
+
+    tasks: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def add(self, task: str, prompt_tokens: int, completion_tokens: int) -> None:
+        counts = self.tasks.setdefault(task, dict.fromkeys(COUNTERS, 0))
+        counts["calls"] += 1
+        counts["prompt_tokens"] += prompt_tokens
+        counts["completion_tokens"] += completion_tokens
+
+    def totals(self) -> Dict[str, int]:
+        return {name: sum(counts[name] for counts in self.tasks.values()) for name in COUNTERS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form stored in additional_data["token_usage"]."""
+        return {
+            "by_task": {task: _with_totals(counts) for task, counts in sorted(self.tasks.items())},
+            "totals": _with_totals(self.totals()),
+        }
+
+
+def rollup(ledgers: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Dashboard totals over stored ledgers (UsageLedger.to_dict() output).
+    Costs are recomputed at the current prices, so they stay comparable
+    across intakes recorded under different prices.
+    """
+    combined = UsageLedger()
+    cases = 0
+    for ledger in ledgers:
+        if not ledger or not ledger.get("by_task"):
+            continue
+        cases += 1
+        for task, counts in ledger["by_task"].items():
+            merged = combined.tasks.setdefault(task, dict.fromkeys(COUNTERS, 0))
+            for name in COUNTERS:
+                merged[name] += int(counts.get(name) or 0)
+
+    summary = combined.to_dict()
+    summary["cases"] = cases
+    summary["per_case"] = {
+        name: round(value / cases, 6 if name == "estimated_cost_usd" else 1) if cases else 0
+        for name, value in summary["totals"].items()
+    }
+    summary["prices_per_million"] = {
+        "prompt": PROMPT_PRICE_PER_MILLION,
+        "completion": COMPLETION_PRICE_PER_MILLION,
+    }
+    return summary
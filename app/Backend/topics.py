@@ -0,0 +1,63 @@
+"""
+Intake Topics - Keyword lexicon for spotting which intake topics a message covers
+One table lists the keywords of each topic; WatsonIntakeAssistant uses it,
+with the thresholds below, to detect "mega answers" that cover several
+intake questions at once and answers that complete the intake outright.
+
+Keywords match as case-insensitive substrings ("own" also matches "down").
+Each topic stops at its first matching keyword, and each check is a single
+str.__contains__ scan in C. On the short and mega answers of
+benchmarks/microbench.py that beats one compiled alternation, which the
+regex engine tries position by position.
+"""
+
+from typing import FrozenSet, List, NamedTuple, Tuple
+
+
+class Topic(NamedTuple):
+    """An intake topic and the keywords that show a message touches it."""
+
+    topic_id: str
+    keywords: Tuple[str, ...]
+
+
+TOPIC_LEXICON: List[Topic] = [
+    # Personal info
+    Topic("name", ("name is", "called", "i'm ")),
+    Topic("age", ("years old", "age", "born")),
+    Topic("phone", ("phone", "number", "555", "cell")),
+    Topic("email", ("email", "@")),
+    # Household
+    Topic("household", ("household", "people", "wife", "husband", "child", "daughter", "son", "kids", "family members")),
+    # Employment
+    Topic("employment", ("unemployed", "employed", "job", "work", "working", "looking for work")),
+    # Financial
+    Topic("income", ("income", "monthly", "$", "earn", "make", "unemployment benefits", "salary")),
+    # Housing
+    Topic("housing", ("rent", "own", "homeless", "apartment", "house", "mortgage", "housing")),
+    # Health
+    Topic("health", ("disability", "disabled", "insurance", "medical", "health", "doctor")),
+    # Legal
+    Topic("legal", ("citizen", "citizenship", "resident", "legal status")),
+    # Current benefits
+    Topic("benefits", ("benefits", "snap", "medicaid", "tanf", "assistance", "receiving")),
+    # Emergency
+    Topic("emergency", ("urgent", "emergency", "behind on", "struggling", "desperate", "need help")),
+]
+
+# A message covering this many topics answers several questions at once
+MEGA_ANSWER_TOPICS = 5
+# A message covering every topic completes the intake on its own
+COMPREHENSIVE_ANSWER_TOPICS = len(TOPIC_LEXICON)
+
+
+def topics_in(message: str) -> FrozenSet[str]:
+    """Ids of the intake topics ``message`` touches."""
+    lowered = message.lower()
+    hit = []
+    for topic in TOPIC_LEXICON:
+        for keyword in topic.keywords:
+            if keyword in lowered:
+                hit.append(topic.topic_id)
+                break
+    return frozenset(hit)
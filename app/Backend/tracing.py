@@ -0,0 +1,278 @@
+"""
+Tracing - Lightweight spans for per-turn latency breakdowns
+A trace is started per request (chatbot.middleware.TracingMiddleware) or per
+queued turn, and spans are recorded around Watson calls, IAM token fetches,
+database queries and Supabase syncs. Traces live in a context variable, so
+they follow asyncio tasks and asgiref's sync_to_async threads; with no
+active trace a span costs one context variable lookup.
+
+Finished traces become a Server-Timing header and, when
+OTEL_EXPORTER_OTLP_ENDPOINT is set, are exported in the background as
+OTLP/HTTP JSON to a local OpenTelemetry collector (Jaeger, Tempo, ...).
+"""
+
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() != "false"
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "").rstrip("/")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "claimit-backend")
+# Requests slower than this print their breakdown (0 disables)
+SLOW_TRACE_MS = float(os.getenv("TRACE_SLOW_MS", "5000"))
+
+EXPORT_BATCH_SIZE = 64
+EXPORT_QUEUE_SIZE = 2048
+EXPORT_INTERVAL_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """Spans collected for one request or queued turn."""
+
+    __slots__ = ("trace_id", "name", "parent_id", "root", "spans", "_lock")
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.name = name
+        self.parent_id = parent_id
+        self.root = Span(name, parent_id, {})
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> List[Tuple[str, float, int]]:
+        """(span name, total ms, count) per span name, in first-seen order."""
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(span.name, [0.0, 0])
+            entry[0] += span.duration_ms
+            entry[1] += 1
+        return [(name, total, int(count)) for name, (total, count) in totals.items()]
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value. Nested spans (e.g. the queries inside a
+        Supabase sync) are listed under their own names, so entries can overlap.
+        """
+        entries = [
+            f'{name};dur={total:.1f};desc="{count} call{"s" if count != 1 else ""}"'
+            for name, total, count in self.breakdown()
+        ]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def parse_traceparent(header: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(trace id, parent span id) from a W3C traceparent header, if valid."""
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+@contextmanager
+def trace(name: str, traceparent: Optional[str] = None) -> Iterator[Optional[Trace]]:
+    """Start a trace for the enclosed work; nested calls start a fresh trace."""
+    if not TRACING_ENABLED:
+        yield None
+        return
+    trace_id, parent_id = parse_traceparent(traceparent)
+    current = Trace(name, trace_id, parent_id)
+    trace_token = _current_trace.set(current)
+    span_token = _current_span.set(current.root)
+    try:
+        yield current
+    finally:
+        current.root.end_ns = time.time_ns()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        finish(current)
+
+
+@contextmanager
+def ensure_trace(name: str) -> Iterator[Optional[Trace]]:
+    """Join the current trace, or start one for work outside a request (worker threads)."""
+    current = _current_trace.get()
+    if current is not None:
+        yield current
+        return
+    with trace(name) as started:
+        yield started
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a child of the current span."""
+    current = _current_trace.get()
+    if current is None:
+        yield None
+        return
+    parent = _current_span.get()
+    timed = Span(name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(timed)
+    try:
+        yield timed
+    except BaseException as e:
+        timed.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        timed.end_ns = time.time_ns()
+        _current_span.reset(token)
+        current.add(timed)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of span() for plain and async functions."""
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def finish(finished: Trace) -> None:
+    """Report a finished trace: slow-request log line and OTLP export."""
+    if SLOW_TRACE_MS and finished.root.duration_ms >= SLOW_TRACE_MS:
+        phases = ", ".join(f"{name} {total:.0f}ms×{count}" for name, total, count in finished.breakdown())
+        logger.warning(
+            "🐢 Slow %s (%.0fms, trace %s): %s",
+            finished.name, finished.root.duration_ms, finished.trace_id, phases or "no spans",
+        )
+    if _exporter is not None:
+        _exporter.submit(finished)
+
+
+# ============================================
+# OTLP EXPORT
+# ============================================
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(finished: Trace, recorded: Span) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "traceId": finished.trace_id,
+        "spanId": recorded.span_id,
+        "name": recorded.name,
+        "kind": 2 if recorded is finished.root else 1,  # SERVER for the root, INTERNAL otherwise
+        "startTimeUnixNano": str(recorded.start_ns),
+        "endTimeUnixNano": str(recorded.end_ns),
+        "attributes": [_attribute(key, value) for key, value in recorded.attributes.items()],
+    }
+    if recorded.parent_id:
+        payload["parentSpanId"] = recorded.parent_id
+    if recorded.error:
+        payload["status"] = {"code": 2, "message": recorded.error}
+    return payload
+
+
+def otlp_payload(traces: List[Trace]) -> Dict[str, Any]:
+    """OTLP/HTTP JSON body (ExportTraceServiceRequest) for finished traces."""
+    spans = [_otlp_span(finished, recorded) for finished in traces for recorded in [finished.root, *finished.spans]]
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "claimit.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class OTLPExporter:
+    """Batches finished traces and posts them from a daemon thread; drops when the queue is full."""
+
+    def __init__(self, endpoint: str):
+        self.url = f"{endpoint}/v1/traces"
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, finished: Trace) -> None:
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+
+    def _loop(self) -> None:
+        session = requests.Session()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+            while len(batch) < EXPORT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                session.post(self.url, json=otlp_payload(batch), timeout=5).raise_for_status()
+            except Exception as e:
+                logger.warning("⚠️ Trace export to %s failed (%d traces): %s", self.url, len(batch), e)
+
+
+_exporter: Optional[OTLPExporter] = OTLPExporter(OTLP_ENDPOINT) if TRACING_ENABLED and OTLP_ENDPOINT else None
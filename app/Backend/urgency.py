@@ -0,0 +1,165 @@
+"""
+Urgency Scoring - Table-driven urgency rules for case prioritization
+The same rules table scores a single intake at submission time and whole
+case histories at once (NumPy masks over pandas columns) when policy changes.
+Facts are named after the CaseSubmission columns they are stored in.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+BASE_SCORE = 5
+MAX_SCORE = 10
+DEFAULT_REASONING = "Standard priority case"
+
+
+class UrgencyRule(NamedTuple):
+    """One urgency factor: when ``fact`` passes ``op``/``value`` add ``weight``."""
+
+    fact: str
+    op: str  # "in", "truthy", "is_false", "eq", "lt"
+    value: Any
+    weight: int
+    reason: str
+
+
+# Order matters only for how reasons are listed.
+URGENCY_RULES: List[UrgencyRule] = [
+    # CRITICAL FACTORS (+3 each)
+    UrgencyRule("housing_situation", "in", ("homeless", "shelter"), 3, "Currently homeless or in shelter"),
+    UrgencyRule("at_risk_of_homelessness", "truthy", None, 3, "At risk of homelessness"),
+    UrgencyRule("has_emergency_needs", "truthy", None, 3, "Has immediate emergency needs"),
+    # HIGH PRIORITY FACTORS (+2 each)
+    UrgencyRule("has_children", "truthy", None, 2, "Has children in household"),
+    UrgencyRule("monthly_income", "eq", 0, 2, "Zero income"),
+    UrgencyRule("has_disability", "truthy", None, 2, "Has disability"),
+    # MODERATE FACTORS (+1 each)
+    UrgencyRule("monthly_income", "lt", 1000, 1, "Very low income (under $1000/month)"),
+    UrgencyRule("has_health_insurance", "is_false", None, 1, "No health insurance"),
+    UrgencyRule("has_medical_expenses", "truthy", None, 1, "Has medical expenses"),
+]
+
+# Where each fact lives in the nested intake extraction
+FACT_SOURCES: Dict[str, Tuple[str, str]] = {
+    "housing_situation": ("housing", "status"),
+    "at_risk_of_homelessness": ("housing", "at_risk_of_homelessness"),
+    "has_emergency_needs": ("emergency", "has_urgent_needs"),
+    "has_children": ("household", "has_children"),
+    "monthly_income": ("financial", "monthly_income"),
+    "has_disability": ("health", "has_disability"),
+    "has_health_insurance": ("health", "has_insurance"),
+    "has_medical_expenses": ("health", "has_medical_expenses"),
+}
+
+FACT_COLUMNS: List[str] = list(dict.fromkeys(rule.fact for rule in URGENCY_RULES))
+
+
+def facts_from_intake(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the nested extraction dict into the facts the rules read."""
+    facts = {}
+    for fact, (section, key) in FACT_SOURCES.items():
+        facts[fact] = (data.get(section) or {}).get(key)
+    return facts
+
+
+def _as_number(value: Any) -> float | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _matches(rule: UrgencyRule, value: Any) -> bool:
+    if rule.op == "in":
+        return value in rule.value
+    if rule.op == "truthy":
+        return bool(value)
+    if rule.op == "is_false":
+        return value is False
+    # Numeric comparisons treat a missing value as unknown, never as a match
+    number = _as_number(value)
+    if number is None:
+        return False
+    if rule.op == "eq":
+        return number == rule.value
+    if rule.op == "lt":
+        return number < rule.value
+    raise ValueError(f"Unknown urgency rule op: {rule.op}")
+
+
+def _reasoning(reasons: List[str]) -> str:
+    return "; ".join(reasons) if reasons else DEFAULT_REASONING
+
+
+def score_case(facts: Dict[str, Any], rules: List[UrgencyRule] = URGENCY_RULES) -> Dict[str, Any]:
+    """
+    Calculate urgency score (1-10) for one case.
+    Higher score = more urgent need.
+    """
+    score = BASE_SCORE
+    reasons = []
+    for rule in rules:
+        if _matches(rule, facts.get(rule.fact)):
+            score += rule.weight
+            reasons.append(rule.reason)
+
+    return {
+        "score": min(score, MAX_SCORE),
+        "reasoning": _reasoning(reasons),
+    }
+
+
+# ============================================
+# BATCH SCORING
+# ============================================
+
+def _rule_mask(rule: UrgencyRule, column: pd.Series) -> np.ndarray:
+    """Evaluate one rule over a whole column at once."""
+    if rule.op == "in":
+        return column.isin(rule.value).to_numpy(dtype=bool)
+    if rule.op in ("truthy", "is_false"):
+        flags = column.astype("boolean")
+        if rule.op == "truthy":
+            return flags.fillna(False).to_numpy(dtype=bool)
+        return (~flags).fillna(False).to_numpy(dtype=bool)
+    numbers = pd.to_numeric(column, errors="coerce").to_numpy(dtype=float)
+    if rule.op == "eq":
+        return numbers == rule.value  # NaN compares False
+    if rule.op == "lt":
+        return numbers < rule.value
+    raise ValueError(f"Unknown urgency rule op: {rule.op}")
+
+
+def score_frame(frame: pd.DataFrame, rules: List[UrgencyRule] = URGENCY_RULES) -> Tuple[np.ndarray, List[str]]:
+    """
+    Score every row of ``frame`` (one column per fact).
+    Returns the scores and the reasoning string for each row. Each row's
+    matched rules are packed into a bitmask, so the reasoning text is built
+    once per distinct combination rather than once per case.
+    """
+    if len(rules) > 63:
+        raise ValueError("score_frame supports at most 63 urgency rules")
+
+    rows = len(frame)
+    masks = np.zeros((len(rules), rows), dtype=bool)
+    for index, rule in enumerate(rules):
+        if rule.fact in frame:
+            masks[index] = _rule_mask(rule, frame[rule.fact])
+
+    hits = masks.astype(np.int64)
+    weights = np.array([rule.weight for rule in rules], dtype=np.int64)
+    scores = np.minimum(BASE_SCORE + weights @ hits, MAX_SCORE)
+
+    bits = np.left_shift(np.int64(1), np.arange(len(rules), dtype=np.int64))
+    combos = bits @ hits
+    unique_combos, inverse = np.unique(combos, return_inverse=True)
+    texts = [
+        _reasoning([rule.reason for index, rule in enumerate(rules) if int(combo) >> index & 1])
+        for combo in unique_combos
+    ]
+    return scores, [texts[i] for i in inverse.ravel()]
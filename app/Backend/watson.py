@@ -1,12 +1,17 @@
 import os
 import json
-import re
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import requests
 from dotenv import load_dotenv
 
+from app.Backend.eligibility import screen_case
+from app.Backend.metrics import WATSON_TOKENS
+from app.Backend.prompts import estimate_tokens, get_prompt, registry as prompt_registry
+from app.Backend.rule_extractor import parse_amount
+from app.Backend.token_usage import UsageLedger
+
 load_dotenv()
 
 
@@ -80,125 +85,14 @@ class WatsonAssistantSimple:
         """Bootstrap a new conversation with a system primer."""
         print(f"Starting new conversation: {conversation_id}")
 
-        system_prompt = (
-            "You are a warm, compassionate benefits application assistant for ClaimIt. 🤝\n\n"
-            
-            "YOUR MISSION:\n"
-            "You're here to help people access the support they deserve - whether it's food assistance (SNAP/CalFresh) "
-            "or healthcare (Medi-Cal). Many of the people you'll help may be seniors, people with disabilities, "
-            "or folks going through tough times. Treat everyone with dignity, patience, and genuine care.\n\n"
-            
-            "**AVAILABLE BENEFIT PROGRAMS:**\n"
-            "We help screen for these California benefit programs:\n\n"
-            "1. **SNAP/CalFresh** - Food assistance for groceries\n"
-            "2. **Medi-Cal** - Free or low-cost healthcare coverage\n"
-            "3. **SSI** - Supplemental Security Income for elderly/disabled\n"
-            "4. **CalWORKs/TANF** - Cash assistance for families with children\n\n"
-            "If someone asks what forms/programs you offer, list these programs with brief descriptions.\n\n"
-            
-            "YOUR PERSONALITY:\n"
-            "- Warm and empathetic, like a caring friend or family member\n"
-            "- Patient and understanding - never rush anyone\n"
-            "- Respectful and encouraging - celebrate their courage in seeking help\n"
-            "- Clear and simple - avoid jargon, use plain language\n"
-            "- Reassuring - let them know this process is manageable and you're here to help every step\n"
-            "- **HONEST** - Never make up information. Only use what the user actually tells you.\n\n"
-            
-            "INFORMATION YOU NEED TO GATHER:\n"
-            "Ask about these in a natural, conversational way:\n\n"
-            
-            "1. **Basic Information:**\n"
-            "   - Name (so you can personalize your help)\n"
-            "   - Age (affects program eligibility)\n"
-            "   - Household size (if they say 'nobody', 'alone', 'just me', 'by myself' = 1 person)\n\n"
-            
-            "2. **Financial Situation:**\n"
-            "   - Monthly income (if unemployed/no job = $0, and that's completely okay)\n"
-            "   - Employment status (no judgment either way)\n"
-            "   - Assets/savings (be gentle with this topic)\n"
-            "   - Monthly housing costs (rent/mortgage)\n"
-            "   - Monthly utility costs (electric, gas, water)\n"
-            "   - Monthly medical expenses (if any)\n\n"
-            
-            "3. **Household Composition:**\n"
-            "   - Whether they have children\n"
-            "   - Whether they have any disabilities (optional, but helps with benefits)\n\n"
-            
-            "4. **Health & Status:**\n"
-            "   - Whether they have health insurance\n"
-            "   - U.S. citizenship or legal status (for program eligibility)\n\n"
-            
-            "HOW TO COMMUNICATE:\n"
-            "✓ Ask ONE question at a time - don't overwhelm them\n"
-            "✓ Use warm, conversational language: 'Thanks for sharing that with me' instead of 'Acknowledged'\n"
-            "✓ LISTEN carefully - if they share multiple things at once, acknowledge EVERYTHING they said\n"
-            "✓ NEVER ask twice - if they already told you something, use it!\n"
-            "✓ If they remind you they already answered, apologize warmly: 'I'm so sorry, you're absolutely right. Let's move on...'\n"
-            "✓ Validate their situation: 'I understand' or 'That makes sense' or 'Thank you for sharing'\n"
-            "✓ Show empathy for difficult situations: 'I can imagine that's challenging' or 'You're doing the right thing by seeking help'\n\n"
-            
-            "IMPORTANT UNDERSTANDING:\n"
-            "- When someone says they're unemployed or have no income, acknowledge that kindly and mark income as $0\n"
-            "- Don't ask redundant follow-ups like 'Are you employed?' after they just said they're unemployed\n"
-            "- Move gracefully to the next needed information\n\n"
-            
-            "**FORM RECOMMENDATION LOGIC:**\n"
-            "Once you have enough information (name, age, household, income, basic expenses), determine eligibility:\n\n"
-            
-            "**CRITICAL: NOT EVERYONE IS ELIGIBLE**\n"
-            "- Only recommend forms if the person actually qualifies based on income, age, status, etc.\n"
-            "- If income is too high for all programs, explain they may not qualify\n"
-            "- If citizenship status is an issue, explain limitations compassionately\n"
-            "- If they don't meet criteria, provide alternative resources or suggestions\n\n"
-            
-            "**SNAP (CalFresh) - Food Assistance:**\n"
-            "- Income limit: ~$2,266 + $814 per additional household member (gross monthly)\n"
-            "- Work requirements for able-bodied adults 18-49 without dependents\n"
-            "- Generally requires U.S. citizenship or legal status\n\n"
-            
-            "**Medi-Cal (MEDICAL) - Healthcare Coverage:**\n"
-            "- For uninsured, low income, elderly 65+, disabled, pregnant\n"
-            "- Income limit: ~$1,732 + $600 per additional household member\n"
-            "- Citizens and qualified immigrants eligible\n\n"
-            
-            "**SSI (Supplemental Security Income):**\n"
-            "- For elderly (65+) OR disabled individuals only\n"
-            "- Very strict: Monthly income must be under ~$1,000\n"
-            "- Asset limits apply\n"
-            "- U.S. citizens or qualifying immigrants\n\n"
-            
-            "**TANF/CalWORKs - Cash Assistance:**\n"
-            "- Must have children under 18\n"
-            "- Very low income required\n"
-            "- Work requirements and time limits apply\n\n"
-            
-            "**When NOT eligible:**\n"
-            "- Be compassionate but honest: 'Based on what you've shared, you may not qualify for these programs right now...'\n"
-            "- Suggest alternatives: food banks, community resources, 211 helpline, local charities\n"
-            "- Explain that eligibility can change if circumstances change\n"
-            "- Provide encouragement and other options\n\n"
-            
-            "**Multiple forms may be appropriate:**\n"
-            "- Many people qualify for multiple programs (e.g., SNAP + Medi-Cal + SSI)\n"
-            "- Recommend ALL applicable forms they qualify for\n\n"
-            
-            "**IMPORTANT: Use markdown formatting in your responses:**\n"
-            "- Use **bold** for emphasis\n"
-            "- Use bullet points (- or *) for lists\n"
-            "- Use ## for section headers when providing final recommendations\n"
-            "- Use > for important callouts or quotes\n"
-            "- Make your responses visually engaging and easy to read\n\n"
-            
-            "When recommending forms (or explaining non-eligibility), warmly explain WHY based on their specific situation. "
-            "Use markdown to make the recommendation clear and easy to understand. "
-            "Always be supportive and provide next steps, whether they qualify or not. "
-            "Remember: these programs exist to help, but not everyone qualifies - be honest but kind."
-        )
+        system_prompt = get_prompt("simple.system")
 
         self.conversations[conversation_id] = {
-            "history": [{"role": "system", "content": system_prompt}],
+            "system_prompt": system_prompt.prompt_id,
+            "history": [],
             "collected_data": {},
             "message_count": 0,
+            "usage": UsageLedger(),
         }
         return conversation_id
 
@@ -214,15 +108,15 @@ class WatsonAssistantSimple:
         previous_data = conv["collected_data"].copy()
 
         guidance = self._build_guidance_instruction(conv["collected_data"])
-        history_payload = conv["history"][:]
+        history_payload = self._with_system_prompt(conv)
         if guidance:
             history_payload.append({"role": "system", "content": guidance})
             print(f"\nGuidance sent to Watson:\n{guidance}\n")
 
-        watson_text = self._invoke_watson(history_payload, max_tokens=2000)
+        watson_text = self._invoke_watson(history_payload, max_tokens=2000, task="reply", ledger=conv["usage"])
         conv["history"].append({"role": "assistant", "content": watson_text})
 
-        extracted_data = self._extract_data_with_watson(conv["history"])
+        extracted_data = self._extract_data_with_watson(self._with_system_prompt(conv), ledger=conv["usage"])
         self._apply_updates(conv["collected_data"], extracted_data)
 
         new_information = {
@@ -245,9 +139,22 @@ class WatsonAssistantSimple:
             "collected_data": conv["collected_data"].copy(),
             "is_complete": is_complete,
             "selected_form": selected_form,
+            "token_usage": conv["usage"].to_dict(),
         }
 
-    def _invoke_watson(self, messages: List[Dict[str, str]], *, max_tokens: int) -> str:
+    def _with_system_prompt(self, conv: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Prepend the shared system prompt to a copy of the conversation history."""
+        return [prompt_registry.resolve(conv["system_prompt"]).message()] + conv["history"]
+
+    def _invoke_watson(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        max_tokens: int,
+        task: str = "chat",
+        ledger: Optional[UsageLedger] = None,
+    ) -> str:
+        """Send one chat request, charging its tokens to ``ledger`` under ``task``."""
         body = {
             "messages": messages,
             "project_id": self.project_id,
@@ -269,7 +176,28 @@ class WatsonAssistantSimple:
         response = requests.post(self.url, headers=headers, json=body, timeout=60)
         response.raise_for_status()
         data = response.json()
-        return self._get_watsonx_text(data)
+        text = self._get_watsonx_text(data)
+        self._record_usage(task, messages, data, text, ledger)
+        return text
+
+    def _record_usage(
+        self,
+        task: str,
+        messages: List[Dict[str, str]],
+        response: Dict[str, Any],
+        text: str,
+        ledger: Optional[UsageLedger],
+    ) -> None:
+        """Reported token counts (estimated when missing) on the metrics and the conversation's ledger."""
+        usage = response.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or sum(
+            estimate_tokens(message.get("content", "")) for message in messages
+        )
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(text)
+        WATSON_TOKENS.inc(prompt_tokens, task=task, kind="prompt")
+        WATSON_TOKENS.inc(completion_tokens, task=task, kind="completion")
+        if ledger is not None:
+            ledger.add(task, prompt_tokens, completion_tokens)
 
     def _get_watsonx_text(self, watsonx_response: Dict[str, Any]) -> str:
         try:
@@ -280,36 +208,15 @@ class WatsonAssistantSimple:
             print(f"Failed to parse WatsonX response: {exc}")
         return "I understand."
 
-    def _extract_data_with_watson(self, conversation_history: List[Dict[str, str]]) -> Dict[str, Any]:
-        extraction_prompt = {
-            "role": "system",
-            "content": (
-                "CRITICAL: Analyze ONLY the actual conversation and extract information that the user EXPLICITLY provided. "
-                "DO NOT make up or invent ANY information. DO NOT use example names like 'John Doe'. "
-                "If information was not provided, use null.\n\n"
-                "Extract these fields ONLY if explicitly mentioned:\n"
-                "- name: Full name (ONLY if user stated it, otherwise null)\n"
-                "- age: Age in years (ONLY if stated, otherwise null)\n"
-                "- household_size: Number of people (ONLY if stated, otherwise null). If they say 'alone', 'by myself' = 1.\n"
-                "- monthly_income: Monthly income in dollars (ONLY if stated, otherwise null). If unemployed/no job mentioned = 0.\n"
-                "- is_employed: Employment status (ONLY if stated, otherwise null)\n"
-                "- assets: Savings/assets in dollars (ONLY if stated, otherwise null)\n"
-                "- has_children: Whether they have children (ONLY if stated, otherwise null)\n"
-                "- has_disability: Whether they have disability (ONLY if stated, otherwise null)\n"
-                "- has_health_insurance: Whether they have insurance (ONLY if stated, otherwise null)\n\n"
-                "IMPORTANT: Return ONLY actual information from the conversation. DO NOT use placeholder data.\n"
-                "Return a valid JSON object with ONLY the fields that were actually mentioned.\n"
-                "Example of correct output when user only said 'I'm Sarah':\n"
-                "{\"name\": \"Sarah\"}\n\n"
-                "Example when user said nothing useful:\n"
-                "{}"
-            ),
-        }
+    def _extract_data_with_watson(
+        self, conversation_history: List[Dict[str, str]], ledger: Optional[UsageLedger] = None
+    ) -> Dict[str, Any]:
+        extraction_prompt = get_prompt("simple.extraction").message()
 
         extraction_messages = conversation_history[:] + [extraction_prompt]
 
         try:
-            extraction_text = self._invoke_watson(extraction_messages, max_tokens=600)
+            extraction_text = self._invoke_watson(extraction_messages, max_tokens=600, task="extraction", ledger=ledger)
             extraction_text = extraction_text.strip()
             if extraction_text.startswith("```"):
                 lines = extraction_text.split("\n")
@@ -375,24 +282,7 @@ class WatsonAssistantSimple:
         return value
 
     def _parse_float(self, value: Any) -> float | None:
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, str):
-            cleaned = value.lower().replace("usd", "").replace(",", "").replace("$", " ").strip()
-            multiplier = 1.0
-            if cleaned.endswith("k"):
-                multiplier = 1000.0
-                cleaned = cleaned[:-1]
-            match = re.search(r"-?\d+(\.\d+)?", cleaned)
-            if not match:
-                return None
-            try:
-                return float(match.group()) * multiplier
-            except ValueError:
-                return None
-        return None
+        return parse_amount(value)
 
     def check_if_complete(self, data: Dict[str, Any]) -> bool:
         """Check if we have enough information to make a recommendation"""
@@ -471,9 +361,10 @@ class WatsonAssistantSimple:
 
         return "\n".join(lines)
 
-    def _select_form(self, data: Dict[str, Any]) -> str:
-        # Placeholder logic; refine as program rules evolve.
-        return "SNAP"
+    def _select_form(self, data: Dict[str, Any]) -> str | None:
+        """First program the eligibility rules say this person qualifies for, if any."""
+        screening = screen_case(dict(data, total_assets=data.get("assets")))
+        return screening["programs"][0] if screening["programs"] else None
 
     def _format_currency(self, value: Any) -> str:
         try:
@@ -3,18 +3,114 @@ Deep Intake Watson Assistant - Comprehensive Benefits Screening
 Collects detailed information for caseworker review with warm, adaptive conversations
 """
 
+import asyncio
+import logging
 import os
 import json
 import re
 import time
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+import weakref
+from typing import Any, Callable, Dict, Generator, List, Optional
 
+import httpx
 import requests
 from dotenv import load_dotenv
 
+from app.Backend.cassettes import Cassette
+from app.Backend.conversation_locks import ConversationLocks
+from app.Backend.eligibility import facts_from_intake as eligibility_facts, screen_case
+from app.Backend.intake_state import INTAKE_SCHEMA, ROLE_USER, ConversationState, IntakeState, Message
+from app.Backend.json_repair import StreamingJSONDecoder, compile_schema
+from app.Backend.metrics import (
+    CONVERSATION_LOCKS_ACTIVE,
+    CONVERSATION_TURNS_QUEUED,
+    CONVERSATIONS_EVICTED,
+    CONVERSATIONS_IN_MEMORY,
+    INTAKE_EXTRACTIONS,
+    INTAKES_COMPLETED,
+    INTAKES_STARTED,
+    REPLY_EARLY_STOPS,
+    REPLY_TOKENS_SAVED,
+    TURNS_PER_INTAKE,
+    WATSON_CALL_SECONDS,
+    WATSON_IAM_REFRESHES,
+    WATSON_TOKENS,
+)
+from app.Backend.prompts import estimate_tokens, get_prompt, registry as prompt_registry
+from app.Backend.rule_extractor import GATE_ANSWER, GATE_FOCUS, GATE_SKIP, assess_information, extract_facts
+from app.Backend.structured_logging import LazyJSON
+from app.Backend.topics import COMPREHENSIVE_ANSWER_TOPICS, MEGA_ANSWER_TOPICS, topics_in
+from app.Backend.tracing import span
+from app.Backend.urgency import facts_from_intake, score_case
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Overridable so benchmarks can point at a local stand-in (benchmarks/fake_watsonx.py)
+IAM_URL = os.getenv("WATSON_IAM_URL", "https://iam.cloud.ibm.com/identity/token")
+CHAT_PATH = "/ml/v1/text/chat?version=2023-05-29"
+CHAT_STREAM_PATH = "/ml/v1/text/chat_stream?version=2023-05-29"
+
+# The chat endpoint accepts at most 4 stop sequences. The one-question cut is
+# made client-side while streaming so the question mark itself is kept.
+REPLY_STOP_SEQUENCES = [
+    "\n\n\n",  # Stop at paragraph breaks
+    "Question 2:",
+    "Next question:",
+    "Additionally,",
+]
+
+# Expected shapes of the model's JSON output; values are coerced on decode.
+# The extraction shape is derived from the typed sections in intake_state.
+INTAKE_EXTRACTION_SCHEMA = INTAKE_SCHEMA
+SUMMARY_SCHEMA = compile_schema({"summary": str, "programs": [str], "actions": str})
+
+# Connection pool for the async client; one process holds many in-flight intakes
+ASYNC_MAX_CONNECTIONS = int(os.getenv("WATSON_ASYNC_MAX_CONNECTIONS", "200"))
+
+# Conversations with no turn for this many seconds are dropped from memory.
+# Off (0) by default: the intake state lives only here, so an applicant who
+# comes back after eviction starts the intake over.
+CONVERSATION_IDLE_TTL = int(os.getenv("WATSON_CONVERSATION_IDLE_TTL", "0"))
+# Idle conversations are looked for at most this often
+EVICTION_SWEEP_SECONDS = 60
+
+# Intake logic is written as generators that yield chat requests (keyword
+# arguments for _chat, plus a "phase" label for tracing) and receive the
+# results, so the same steps run on blocking requests or under asyncio.
+ChatSteps = Generator[Dict[str, Any], Dict[str, Any], Any]
+
+
+class _ChatStream:
+    """Accumulates a chat_stream server-sent-event reply line by line."""
+
+    __slots__ = ("text", "usage", "finish_reason", "cancelled")
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.usage: Dict[str, Any] = {}
+        self.finish_reason: Optional[str] = None
+        self.cancelled = False
+
+    def feed_line(self, line: str, stop_when: Callable[[str], bool]) -> bool:
+        """Consume one SSE line; True once reading should stop."""
+        if not line or not line.startswith("data:"):
+            return False
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return True
+        event = json.loads(data)
+        if event.get("usage"):
+            self.usage = event["usage"]
+        for choice in event.get("choices", []):
+            self.text += choice.get("delta", {}).get("content") or ""
+            self.finish_reason = choice.get("finish_reason") or self.finish_reason
+        if self.text and stop_when(self.text):
+            self.cancelled = True
+            return True
+        return False
+
 
 class WatsonIntakeAssistant:
     """
@@ -35,239 +131,175 @@ class WatsonIntakeAssistant:
                 "WATSON_API_KEY, and WATSON_ASSISTANT_ID in your environment."
             )
 
-        print("🚀 Initializing Watson Deep Intake Assistant...")
+        logger.info("🚀 Initializing Watson Deep Intake Assistant...")
         self.access_token: str | None = None
         self.token_expiry: float = 0
-        self.conversations: Dict[str, Dict[str, Any]] = {}
+        self.conversations: Dict[str, ConversationState] = {}
+        self._last_sweep = time.time()
+        CONVERSATIONS_IN_MEMORY.set_function(lambda: len(self.conversations))
+        # Serializes turns per conversation; different conversations never wait on each other
+        self.locks = ConversationLocks()
+        CONVERSATION_LOCKS_ACTIVE.set_function(lambda: self.locks.stats()["active_conversations"])
+        CONVERSATION_TURNS_QUEUED.set_function(lambda: self.locks.stats()["queued_turns"])
+        # httpx clients are bound to the event loop that created them
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        # Record/replay of chat calls for deterministic benchmarks (app/Backend/cassettes.py)
+        self.cassette: Optional[Cassette] = Cassette.from_env()
+
+        # Stream replies so generation can be cancelled once one question is asked
+        self.stream_replies = os.getenv("WATSON_STREAM_REPLIES", "true").lower() != "false"
+        self.generation_stats: Dict[str, int] = {
+            "early_stops": 0,
+            "tokens_saved": 0,
+        }
+        self.extraction_stats: Dict[str, int] = {
+            "llm_calls": 0,
+            "focused_calls": 0,
+            "rule_only": 0,
+            "skipped": 0,
+        }
 
-        print("✅ Watson Intake Assistant is ready!")
+        logger.info("✅ Watson Intake Assistant is ready!")
 
     def get_access_token(self) -> str:
         """Fetch (and cache) an IAM access token."""
-        if self.access_token and time.time() < self.token_expiry - 60:
+        if self._token_is_fresh():
             return self.access_token
 
-        print("🔑 Fetching new IBM Cloud IAM access token...")
-        url = "https://iam.cloud.ibm.com/identity/token"
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {
+        logger.info("🔑 Fetching new IBM Cloud IAM access token...")
+        try:
+            with span("watson.iam"):
+                response = requests.post(IAM_URL, headers=self._token_headers(), data=self._token_form(), timeout=30)
+            response.raise_for_status()
+        except Exception:
+            WATSON_IAM_REFRESHES.inc(outcome="failure")
+            raise
+        WATSON_IAM_REFRESHES.inc(outcome="success")
+        return self._store_token(response.json())
+
+    async def aget_access_token(self) -> str:
+        """Async variant of get_access_token."""
+        if self._token_is_fresh():
+            return self.access_token
+
+        logger.info("🔑 Fetching new IBM Cloud IAM access token...")
+        try:
+            with span("watson.iam"):
+                response = await self._async_client().post(IAM_URL, headers=self._token_headers(), data=self._token_form(), timeout=30)
+            response.raise_for_status()
+        except Exception:
+            WATSON_IAM_REFRESHES.inc(outcome="failure")
+            raise
+        WATSON_IAM_REFRESHES.inc(outcome="success")
+        return self._store_token(response.json())
+
+    def _token_is_fresh(self) -> bool:
+        return bool(self.access_token) and time.time() < self.token_expiry - 60
+
+    def _token_headers(self) -> Dict[str, str]:
+        return {"Content-Type": "application/x-www-form-urlencoded"}
+
+    def _token_form(self) -> Dict[str, str]:
+        return {
             "grant_type": "urn:ibm:params:oauth:grant-type:apikey",
             "apikey": self.api_key,
         }
 
-        response = requests.post(url, headers=headers, data=data, timeout=30)
-        response.raise_for_status()
-        token_data = response.json()
+    def _store_token(self, token_data: Dict[str, Any]) -> str:
         self.access_token = token_data["access_token"]
         expires_in = token_data.get("expires_in", 3600)
         self.token_expiry = time.time() + expires_in
-        print(f"✅ Token fetched, expires in {expires_in} seconds.")
+        logger.info("✅ Token fetched, expires in %s seconds", expires_in)
         return self.access_token
 
+    def _async_client(self) -> httpx.AsyncClient:
+        """Shared connection pool for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=ASYNC_MAX_CONNECTIONS),
+            )
+            self._async_clients[loop] = client
+        return client
+
     def start_conversation(self, conversation_id: str) -> str:
         """Bootstrap a new conversation with comprehensive intake instructions."""
-        print(f"💬 Starting new intake conversation: {conversation_id}")
-
-        system_prompt = """You are a warm, caring intake specialist for ClaimIt - a service that helps people find benefits like food assistance, healthcare, and financial support.
-
-YOUR CORE PERSONALITY:
-You're like a kind friend having coffee with someone who needs help. You genuinely care about them and want to make this process feel safe and easy. You speak naturally, warmly, and never sound like a form or a robot.
-
-HOW YOU SPEAK:
-- Natural and conversational - like a real person, not a system
-- Warm and genuinely caring - you want to help them
-- 2-4 sentences per response - enough to feel supportive without overwhelming
-- Use their name when you know it - makes it personal
-- Respond to what THEY say - if they say "Hi there", say hi back warmly
-- Acknowledge their mood, tone, or what they share before moving forward
-- Use contractions: "I'm", "you're", "that's", "it's"
-- NO emojis, NO jargon, NO robotic language
-
-🚨 THE MOST CRITICAL RULE - EXACTLY ONE QUESTION 🚨:
-- You ask EXACTLY ONE question per response - NO EXCEPTIONS
-- After you type a question mark (?), STOP IMMEDIATELY
-- NEVER type a second question mark in the same response
-- NEVER say "Also," "Additionally," "Now," before asking more
-- If you catch yourself about to ask a second question, DELETE IT
-- Wait for their answer, then ask the next question in your NEXT response
-- ONE. SINGLE. QUESTION. ONLY. ALWAYS.
-
-WRONG - NEVER DO THIS:
-"I'm sorry to hear that. How long have you been out of work? Could you also share your monthly income?"
-"That's tough. Are you looking for work? And what's your income?"
-
-RIGHT - ALWAYS DO THIS:
-"I'm sorry to hear that. How long have you been out of work?"
-(Then wait for answer, THEN ask about income in the NEXT response)
-
-HOW TO START CONVERSATIONS:
-When someone says "Hi" or "Hello" or similar:
-1. Greet them warmly back
-2. Introduce yourself briefly as someone from ClaimIt who helps find benefits
-3. Express genuine warmth about meeting them
-4. Tell them you'll ask some questions and they should answer honestly
-5. Then ask for their name
-6. All in a natural, flowing way - NOT like separate bullets
-
-Example good start:
-User: "Hi there"
-You: "Hi! It's so nice to meet you! I'm with ClaimIt, and I'm here to help you connect with benefits you might qualify for - things like food assistance, healthcare, or financial support. I'm going to ask you some questions so we can figure out the best ways to help you. Please just answer honestly and we'll take it one step at a time. Could you start by telling me your full legal first and last name?"
-
-Example good start:
-User: "Hi there"
-You: "Hi! It's so nice to meet you! I'm with ClaimIt, and I'm here to help you connect with benefits you might qualify for - things like food assistance, healthcare, or financial support. I'm going to ask you some questions so we can figure out the best ways to help you. Please just answer honestly and we'll take it one step at a time. Could you start by telling me your full legal first and last name?"
-
-RESPONDING TO WHAT THEY SAY:
-- If they seem nervous, reassure them
-- If they share something difficult, respond with empathy FIRST
-- If they give a vague answer, gently ask for specifics
-- If they say their name, use it and thank them warmly
-- Always connect to what THEY just said before asking your next question
-
-WHAT INFORMATION TO COLLECT (in this natural order):
-1. Full legal name (first and last)
-2. Date of birth or age
-3. Phone number
-4. Email (if they have one)
-5. How many people in household
-6. Who lives with them (names, ages, relationships)
-7. Employment status
-8. Monthly income (total from all sources)
-9. Housing situation (rent, own, homeless, etc.)
-10. Monthly housing cost
-11. Any disabilities
-12. Health insurance status
-13. Medical expenses
-14. U.S. citizenship status
-15. Current benefits they receive
-16. Any urgent/emergency needs
-
-ASKING FOLLOW-UP QUESTIONS:
-- If unemployed: How long? Looking for work?
-- If employed: What's your job? How long there?
-- If they have kids: How old? Any under 18?
-- If they pay rent: How much per month?
-- If they have disability: How does it affect you?
-- ONE follow-up at a time based on their answer
-
-NEVER ACCEPT VAGUE ANSWERS:
-- "Mr Bean" → "Thanks! Just to be clear, I need your actual legal first and last name. What's your full name?"
-- "around 30ish" → "Could you give me your exact age?"
-- "a couple people" → "I need the exact number - is that 2 people total including you?"
-- "not much money" → "Could you give me a specific dollar amount per month? Like $500, $1000?"
-
-EXAMPLES OF GOOD RESPONSES:
-
-BAD (multiple questions):
-"What's your name? And how old are you?"
-
-GOOD (one question, warm, responsive):
-User: "Hi"
-You: "Hello! It's wonderful to meet you. I'm with ClaimIt and I help people find benefits they qualify for. I'll ask you some questions to understand your situation better. Let's start - what's your full legal first and last name?"
-
-BAD (ignores what they said):
-User: "I'm really struggling right now"
-You: "What's your name?"
-
-GOOD (responds to their emotion):
-User: "I'm really struggling right now"
-You: "I'm so sorry you're going through a tough time. That's exactly why ClaimIt is here - to help connect you with support that can make things easier. I'm going to ask you some questions so we can find the right resources for you. Let's start with your full legal first and last name?"
-
-BAD (too short, robotic):
-User: "John Smith"
-You: "What's your date of birth?"
-
-GOOD (warm, acknowledges, asks one question):
-User: "John Smith"
-You: "It's great to meet you, John! Thanks for sharing that. To make sure we get you connected with the right benefits, could you tell me your date of birth? You can give me the month, day, and year."
-
-BAD (dumps multiple questions):
-User: "I own my home"
-You: "What's your address? What's your monthly mortgage? Are you at risk of losing it?"
-
-GOOD (one question, warm):
-User: "I own my home"
-You: "That's great that you own your home, John. To get a complete picture of your situation, could you tell me what your monthly mortgage payment is? If you've paid it off completely, just let me know that too."
-
-CRITICAL RULES - READ THESE EVERY TIME:
-1. ONE question per response - NEVER more than one
-2. Respond warmly to what THEY said before asking next question
-3. Use their name once you know it
-4. 3-5 sentences per response - warm and supportive
-5. If they share difficulty, acknowledge it with empathy FIRST
-6. Never sound robotic or like a form
-7. Get specific answers - don't accept vague responses
-8. ⚠️ NEVER ASK DOUBLE QUESTIONS - If they already told you something, DON'T ask for it again
-9. Before asking any question, CHECK if they already answered it in their previous message
-10. If someone gives you a LOT of information at once (like a long paragraph), extract EVERYTHING you can and skip those questions
-11. Follow the natural order of questions listed above
-12. Make them feel safe, heard, and cared for
-
-🚨 DOUBLE-QUESTION PREVENTION:
-- Before asking "What's your rent?", check if they already mentioned it
-- If they said "my rent is $1,650", DO NOT ask "What's your monthly rent?"
-- Instead, acknowledge what they shared and move to the NEXT question you don't have
-- Example: "Thanks for sharing that, Maria. I see you're paying $1,650 in rent. Now, could you tell me..."
-
-MEGA-ANSWER HANDLING:
-- Some users will share A LOT of info at once (name, age, household, income, rent, etc.)
-- When this happens: acknowledge how helpful that was, thank them, and skip ALL the questions they already answered
-- Move directly to the first question you DON'T have an answer for
-- Example: "Wow, Maria - thank you so much for sharing all of that detail with me. That's incredibly helpful and I can see you're dealing with a lot right now. I have most of what I need now. Let me ask you about..."
-
-🚨 CRITICAL: NEVER ASK TO CONFIRM INFORMATION ALREADY PROVIDED 🚨
-- If they already gave their email, phone, name, income, etc., DO NOT ask "Can you confirm your email?" or "Just to be sure, what's your income?"
-- Confirmation questions are STILL questions about information they already provided
-- If they said "my email is michael.johnson@email.com", you already have it - don't ask again
-- If they said "I'm 45 years old", you already have it - don't ask "Can you confirm your age?"
-- Only ask for NEW information or follow-ups on things they mentioned but didn't specify
-
-Remember: You're a kind person helping someone in need. Every response should feel warm, natural, and caring. ONE question at a time, always."""
-
-        welcome_message = (
-            "Hello! Welcome to ClaimIt.\n\n"
-            "I'm here to help you connect with benefits you may qualify for - things like food assistance, "
-            "healthcare coverage, or financial support. Everything you share is completely confidential.\n\n"
-            "This usually takes about 10-15 minutes. Let's get started!"
-        )
+        logger.info("💬 Starting new intake conversation %s", conversation_id)
 
-        self.conversations[conversation_id] = {
-            "history": [
-                {"role": "system", "content": system_prompt},
-                {"role": "assistant", "content": welcome_message}
-            ],
-            "collected_data": {},
-            "questions_asked": 0,  # Start at 0 since welcome doesn't ask a question
-            "skipped_questions": {},  # Track questions to return to
-            "start_time": datetime.now().isoformat(),
-        }
+        # The system prompt is compiled once per process; each conversation only
+        # keeps its id and the prompt is prepended at request time.
+        system_prompt = get_prompt("intake.system")
+        welcome_message = get_prompt("intake.welcome").text
+
+        # questions_asked starts at 0 since welcome doesn't ask a question
+        conv = ConversationState(system_prompt=system_prompt.prompt_id)
+        conv.add("assistant", welcome_message)
+        self._evict_idle()
+        self.conversations[conversation_id] = conv
+        INTAKES_STARTED.inc()
 
         return welcome_message
 
+    def _count_extraction(self, path: str) -> None:
+        self.extraction_stats[path] += 1
+        INTAKE_EXTRACTIONS.inc(path=path)
+
+    def _evict_idle(self) -> int:
+        """Drop conversations idle for CONVERSATION_IDLE_TTL; sweeps at most every EVICTION_SWEEP_SECONDS."""
+        now = time.time()
+        if not CONVERSATION_IDLE_TTL or now - self._last_sweep < EVICTION_SWEEP_SECONDS:
+            return 0
+        self._last_sweep = now
+        cutoff = now - CONVERSATION_IDLE_TTL
+        idle = [
+            conversation_id
+            for conversation_id, conv in list(self.conversations.items())
+            if conv.last_active < cutoff and not self.locks.busy(conversation_id)
+        ]
+        for conversation_id in idle:
+            self.conversations.pop(conversation_id, None)
+        if idle:
+            CONVERSATIONS_EVICTED.inc(len(idle))
+            logger.info("🧹 Evicted %d idle conversations from memory", len(idle))
+        return len(idle)
+
     def send_message(self, conversation_id: str, user_message: str) -> Dict[str, Any]:
         """
         Process user message and continue the intake conversation.
         Returns conversation state + extracted data.
         """
+        with self.locks.hold(conversation_id):
+            return self._run(self._turn_steps(conversation_id, user_message), conversation_id)
+
+    async def asend_message(self, conversation_id: str, user_message: str) -> Dict[str, Any]:
+        """Async variant of send_message; Watson calls don't block a worker thread."""
+        async with self.locks.ahold(conversation_id):
+            return await self._arun(self._turn_steps(conversation_id, user_message), conversation_id)
+
+    def _turn_steps(self, conversation_id: str, user_message: str) -> ChatSteps:
         if conversation_id not in self.conversations:
             self.start_conversation(conversation_id)
 
         conv = self.conversations[conversation_id]
-        conv["history"].append({"role": "user", "content": user_message})
+        conv.last_active = time.time()
+        pending_question = conv.pending_question()
+        conv.add("user", user_message)
 
         # Check if user provided a comprehensive "mega answer" covering multiple topics
-        topics_covered = self._count_topics_in_response(user_message)
-        is_mega_answer = topics_covered >= 5
+        topics = topics_in(user_message)
+        topics_covered = len(topics)
+        is_mega_answer = topics_covered >= MEGA_ANSWER_TOPICS
         if is_mega_answer:
             # User gave a mega answer - credit them for multiple questions
-            conv["questions_asked"] += topics_covered
-            print(f"🎯 Detected mega answer covering {topics_covered} topics!")
+            conv.questions_asked += topics_covered
+            logger.info("🎯 Detected mega answer covering %d topics: %s", topics_covered, ", ".join(sorted(topics)))
         
-        # If they covered most topics, complete the intake
-        is_comprehensive = topics_covered >= 12
+        # If they covered every topic, complete the intake
+        is_comprehensive = topics_covered >= COMPREHENSIVE_ANSWER_TOPICS
         if is_comprehensive:
-            conv["questions_asked"] = 25  # Force completion
-            print(f"🎯 Mega answer covers {topics_covered} topics - completing intake!")
+            conv.questions_asked = 25  # Force completion
+            logger.info("🎯 Mega answer covers %d topics - completing intake", topics_covered)
 
         # Get AI response
         if is_comprehensive:
@@ -278,97 +310,89 @@ Remember: You're a kind person helping someone in need. Every response should fe
                 "I have everything I need to help you find the right benefits. "
                 "Let me get this submitted for you right away."
             )
-            conv["history"].append({"role": "assistant", "content": assistant_response})
+            conv.add("assistant", assistant_response)
         else:
-            assistant_response = self._call_watson_api(conv["history"])
-            conv["history"].append({"role": "assistant", "content": assistant_response})
+            assistant_response = yield from self._reply_steps(conv.history, conv.system_prompt)
+            conv.add("assistant", assistant_response)
         
             # Use Watson to analyze if a new question was asked
-            is_question = self._analyze_if_question_asked(assistant_response)
+            is_question = yield from self._question_analysis_steps(assistant_response)
             if is_question:
-                conv["questions_asked"] += 1
+                conv.questions_asked += 1
+
+        # Extract structured data from conversation.
+        # A local information gate and the deterministic pass run first; the LLM
+        # is skipped when the turn carries no facts or the rules explain all of it.
+        gate = assess_information(user_message, pending_question)
+        rule_result = extract_facts(user_message, pending_question)
+        if gate.action == GATE_SKIP:
+            self._count_extraction("skipped")
+        elif gate.action == GATE_ANSWER:
+            conv.data.merge(gate.updates)
+            self._count_extraction("skipped")
+            logger.debug("⚡ Recorded yes/no answer locally: %s", gate.reason)
+        elif rule_result.fully_explained and not is_mega_answer:
+            conv.data.merge(rule_result.updates)
+            self._count_extraction("rule_only")
+            logger.debug("⚡ Rule extractor handled turn: %s", ", ".join(rule_result.matched_fields))
+        elif gate.action == GATE_FOCUS and not conv.data.is_empty() and not is_mega_answer:
+            # Short answer: only the last exchange can hold new facts, so merge
+            # a small extraction into what we already have.
+            focused = yield from self._extraction_steps(conv.history, conv.questions_asked, context_messages=3)
+            # Rule matches only fill gaps; they never replace what the LLM read
+            conv.data.merge(focused.to_dict()).merge(rule_result.updates, overwrite=False)
+            self._count_extraction("focused_calls")
+        else:
+            conv.data = yield from self._extraction_steps(conv.history, conv.questions_asked)
+            self._count_extraction("llm_calls")
+            # Exact matches (phone, email, dates) fill anything the LLM missed
+            conv.data.merge(rule_result.updates, overwrite=False)
+        extracted_data = conv.data.to_dict()
 
-        # Extract structured data from conversation
-        extracted_data = self._extract_intake_data(conv["history"], conv["questions_asked"])
-        conv["collected_data"] = extracted_data
-        
-        # Debug: Print extracted data after each message
-        print(f"\n{'='*60}")
-        print(f"📊 EXTRACTED DATA (Question #{conv['questions_asked']}):")
-        print(f"{'='*60}")
-        import json as json_module
-        print(json_module.dumps(extracted_data, indent=2))
-        print(f"{'='*60}\n")
+        # Serialized (and redacted) only when DEBUG logging is on
+        logger.debug("📊 Extracted data after question #%d:\n%s", conv.questions_asked, LazyJSON(extracted_data, indent=2))
 
         # Check if intake is complete
-        is_complete = self._check_intake_complete(extracted_data, conv["questions_asked"])
+        is_complete = self._check_intake_complete(extracted_data, conv.questions_asked)
+        if is_complete and not conv.completed:
+            conv.completed = True
+            INTAKES_COMPLETED.inc()
+            TURNS_PER_INTAKE.observe(sum(1 for message in conv.history if message.role == ROLE_USER))
 
         return {
             "watson_response": assistant_response,
             "extracted_data": extracted_data,
             "is_complete": is_complete,
-            "questions_asked": conv["questions_asked"],
-            "conversation_history": conv["history"],
-        }
-
-    def _call_watson_api(self, conversation_history: List[Dict[str, str]]) -> str:
-        """Call watsonx.ai API with conversation history."""
-        token = self.get_access_token()
-
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token}",
+            "questions_asked": conv.questions_asked,
+            "conversation_history": conv.transcript(),
+            "prompt_id": conv.system_prompt,
+            "extraction_skipped": gate.action in (GATE_SKIP, GATE_ANSWER),
         }
 
+    def _reply_steps(self, conversation_history: List[Message], prompt_id: str = "intake.system") -> ChatSteps:
+        """Call watsonx.ai API with conversation history and the registered system prompt."""
         # PERFORMANCE FIX: Keep only recent conversation context to avoid slowdown
         # Keep system prompt + last 10 messages (5 exchanges)
-        system_messages = [msg for msg in conversation_history if msg["role"] == "system"]
-        recent_messages = [msg for msg in conversation_history if msg["role"] != "system"][-10:]
-        
-        trimmed_history = system_messages + recent_messages
-
-        # Format messages for granite model
-        formatted_messages = []
-        for msg in trimmed_history:
-            if msg["role"] in ["user", "assistant", "system"]:
-                formatted_messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
-
-        payload = {
-            "project_id": self.project_id,
-            "model_id": self.model_id,
-            "messages": formatted_messages,
-            "parameters": {
-                "max_tokens": 300,  # Reduced for faster responses, still enough for warm conversation
-                "temperature": 0.7,  # Slightly lower for more focused responses
-                "top_p": 0.95,
-                "stop": [
-                    "\n\n\n",  # Stop at paragraph breaks
-                    "Question 2:", 
-                    "Next question:", 
-                    "Also,", 
-                    "Additionally,",
-                    "Now,",  # Often precedes second question
-                    "?",  # Stop after first question mark to prevent multiple questions
-                ],
-                "frequency_penalty": 0.3,  # Discourage repetitive question patterns
-            }
-        }
+        formatted_messages = [prompt_registry.resolve(prompt_id).message()]
+        formatted_messages.extend(message.as_dict() for message in conversation_history[-10:])
 
         try:
-            response = requests.post(
-                f"{self.url}/ml/v1/text/chat?version=2023-05-29",
-                headers=headers,
-                json=payload,
-                timeout=60,
+            result = yield dict(
+                phase="reply",
+                messages=formatted_messages,
+                max_tokens=300,  # Reduced for faster responses, still enough for warm conversation
+                temperature=0.7,  # Slightly lower for more focused responses
+                top_p=0.95,
+                stop=REPLY_STOP_SEQUENCES,
+                frequency_penalty=0.3,  # Discourage repetitive question patterns
+                stop_when=self._question_complete,  # Cancel generation after the first question
             )
-            response.raise_for_status()
-            result = response.json()
             
-            assistant_message = result["choices"][0]["message"]["content"].strip()
+            assistant_message = result["text"]
+            if result["cancelled"]:
+                # The stream was cut mid-chunk; keep everything up to the first question
+                assistant_message = assistant_message[:assistant_message.find('?') + 1]
+            assistant_message = assistant_message.strip()
             
             # POST-PROCESSING: Clean up any role contamination
             assistant_message = self._clean_response(assistant_message)
@@ -379,9 +403,257 @@ Remember: You're a kind person helping someone in need. Every response should fe
             return assistant_message
 
         except Exception as e:
-            print(f"❌ Error calling Watson API: {e}")
+            logger.error("❌ Error calling Watson API: %s", e)
             return "I apologize, I'm having trouble processing right now. Could you please try again?"
 
+    def _auth_headers(self) -> Dict[str, str]:
+        return self._bearer_headers(self.get_access_token())
+
+    async def _aauth_headers(self) -> Dict[str, str]:
+        return self._bearer_headers(await self.aget_access_token())
+
+    def _bearer_headers(self, token: str) -> Dict[str, str]:
+        return {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}",
+        }
+
+    # ============================================
+    # REQUEST DRIVERS
+    # ============================================
+
+    def _run(self, steps: ChatSteps, conversation_id: Optional[str] = None) -> Any:
+        """Drive intake steps with blocking HTTP calls, charging their tokens to ``conversation_id``."""
+        try:
+            request = next(steps)
+            while True:
+                task = request.pop("phase", "chat")
+                started = time.perf_counter()
+                try:
+                    with span(f"watson.{task}", max_tokens=request["max_tokens"]):
+                        if self.cassette is not None:
+                            result = self.cassette.call(request, self._chat)
+                        else:
+                            result = self._chat(**request)
+                except Exception as e:
+                    self._record_call(conversation_id, task, request, None, time.perf_counter() - started)
+                    request = steps.throw(e)
+                else:
+                    self._record_call(conversation_id, task, request, result, time.perf_counter() - started)
+                    request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    async def _arun(self, steps: ChatSteps, conversation_id: Optional[str] = None) -> Any:
+        """Drive intake steps on the event loop."""
+        try:
+            request = next(steps)
+            while True:
+                task = request.pop("phase", "chat")
+                started = time.perf_counter()
+                try:
+                    with span(f"watson.{task}", max_tokens=request["max_tokens"]):
+                        if self.cassette is not None:
+                            result = await self.cassette.acall(request, self._achat)
+                        else:
+                            result = await self._achat(**request)
+                except Exception as e:
+                    self._record_call(conversation_id, task, request, None, time.perf_counter() - started)
+                    request = steps.throw(e)
+                else:
+                    self._record_call(conversation_id, task, request, result, time.perf_counter() - started)
+                    request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    def _record_call(
+        self,
+        conversation_id: Optional[str],
+        task: str,
+        request: Dict[str, Any],
+        result: Optional[Dict[str, Any]],
+        elapsed: float,
+    ) -> None:
+        """
+        Latency and token metrics for one chat call, and its tokens on the
+        conversation's usage ledger; ``result`` is None when the call failed.
+        """
+        WATSON_CALL_SECONDS.observe(elapsed, task=task, outcome="success" if result is not None else "failure")
+        if result is None:
+            return
+        usage = result.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or sum(
+            estimate_tokens(message.get("content", "")) for message in request["messages"]
+        )
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(result.get("text", ""))
+        WATSON_TOKENS.inc(prompt_tokens, task=task, kind="prompt")
+        WATSON_TOKENS.inc(completion_tokens, task=task, kind="completion")
+        # Runs under the conversation's lock, so the ledger needs none of its own
+        conv = self.conversations.get(conversation_id) if conversation_id else None
+        if conv is not None:
+            conv.usage.add(task, prompt_tokens, completion_tokens)
+
+    def _chat_payload(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stop: Optional[List[str]],
+        frequency_penalty: Optional[float],
+    ) -> Dict[str, Any]:
+        """
+        Build one chat request body.
+        Generation parameters go at the top level of the body, which is where the
+        chat endpoint reads them.
+        """
+        payload: Dict[str, Any] = {
+            "project_id": self.project_id,
+            "model_id": self.model_id,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+        }
+        if stop:
+            payload["stop"] = stop
+        if frequency_penalty is not None:
+            payload["frequency_penalty"] = frequency_penalty
+        return payload
+
+    def _chat_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        choice = result["choices"][0]
+        return {
+            "text": choice["message"]["content"],
+            "usage": result.get("usage", {}),
+            "finish_reason": choice.get("finish_reason"),
+            "cancelled": False,
+        }
+
+    def _chat(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stop: Optional[List[str]] = None,
+        frequency_penalty: Optional[float] = None,
+        timeout: int = 60,
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send one chat request to watsonx.ai.
+        When ``stop_when`` is given the reply is streamed and the connection is
+        closed as soon as the predicate accepts the text so far.
+        """
+        payload = self._chat_payload(messages, max_tokens, temperature, top_p, stop, frequency_penalty)
+        if stop_when is not None and self.stream_replies:
+            return self._stream_chat(payload, stop_when, timeout)
+
+        response = requests.post(
+            f"{self.url}{CHAT_PATH}",
+            headers=self._auth_headers(),
+            json=payload,
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return self._chat_result(response.json())
+
+    async def _achat(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stop: Optional[List[str]] = None,
+        frequency_penalty: Optional[float] = None,
+        timeout: int = 60,
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, Any]:
+        """Async variant of _chat over the shared httpx connection pool."""
+        payload = self._chat_payload(messages, max_tokens, temperature, top_p, stop, frequency_penalty)
+        if stop_when is not None and self.stream_replies:
+            return await self._astream_chat(payload, stop_when, timeout)
+
+        response = await self._async_client().post(
+            f"{self.url}{CHAT_PATH}",
+            headers=await self._aauth_headers(),
+            json=payload,
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return self._chat_result(response.json())
+
+    def _stream_chat(self, payload: Dict[str, Any], stop_when: Callable[[str], bool], timeout: int) -> Dict[str, Any]:
+        """
+        Stream a chat reply over server-sent events and cancel it early.
+        Closing the response drops the connection, which stops generation upstream.
+        """
+        headers = self._auth_headers()
+        headers["Accept"] = "text/event-stream"
+
+        stream = _ChatStream()
+        with requests.post(
+            f"{self.url}{CHAT_STREAM_PATH}",
+            headers=headers,
+            json=payload,
+            timeout=timeout,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if stream.feed_line(line, stop_when):
+                    break
+
+        return self._stream_result(payload, stream)
+
+    async def _astream_chat(self, payload: Dict[str, Any], stop_when: Callable[[str], bool], timeout: int) -> Dict[str, Any]:
+        """Async variant of _stream_chat."""
+        headers = await self._aauth_headers()
+        headers["Accept"] = "text/event-stream"
+
+        stream = _ChatStream()
+        async with self._async_client().stream(
+            "POST",
+            f"{self.url}{CHAT_STREAM_PATH}",
+            headers=headers,
+            json=payload,
+            timeout=timeout,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if stream.feed_line(line, stop_when):
+                    break
+
+        return self._stream_result(payload, stream)
+
+    def _stream_result(self, payload: Dict[str, Any], stream: _ChatStream) -> Dict[str, Any]:
+        finish_reason = stream.finish_reason
+        if stream.cancelled:
+            generated = stream.usage.get("completion_tokens") or estimate_tokens(stream.text)
+            saved = max(0, payload["max_tokens"] - generated)
+            self.generation_stats["early_stops"] += 1
+            self.generation_stats["tokens_saved"] += saved
+            REPLY_EARLY_STOPS.inc()
+            REPLY_TOKENS_SAVED.inc(saved)
+            logger.debug("✂️ Stopped generation early (%d tokens, up to %d saved)", generated, saved)
+            finish_reason = "cancelled"
+
+        return {
+            "text": stream.text,
+            "usage": stream.usage,
+            "finish_reason": finish_reason,
+            "cancelled": stream.cancelled,
+        }
+
+    def _question_complete(self, text: str) -> bool:
+        """True once the reply holds a complete first question, so the one-question rule is met."""
+        first_question_pos = text.find('?')
+        return first_question_pos != -1 and len(text[:first_question_pos + 1].strip()) > 20
+
     def _clean_response(self, message: str) -> str:
         """
         Clean the AI response to remove any role contamination or quoted user text.
@@ -429,7 +701,7 @@ Remember: You're a kind person helping someone in need. Every response should fe
             # Make sure we didn't cut off mid-sentence awkwardly
             # If the question is too short, it might be a false positive
             if len(truncated) > 20:
-                print(f"⚠️ Truncated multiple questions. Original had {question_count} questions.")
+                logger.warning("⚠️ Truncated multiple questions. Original had %d questions", question_count)
                 return truncated
         
         # Fallback: return original if truncation would be weird
@@ -439,273 +711,88 @@ Remember: You're a kind person helping someone in need. Every response should fe
         """
         Count how many intake topics the user addressed in their message.
         Used to detect "mega answers" that cover multiple questions at once.
+        The keywords per topic live in app/Backend/topics.py.
         """
-        topics = 0
-        message_lower = user_message.lower()
-        
-        # Personal info topics
-        if any(word in message_lower for word in ['name is', 'called', 'i\'m ']):
-            topics += 1
-        if any(word in message_lower for word in ['years old', 'age', 'born']):
-            topics += 1
-        if any(word in message_lower for word in ['phone', 'number', '555', 'cell']):
-            topics += 1
-        if 'email' in message_lower or '@' in user_message:
-            topics += 1
-            
-        # Household topics
-        if any(word in message_lower for word in ['household', 'people', 'wife', 'husband', 'child', 'daughter', 'son', 'kids', 'family members']):
-            topics += 1
-            
-        # Employment topics
-        if any(word in message_lower for word in ['unemployed', 'employed', 'job', 'work', 'working', 'looking for work']):
-            topics += 1
-            
-        # Financial topics
-        if any(word in message_lower for word in ['income', 'monthly', '$', 'earn', 'make', 'unemployment benefits', 'salary']):
-            topics += 1
-            
-        # Housing topics
-        if any(word in message_lower for word in ['rent', 'own', 'homeless', 'apartment', 'house', 'mortgage', 'housing']):
-            topics += 1
-            
-        # Health topics
-        if any(word in message_lower for word in ['disability', 'disabled', 'insurance', 'medical', 'health', 'doctor']):
-            topics += 1
-            
-        # Legal topics
-        if any(word in message_lower for word in ['citizen', 'citizenship', 'resident', 'legal status']):
-            topics += 1
-            
-        # Benefits topics
-        if any(word in message_lower for word in ['benefits', 'snap', 'medicaid', 'tanf', 'assistance', 'receiving']):
-            topics += 1
-            
-        # Emergency topics
-        if any(word in message_lower for word in ['urgent', 'emergency', 'behind on', 'struggling', 'desperate', 'need help']):
-            topics += 1
-        
-        return topics
+        return len(topics_in(user_message))
 
-    def _analyze_if_question_asked(self, assistant_response: str) -> bool:
+    def _question_analysis_steps(self, assistant_response: str) -> ChatSteps:
         """
         Use Watson to accurately determine if the assistant asked a new intake question.
         This is more accurate than pattern matching.
         """
-        token = self.get_access_token()
-
-        analysis_prompt = f"""Analyze this assistant message and determine if it asks a NEW intake question that requires user information.
-
-Assistant Message:
-"{assistant_response}"
+        analysis_prompt = get_prompt("intake.question_analysis").render(assistant_response=assistant_response)
 
-RULES:
-- Return "YES" if the message asks for NEW information (name, age, employment, income, housing, health, etc.)
-- Return "YES" if the message asks follow-up questions about information already shared
-- Return "NO" if it's just acknowledgment, empathy, or transition without asking for information
-- Return "NO" if it's explaining the process or thanking them
-- Return "NO" if it's confirming completion
-
-Examples:
-"What's your first name?" → YES
-"Thanks for sharing that. Now, are you currently employed?" → YES
-"Could you tell me your monthly income?" → YES
-"I'm sorry to hear that. How many people live with you?" → YES
-"Thank you! Your intake is complete." → NO
-"I understand. Let me help you with that." → NO
-"Great! We're making progress." → NO
-
-Return ONLY "YES" or "NO" - nothing else."""
-
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token}",
-        }
-
-        payload = {
-            "project_id": self.project_id,
-            "model_id": self.model_id,
-            "messages": [
-                {"role": "system", "content": "You are a precise question analyzer. Respond with only YES or NO."},
-                {"role": "user", "content": analysis_prompt}
-            ],
-            "parameters": {
-                "max_tokens": 10,
-                "temperature": 0.1,
-                "top_p": 0.9,
-            }
-        }
+        messages = [
+            get_prompt("intake.question_analyzer.system").message(),
+            {"role": "user", "content": analysis_prompt}
+        ]
 
         try:
-            response = requests.post(
-                f"{self.url}/ml/v1/text/chat?version=2023-05-29",
-                headers=headers,
-                json=payload,
-                timeout=30,
-            )
-            response.raise_for_status()
-            result = response.json()
+            result = yield dict(phase="question_analysis", messages=messages, max_tokens=10, temperature=0.1, top_p=0.9, timeout=30)
             
-            answer = result["choices"][0]["message"]["content"].strip().upper()
+            answer = result["text"].strip().upper()
             
             # Return True if answer contains "YES"
             return "YES" in answer
 
         except Exception as e:
-            print(f"⚠️ Error analyzing question: {e}")
+            logger.warning("⚠️ Error analyzing question: %s", e)
             # Default to True to not lose count (better to overcount slightly than undercount)
             return True
 
-    def _extract_intake_data(self, conversation_history: List[Dict[str, str]], questions_asked: int = 0) -> Dict[str, Any]:
+    def _extraction_steps(
+        self,
+        conversation_history: List[Message],
+        questions_asked: int = 0,
+        context_messages: int = 10,
+    ) -> ChatSteps:
         """
         Use Watson to extract structured data from the conversation.
         This is called after each user message to build up the collected data.
+        ``context_messages`` limits how much recent history is sent.
         """
-        token = self.get_access_token()
-
-        extraction_prompt = {
-            "role": "user",
-            "content": (
-                "CRITICAL TASK: Extract structured information from this conversation.\n\n"
-                "**STRICT RULES:**\n"
-                "1. ONLY extract information the user EXPLICITLY stated\n"
-                "2. DO NOT make up, assume, or invent ANY information\n"
-                "3. DO NOT use example names like 'John Doe', 'Jane Smith', etc.\n"
-                "4. If information wasn't provided, leave that field empty/null\n"
-                "5. Be precise with numbers and dates\n\n"
-                "Extract the following into JSON format:\n\n"
-                "{\n"
-                '  "personal": {\n'
-                '    "full_name": "exact name user provided",\n'
-                '    "first_name": "...",\n'
-                '    "last_name": "...",\n'
-                '    "date_of_birth": "YYYY-MM-DD or null",\n'
-                '    "age": number or null,\n'
-                '    "phone": "...",\n'
-                '    "email": "..."\n'
-                '  },\n'
-                '  "household": {\n'
-                '    "size": number,\n'
-                '    "has_children": true/false/null,\n'
-                '    "members": [\n'
-                '      {"name": "...", "age": number, "relationship": "spouse/child/etc"}\n'
-                '    ]\n'
-                '  },\n'
-                '  "employment": {\n'
-                '    "status": "employed/unemployed/self-employed/retired/disabled/student",\n'
-                '    "employer": "...",\n'
-                '    "job_title": "...",\n'
-                '    "duration": "how long at job",\n'
-                '    "looking_for_work": true/false/null\n'
-                '  },\n'
-                '  "financial": {\n'
-                '    "monthly_income": number,\n'
-                '    "income_sources": ["employment", "unemployment", "SSI", etc],\n'
-                '    "total_assets": number,\n'
-                '    "monthly_rent": number,\n'
-                '    "monthly_utilities": number,\n'
-                '    "monthly_medical": number,\n'
-                '    "monthly_childcare": number,\n'
-                '    "other_expenses": {...}\n'
-                '  },\n'
-                '  "housing": {\n'
-                '    "status": "rent/own/homeless/shelter/staying_with_family",\n'
-                '    "address": "...",\n'
-                '    "at_risk_of_homelessness": true/false/null\n'
-                '  },\n'
-                '  "health": {\n'
-                '    "has_disability": true/false/null,\n'
-                '    "disability_details": "...",\n'
-                '    "has_insurance": true/false/null,\n'
-                '    "has_medical_expenses": true/false/null,\n'
-                '    "monthly_medical_costs": number\n'
-                '  },\n'
-                '  "legal": {\n'
-                '    "citizenship_status": "US_citizen/permanent_resident/other",\n'
-                '    "immigration_status": "..."\n'
-                '  },\n'
-                '  "current_benefits": {\n'
-                '    "receiving_benefits": true/false/null,\n'
-                '    "programs": ["SNAP", "Medi-Cal", etc]\n'
-                '  },\n'
-                '  "emergency": {\n'
-                '    "has_urgent_needs": true/false/null,\n'
-                '    "details": "..."\n'
-                '  }\n'
-                '}\n\n'
-                "Return ONLY valid JSON. No markdown, no explanations, no extra text."
-            )
-        }
+        extraction_prompt = get_prompt("intake.extraction.instructions").message()
 
-        # Build extraction context (last 10 messages to keep it focused)
-        extraction_history = [
-            {"role": "system", "content": "You are a data extraction specialist. Extract information accurately."}
-        ]
+        # Build extraction context (last few messages to keep it focused)
+        extraction_history = [get_prompt("intake.extraction.system").message()]
         
-        # Get recent conversation (exclude system prompt)
-        recent_messages = [msg for msg in conversation_history if msg["role"] != "system"][-10:]
-        extraction_history.extend(recent_messages)
+        # Get recent conversation (the system prompt is never stored in history)
+        extraction_history.extend(message.as_dict() for message in conversation_history[-context_messages:])
         extraction_history.append(extraction_prompt)
 
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token}",
-        }
-
-        payload = {
-            "project_id": self.project_id,
-            "model_id": self.model_id,
-            "messages": extraction_history,
-            "parameters": {
-                "max_tokens": 1500,
-                "temperature": 0.1,  # Low temperature for precise extraction
-                "top_p": 0.9,
-            }
-        }
-
+        # Stream the reply and stop as soon as the JSON object closes
+        decoder = StreamingJSONDecoder(INTAKE_EXTRACTION_SCHEMA)
         try:
-            response = requests.post(
-                f"{self.url}/ml/v1/text/chat?version=2023-05-29",
-                headers=headers,
-                json=payload,
-                timeout=60,
+            result = yield dict(
+                phase="extraction",
+                messages=extraction_history,
+                max_tokens=1500,
+                temperature=0.1,  # Low temperature for precise extraction
+                top_p=0.9,
+                stop_when=decoder.update,
             )
-            response.raise_for_status()
-            result = response.json()
-            
-            extraction_text = result["choices"][0]["message"]["content"].strip()
-            
-            # Clean up markdown code blocks if present
-            extraction_text = re.sub(r'^```json?\s*', '', extraction_text)
-            extraction_text = re.sub(r'\s*```$', '', extraction_text)
-            
-            # Remove any text before the first {
-            if '{' in extraction_text:
-                extraction_text = extraction_text[extraction_text.find('{'):]
-            
-            # Remove any text after the last }
-            if '}' in extraction_text:
-                extraction_text = extraction_text[:extraction_text.rfind('}')+1]
-            
-            extracted = json.loads(extraction_text)
-            
-            # Validate no fake names
-            if extracted.get("personal", {}).get("full_name") in ["John Doe", "Jane Doe", "Jane Smith", "John Smith"]:
-                extracted["personal"]["full_name"] = None
-            
-            return extracted
+        except Exception as e:
+            logger.warning("⚠️ Error extracting data: %s", e)
+            return IntakeState()
 
-        except json.JSONDecodeError as e:
+        decoder.update(result["text"])
+        parsed = decoder.result()
+        if not parsed.ok or not isinstance(parsed.value, dict):
             # Early in conversation, structured data isn't available yet - this is normal
-            if questions_asked < 5:
-                return {}
-            print(f"⚠️ Error extracting data (JSON parse): {e}")
-            return {}
-        except Exception as e:
-            print(f"⚠️ Error extracting data: {e}")
-            return {}
+            if questions_asked >= 5:
+                logger.warning("⚠️ Error extracting data (no usable JSON)")
+                logger.debug("Unparseable extraction output: %r", result["text"][:200])
+            return IntakeState()
+        if parsed.repairs:
+            logger.debug("🔧 Repaired extraction JSON: %s", parsed.repairs)
+
+        # The decoder already coerced values to the schema; build the typed state directly
+        extracted = IntakeState.from_dict(parsed.value, validate=False)
+        
+        # Validate no fake names
+        extracted.drop_fake_name()
+        
+        return extracted
 
     def _check_intake_complete(self, extracted_data: Dict[str, Any], questions_asked: int) -> bool:
         """
@@ -770,17 +857,29 @@ Return ONLY "YES" or "NO" - nothing else."""
         Generate final case summary with urgency scoring and recommendations.
         Called when intake is complete.
         """
+        with self.locks.hold(conversation_id):
+            return self._run(self._case_summary_steps(conversation_id), conversation_id)
+
+    async def agenerate_case_summary(self, conversation_id: str) -> Dict[str, Any]:
+        """Async variant of generate_case_summary."""
+        async with self.locks.ahold(conversation_id):
+            return await self._arun(self._case_summary_steps(conversation_id), conversation_id)
+
+    def _case_summary_steps(self, conversation_id: str) -> ChatSteps:
         if conversation_id not in self.conversations:
             return {}
         
         conv = self.conversations[conversation_id]
-        extracted_data = conv["collected_data"]
+        extracted_data = conv.data.to_dict()
         
         # Calculate urgency score
         urgency_result = self._calculate_urgency_score(extracted_data)
+
+        # Deterministic eligibility screening decides the programs
+        eligibility = screen_case(eligibility_facts(extracted_data))
         
         # Generate AI summary and recommendations
-        ai_summary = self._generate_ai_summary(conv["history"], extracted_data)
+        ai_summary = yield from self._summary_steps(conv.history, extracted_data, eligibility)
         
         return {
             "extracted_data": extracted_data,
@@ -789,166 +888,84 @@ Return ONLY "YES" or "NO" - nothing else."""
             "ai_summary": ai_summary["summary"],
             "recommended_programs": ai_summary["programs"],
             "recommended_actions": ai_summary["actions"],
-            "conversation_history": conv["history"],
-            "questions_asked": conv["questions_asked"],
-            "duration": self._calculate_duration(conv["start_time"]),
+            "eligibility": eligibility,
+            "conversation_history": conv.transcript(),
+            "questions_asked": conv.questions_asked,
+            "duration": self._calculate_duration(conv.started_at),
+            "token_usage": conv.usage.to_dict(),
+            "prompt_versions": {
+                "system_prompt": conv.system_prompt,
+                "extraction": get_prompt("intake.extraction.instructions").prompt_id,
+                "summary": get_prompt("intake.summary.instructions").prompt_id,
+            },
         }
 
     def _calculate_urgency_score(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Calculate urgency score (1-10) based on multiple factors.
-        Higher score = more urgent need.
+        Higher score = more urgent need. Weights live in app/Backend/urgency.py.
         """
-        score = 5  # Base score
-        reasons = []
-        
-        housing = data.get("housing", {})
-        household = data.get("household", {})
-        financial = data.get("financial", {})
-        health = data.get("health", {})
-        emergency = data.get("emergency", {})
-        
-        # CRITICAL FACTORS (+3 each)
-        if housing.get("status") in ["homeless", "shelter"]:
-            score += 3
-            reasons.append("Currently homeless or in shelter")
-        
-        if housing.get("at_risk_of_homelessness"):
-            score += 3
-            reasons.append("At risk of homelessness")
-        
-        if emergency.get("has_urgent_needs"):
-            score += 3
-            reasons.append("Has immediate emergency needs")
-        
-        # HIGH PRIORITY FACTORS (+2 each)
-        if household.get("has_children"):
-            score += 2
-            reasons.append("Has children in household")
-        
-        if financial.get("monthly_income", 999999) == 0:
-            score += 2
-            reasons.append("Zero income")
-        
-        if health.get("has_disability"):
-            score += 2
-            reasons.append("Has disability")
-        
-        # MODERATE FACTORS (+1 each)
-        if financial.get("monthly_income", 999999) < 1000:
-            score += 1
-            reasons.append("Very low income (under $1000/month)")
-        
-        if health.get("has_insurance") is False:
-            score += 1
-            reasons.append("No health insurance")
-        
-        if health.get("has_medical_expenses"):
-            score += 1
-            reasons.append("Has medical expenses")
-        
-        # Cap at 10
-        score = min(score, 10)
-        
-        reasoning = "; ".join(reasons) if reasons else "Standard priority case"
-        
-        return {
-            "score": score,
-            "reasoning": reasoning
-        }
-
-    def _generate_ai_summary(self, conversation_history: List[Dict[str, str]], extracted_data: Dict[str, Any]) -> Dict[str, Any]:
+        return score_case(facts_from_intake(data))
+
+    def _summary_steps(
+        self,
+        conversation_history: List[Message],
+        extracted_data: Dict[str, Any],
+        eligibility: Dict[str, Any],
+    ) -> ChatSteps:
         """
         Use Watson to generate human-readable summary and recommendations.
+        Programs come from the eligibility screening; the model only explains them.
         """
-        token = self.get_access_token()
-
-        summary_prompt = {
-            "role": "user",
-            "content": (
-                "Generate a comprehensive case summary for a caseworker.\n\n"
-                "Based on the conversation and extracted data, provide:\n\n"
-                "1. **CASE SUMMARY** (3-4 paragraphs):\n"
-                "   - Who is this person and what is their situation?\n"
-                "   - Key facts about household, income, employment\n"
-                "   - Housing and health status\n"
-                "   - Any urgent concerns\n\n"
-                "2. **RECOMMENDED PROGRAMS** (JSON array):\n"
-                "   - List programs they likely qualify for: SNAP, Medi-Cal, SSI, TANF\n"
-                '   - Format: ["SNAP", "Medi-Cal"]\n\n'
-                "3. **RECOMMENDED ACTIONS** (bullet points):\n"
-                "   - What should the caseworker do first?\n"
-                "   - What documentation to request?\n"
-                "   - Any urgent follow-up needed?\n\n"
-                "Return in this JSON format:\n"
-                "{\n"
-                '  "summary": "narrative summary here...",\n'
-                '  "programs": ["SNAP", "Medi-Cal"],\n'
-                '  "actions": "• Action 1\\n• Action 2\\n• Action 3"\n'
-                "}\n\n"
-                "Be professional but compassionate in tone. Return ONLY valid JSON."
-            )
-        }
+        summary_prompt = get_prompt("intake.summary.instructions").message()
 
-        summary_history = [
-            {"role": "system", "content": "You are a case summary specialist helping caseworkers understand client situations quickly."}
-        ]
+        summary_history = [get_prompt("intake.summary.system").message()]
         
         # Include conversation context
-        recent_messages = [msg for msg in conversation_history if msg["role"] != "system"][-15:]
-        summary_history.extend(recent_messages)
+        summary_history.extend(message.as_dict() for message in conversation_history[-15:])
+        summary_history.append({"role": "user", "content": self._format_screening(eligibility)})
         summary_history.append(summary_prompt)
 
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token}",
-        }
-
-        payload = {
-            "project_id": self.project_id,
-            "model_id": self.model_id,
-            "messages": summary_history,
-            "parameters": {
-                "max_tokens": 1000,
-                "temperature": 0.5,
-                "top_p": 0.9,
-            }
+        fallback = {
+            "summary": "Case summary generation failed. Please review conversation transcript.",
+            "programs": eligibility["programs"],
+            "actions": "• Review conversation manually\n• Determine eligibility\n• Contact applicant"
         }
 
+        decoder = StreamingJSONDecoder(SUMMARY_SCHEMA)
         try:
-            response = requests.post(
-                f"{self.url}/ml/v1/text/chat?version=2023-05-29",
-                headers=headers,
-                json=payload,
-                timeout=60,
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            summary_text = result["choices"][0]["message"]["content"].strip()
-            
-            # Clean markdown
-            summary_text = re.sub(r'^```json?\s*', '', summary_text)
-            summary_text = re.sub(r'\s*```$', '', summary_text)
-            
-            summary_data = json.loads(summary_text)
-            return summary_data
-
+            result = yield dict(phase="summary", messages=summary_history, max_tokens=1000, temperature=0.5, top_p=0.9, stop_when=decoder.update)
         except Exception as e:
-            print(f"⚠️ Error generating summary: {e}")
-            return {
-                "summary": "Case summary generation failed. Please review conversation transcript.",
-                "programs": [],
-                "actions": "• Review conversation manually\n• Determine eligibility\n• Contact applicant"
-            }
-
-    def _calculate_duration(self, start_time_iso: str) -> str:
+            logger.warning("⚠️ Error generating summary: %s", e)
+            return fallback
+
+        decoder.update(result["text"])
+        parsed = decoder.result()
+        if not parsed.ok or not isinstance(parsed.value, dict) or not parsed.value.get("summary"):
+            logger.warning("⚠️ Error generating summary (no usable JSON)")
+            logger.debug("Unparseable summary output: %r", result["text"][:200])
+            return fallback
+        if parsed.repairs:
+            logger.debug("🔧 Repaired summary JSON: %s", parsed.repairs)
+
+        summary_data = parsed.value
+        if set(summary_data.get("programs") or []) != set(eligibility["programs"]):
+            logger.info("⚠️ Summary programs %s replaced by screening %s", summary_data.get("programs"), eligibility["programs"])
+        summary_data["programs"] = eligibility["programs"]
+        summary_data["actions"] = summary_data.get("actions") or fallback["actions"]
+        return summary_data
+
+    def _format_screening(self, eligibility: Dict[str, Any]) -> str:
+        """Render screening results as a context message for the summary prompt."""
+        lines = ["ELIGIBILITY SCREENING RESULTS (from program rules - do not change):"]
+        for result in eligibility["results"]:
+            lines.append(f"- {result['program']}: {result['status'].upper()} ({result['reason']})")
+        return "\n".join(lines)
+
+    def _calculate_duration(self, started_at: float) -> str:
         """Calculate conversation duration in human-readable format."""
         try:
-            start = datetime.fromisoformat(start_time_iso)
-            duration = datetime.now() - start
-            minutes = int(duration.total_seconds() / 60)
+            minutes = int((time.time() - started_at) / 60)
             return f"{minutes} minutes"
         except:
             return "Unknown"
@@ -958,6 +975,5 @@ Return ONLY "YES" or "NO" - nothing else."""
         if conversation_id not in self.conversations:
             return []
         
-        conv = self.conversations[conversation_id]
         # Return without system prompt
-        return [msg for msg in conv["history"] if msg["role"] != "system"]
+        return self.conversations[conversation_id].transcript()
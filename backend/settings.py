@@ -5,6 +5,7 @@ Django settings for backend project.
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -32,6 +33,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the Server-Timing breakdown covers the whole request
+    'chatbot.middleware.TracingMiddleware',
+    # Removes itself unless PROFILING_SECRET or PROFILING_SAMPLE_RATE is set
+    'chatbot.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -86,7 +91,7 @@ else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH') or BASE_DIR / 'db.sqlite3',
         }
     }
     print("📝 Using SQLite database (local development)")
@@ -143,6 +148,13 @@ elif 'CORS_ALLOWED_ORIGINS' not in globals():
     # Production settings should define this, but fall back to empty list if not
     CORS_ALLOWED_ORIGINS = []
 
+# Let the frontend send Idempotency-Key on chat requests (production sets its own list)
+if 'CORS_ALLOW_HEADERS' not in globals():
+    CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'traceparent')
+
+# Let the frontend read the per-request latency breakdown
+CORS_EXPOSE_HEADERS = ['Server-Timing', 'X-Trace-Id']
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -150,6 +162,19 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Serve chat and dashboard endpoints from async views (run under an ASGI server)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'true').lower() != 'false'
+
+# Queued chat turns: worker threads per process and the longest a poll may wait
+CHAT_TURN_WORKERS = int(os.getenv('CHAT_TURN_WORKERS', '8'))
+CHAT_TURN_MAX_WAIT = float(os.getenv('CHAT_TURN_MAX_WAIT', '25'))
+
+# How long an Idempotency-Key keeps pointing at its stored chat turn, in seconds
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+
+# Bearer token Prometheus must send to scrape /metrics; unset hides the endpoint (404)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -50,6 +50,8 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
+    'traceparent',
 ]
 
 # CSRF settings for cross-origin requests
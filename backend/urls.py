@@ -18,13 +18,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from chatbot.views import healthz
+from chatbot.views import healthz, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/chatbot/', include('chatbot.urls')),
     path('api/forms/', include('forms.urls')),
     path('healthz/', healthz),
+    path('metrics', metrics),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,9 @@
+"""
+Load-test harness for the intake backend
+Local stand-ins for watsonx.ai (chat + IAM) and Supabase's PostgREST API, and
+a driver that walks N concurrent applicants through a full intake:
+
+    python -m benchmarks.load_intake --applicants 50
+
+See benchmarks/load_intake.py for the options and the report it prints.
+"""
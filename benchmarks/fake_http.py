@@ -0,0 +1,68 @@
+"""
+Threaded HTTP server plumbing shared by the fake upstream services
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from benchmarks.stats import ServiceStats
+
+
+class FakeService(ThreadingHTTPServer):
+    """A stand-in service running on a background thread."""
+
+    daemon_threads = True
+    # Default of 5 drops connections when hundreds of applicants start at once
+    request_queue_size = 1024
+
+    def __init__(self, address: Tuple[str, int], handler: type):
+        super().__init__(address, handler)
+        self.stats = ServiceStats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeService":
+        self._thread = threading.Thread(target=self.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Keep-alive JSON request handler with quiet logging."""
+
+    protocol_version = "HTTP/1.1"
+    server: FakeService
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.stats.add_bytes(received=len(body))
+        return body
+
+    def read_json(self) -> Any:
+        body = self.read_body()
+        return json.loads(body) if body else None
+
+    def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        self.server.stats.add_bytes(sent=len(body))
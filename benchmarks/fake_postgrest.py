@@ -0,0 +1,273 @@
+"""
+PostgREST-compatible stand-in for Supabase
+Keeps tables in memory and answers the subset of the REST API that
+supabase-py issues from this codebase:
+
+    GET    /rest/v1/<table>?select=...&<col>=eq.<v>&order=<col>.desc&limit=N
+    POST   /rest/v1/<table>      insert / upsert (Prefer: resolution=merge-duplicates)
+    PATCH  /rest/v1/<table>?id=eq.<v>
+    DELETE /rest/v1/<table>?id=in.(a,b)
+
+Filters: eq, neq, gt, gte, lt, lte, in, is, like, ilike. Selects may alias
+columns and follow JSON paths (alias:col->key). Embedded selects and RPC
+functions are not emulated (RPC calls get PostgREST's 404).
+
+    python -m benchmarks.fake_postgrest --port 8788 --latency fixed:20
+
+Then point the backend at it with SUPABASE_URL=http://127.0.0.1:8788 and
+SUPABASE_ANON_KEY set to FAKE_ANON_KEY below.
+"""
+import argparse
+import fnmatch
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from benchmarks.fake_http import FakeService, JSONHandler
+from benchmarks.latency import Latency
+
+# supabase-py only accepts JWT-shaped keys; this one is {"alg":"none"}.{"role":"anon"}
+FAKE_ANON_KEY = "eyJhbGciOiJub25lIiwidHlwIjoiSldUIn0.eyJyb2xlIjoiYW5vbiJ9."
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _compare(value: Any, literal: str) -> Tuple[Any, Any]:
+    """Bring a stored value and a query literal to comparable types."""
+    if isinstance(value, bool):
+        return str(value).lower(), literal.lower()
+    if isinstance(value, (int, float)):
+        try:
+            return value, float(literal)
+        except ValueError:
+            return str(value), literal
+    return str(value), literal
+
+
+def _alias(column: str) -> str:
+    """Output key of a select item: ``alias:col->key`` renames, ``col->key`` is keyed by ``key``."""
+    if ":" in column:
+        return column.split(":", 1)[0]
+    return column.split("->")[-1].lstrip(">")
+
+
+def _json_path(row: Dict[str, Any], column: str) -> Any:
+    """Value of a select item, following ``->`` / ``->>`` JSON paths into json columns."""
+    path = column.split(":", 1)[-1].replace("->>", "->").split("->")
+    value: Any = row.get(path[0])
+    for key in path[1:]:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _matches(value: Any, operator: str, operand: str) -> bool:
+    negate = operator.startswith("not.")
+    if negate:
+        operator = operator[len("not."):]
+    if operator == "is":
+        result = value is None if operand == "null" else _compare(value, operand)[0] == operand.lower()
+    elif operator == "in":
+        options = [option.strip().strip('"') for option in operand.strip("()").split(",")]
+        result = value is not None and any(_compare(value, option)[0] == _compare(value, option)[1] for option in options)
+    elif value is None:
+        result = False
+    elif operator in ("like", "ilike"):
+        pattern = operand.replace("%", "*")
+        text = str(value)
+        result = fnmatch.fnmatchcase(text.lower(), pattern.lower()) if operator == "ilike" else fnmatch.fnmatchcase(text, pattern)
+    else:
+        left, right = _compare(value, operand)
+        checks: Dict[str, Callable[[Any, Any], bool]] = {
+            "eq": lambda a, b: a == b,
+            "neq": lambda a, b: a != b,
+            "gt": lambda a, b: a > b,
+            "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b,
+            "lte": lambda a, b: a <= b,
+        }
+        if operator not in checks:
+            raise ValueError(f"Unsupported filter operator {operator!r}")
+        result = checks[operator](left, right)
+    return not result if negate else result
+
+
+class FakePostgrest(FakeService):
+    """In-memory Supabase REST stand-in."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: Optional[Latency] = None):
+        super().__init__((host, port), FakePostgrestHandler)
+        self.latency = latency or Latency("fixed", 15)
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [dict(row) for row in self.tables.get(table, {}).values()]
+
+
+class FakePostgrestHandler(JSONHandler):
+    server: FakePostgrest
+
+    def do_GET(self) -> None:
+        self._handle(self._select)
+
+    def do_HEAD(self) -> None:
+        self._handle(self._select)
+
+    def do_POST(self) -> None:
+        self._handle(self._insert)
+
+    def do_PATCH(self) -> None:
+        self._handle(self._update)
+
+    def do_DELETE(self) -> None:
+        self._handle(self._delete)
+
+    def _handle(self, operation: Callable[[str, List[Tuple[str, str]]], None]) -> None:
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) < 3 or parts[:2] != ["rest", "v1"]:
+            self.read_body()
+            self.send_json(404, {"message": f"No route for {url.path}"})
+            return
+        if parts[2] == "rpc":
+            self.read_body()
+            name = parts[3] if len(parts) > 3 else ""
+            self.send_json(404, {"code": "PGRST202", "message": f"Could not find the function public.{name}"})
+            return
+
+        table = parts[2]
+        with self.server.stats.track(f"{self.command} {table}"):
+            time.sleep(self.server.latency.sample())
+            try:
+                operation(table, parse_qsl(url.query, keep_blank_values=True))
+            except (ValueError, TypeError) as e:
+                self.server.stats.add_failure()
+                self.send_json(400, {"code": "PGRST100", "message": str(e)})
+
+    # ---- helpers ----
+
+    def _filters(self, params: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+        filters = []
+        for column, expression in params:
+            if column in RESERVED_PARAMS:
+                continue
+            operator, _, operand = expression.partition(".")
+            if operator == "not":
+                negated, _, operand = operand.partition(".")
+                operator = f"not.{negated}"
+            filters.append((column, operator, operand))
+        return filters
+
+    def _matching(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        filters = self._filters(params)
+        return [
+            row for row in self.server.tables.get(table, {}).values()
+            if all(_matches(row.get(column), operator, operand) for column, operator, operand in filters)
+        ]
+
+    def _wants_rows(self) -> bool:
+        return "return=representation" in (self.headers.get("Prefer") or "")
+
+    def _project(self, rows: List[Dict[str, Any]], params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        select = dict(params).get("select", "*")
+        if select in ("", "*"):
+            return [dict(row) for row in rows]
+        columns = [column.strip() for column in select.split(",") if "(" not in column]
+        return [{_alias(column): _json_path(row, column) for column in columns} for row in rows]
+
+    def _respond_rows(self, status: int, rows: List[Dict[str, Any]], total: Optional[int] = None) -> None:
+        headers = {}
+        if total is not None:
+            headers["Content-Range"] = f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"
+        if self._wants_rows() or self.command in ("GET", "HEAD"):
+            self.send_json(status, rows, headers)
+        else:
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+    # ---- operations ----
+
+    def _select(self, table: str, params: List[Tuple[str, str]]) -> None:
+        options = dict(params)
+        with self.server.lock:
+            rows = self._matching(table, params)
+        for clause in reversed((options.get("order") or "").split(",")):
+            if not clause:
+                continue
+            column, _, direction = clause.partition(".")
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: row[column], reverse=direction.startswith("desc"))
+            rows = present + missing
+        total = len(rows)
+        offset = int(options.get("offset") or 0)
+        limit = options.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+        self._respond_rows(200, self._project(rows, params), total if "count=" in (self.headers.get("Prefer") or "") else None)
+
+    def _insert(self, table: str, params: List[Tuple[str, str]]) -> None:
+        payload = self.read_json()
+        records = payload if isinstance(payload, list) else [payload]
+        upsert = "merge-duplicates" in (self.headers.get("Prefer") or "")
+        key = dict(params).get("on_conflict", "id")
+        written = []
+        with self.server.lock:
+            rows = self.server.tables.setdefault(table, {})
+            for record in records:
+                if not isinstance(record, dict):
+                    raise ValueError("Expected a JSON object or array of objects")
+                identity = str(record.get(key))
+                if identity in rows and not upsert:
+                    self.server.stats.add_failure()
+                    self.send_json(409, {"code": "23505", "message": f"duplicate key value violates unique constraint on {key}"})
+                    return
+                rows[identity] = {**rows.get(identity, {}), **record}
+                written.append(dict(rows[identity]))
+        self._respond_rows(201, written)
+
+    def _update(self, table: str, params: List[Tuple[str, str]]) -> None:
+        changes = self.read_json() or {}
+        with self.server.lock:
+            rows = self._matching(table, params)
+            for row in rows:
+                row.update(changes)
+            updated = [dict(row) for row in rows]
+        self._respond_rows(200, updated)
+
+    def _delete(self, table: str, params: List[Tuple[str, str]]) -> None:
+        self.read_body()
+        with self.server.lock:
+            rows = self.server.tables.get(table, {})
+            deleted = self._matching(table, params)
+            for row in deleted:
+                rows.pop(str(row.get("id")), None)
+        self._respond_rows(200, [dict(row) for row in deleted])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local PostgREST / Supabase stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8788)
+    parser.add_argument('--latency', default='fixed:15', help="Per-request latency, e.g. fixed:15 or lognormal:20:0.5")
+    args = parser.parse_args()
+
+    server = FakePostgrest(args.host, args.port, latency=Latency.parse(args.latency))
+    print(f"🗄️ Fake PostgREST listening on {server.url} ({server.latency})")
+    print(f"   SUPABASE_URL={server.url}")
+    print(f"   SUPABASE_ANON_KEY={FAKE_ANON_KEY}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {json.dumps(server.stats.snapshot(), indent=2)}")
+        for table, rows in sorted(server.tables.items()):
+            print(f"   - {table}: {len(rows)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Local stand-in for watsonx.ai chat and IBM Cloud IAM
+Serves the endpoints WatsonIntakeAssistant calls:
+
+    POST /identity/token           IAM token exchange
+    POST /ml/v1/text/chat          one JSON reply (question analysis)
+    POST /ml/v1/text/chat_stream   server-sent events (replies, extraction, summary)
+
+Each request is recognised by its system prompt and answered with canned
+output of realistic size: the next intake question, YES, a full extraction
+record or a case summary. Time to first token, token rate and the share of
+requests that fail are configurable, and the client closing a stream early
+(stop_when) ends generation just like the real service.
+
+    python -m benchmarks.fake_watsonx --port 8787 --latency lognormal:700:0.4
+
+Then point the backend at it with WATSON_URL=http://127.0.0.1:8787 and
+WATSON_IAM_URL=http://127.0.0.1:8787/identity/token.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from app.Backend.prompts import get_prompt
+from benchmarks.fake_http import FakeService, JSONHandler
+from benchmarks.latency import Latency
+
+KIND_REPLY = "reply"
+KIND_QUESTION_ANALYSIS = "question_analysis"
+KIND_EXTRACTION = "extraction"
+KIND_SUMMARY = "summary"
+
+CHARS_PER_TOKEN = 4
+TOKENS_PER_CHUNK = 4
+
+# The question the fake assistant asks after each answer, in intake order
+INTAKE_QUESTIONS: List[str] = [
+    "To get started, what is your full name?",
+    "What is your date of birth?",
+    "What is the best phone number to reach you?",
+    "Do you have an email address we can use?",
+    "How many people live in your household, including you?",
+    "Could you tell me a little about the people who live with you, like their ages?",
+    "Are you currently working?",
+    "Who is your employer, and what is your job title?",
+    "How long have you been at that job?",
+    "Roughly how much does your household earn in a typical month before taxes?",
+    "Do you have any other sources of income, like child support or unemployment?",
+    "Do you have any savings or other assets, and about how much?",
+    "Do you rent or own your home?",
+    "How much is your monthly rent?",
+    "About how much do you spend each month on utilities?",
+    "Are you at risk of losing your housing right now?",
+    "Do you or anyone in your household have a disability?",
+    "Do you have health insurance at the moment?",
+    "Do you have regular medical expenses, and about how much a month?",
+    "Do you pay for childcare, and if so how much each month?",
+    "Are you a U.S. citizen?",
+    "Are you currently receiving any benefits, like SNAP or Medi-Cal?",
+    "Is there anything urgent you need help with right now, like food or a utility shutoff?",
+    "What is your current home address?",
+    "Is there anything else you would like your caseworker to know?",
+]
+
+ACKNOWLEDGEMENTS = [
+    "Thank you for sharing that with me.",
+    "Got it, thank you.",
+    "That's really helpful to know.",
+    "Thanks, I appreciate you walking me through this.",
+]
+
+EXTRACTION_RECORD: Dict[str, Any] = {
+    "personal": {
+        "full_name": "Maria Lopez",
+        "first_name": "Maria",
+        "last_name": "Lopez",
+        "date_of_birth": "1990-04-12",
+        "age": 34,
+        "phone": "(510) 555-0134",
+        "email": "maria.lopez@example.com",
+    },
+    "household": {
+        "size": 3,
+        "has_children": True,
+        "members": [
+            {"name": "Sofia", "age": 7, "relationship": "child"},
+            {"name": "Diego", "age": 4, "relationship": "child"},
+        ],
+    },
+    "employment": {
+        "status": "employed",
+        "employer": "Fresh Market Grocery",
+        "job_title": "cashier",
+        "duration": "2 years",
+        "looking_for_work": False,
+    },
+    "financial": {
+        "monthly_income": 1850,
+        "income_sources": ["employment", "child support"],
+        "total_assets": 400,
+        "monthly_rent": 1450,
+        "monthly_utilities": 160,
+        "monthly_medical": 60,
+        "monthly_childcare": 300,
+        "other_expenses": {"transportation": 120},
+    },
+    "housing": {
+        "status": "rent",
+        "address": "1234 Elm Street, Apt 5, Oakland, CA 94601",
+        "at_risk_of_homelessness": True,
+    },
+    "health": {
+        "has_disability": False,
+        "disability_details": "",
+        "has_insurance": False,
+        "has_medical_expenses": True,
+        "monthly_medical_costs": 60,
+    },
+    "legal": {"citizenship_status": "US_citizen", "immigration_status": ""},
+    "current_benefits": {"receiving_benefits": True, "programs": ["SNAP"]},
+    "emergency": {"has_urgent_needs": True, "details": "Received a late rent notice; PG&E shutoff warning"},
+}
+
+SUMMARY_RECORD: Dict[str, Any] = {
+    "summary": (
+        "Maria Lopez is a 34-year-old single mother of two (ages 7 and 4) working as a cashier "
+        "and earning about $1,850 a month. Rent of $1,450 leaves little for utilities, childcare "
+        "and medical costs; she has received a late rent notice and a utility shutoff warning. "
+        "She is uninsured and currently receives SNAP."
+    ),
+    "programs": ["Medi-Cal", "CalWORKs", "LIHEAP"],
+    "actions": (
+        "• Start Medi-Cal application for the household\n"
+        "• Refer to emergency rental assistance this week\n"
+        "• Submit LIHEAP application to stop the utility shutoff"
+    ),
+}
+
+
+def _system_prompt_kinds() -> Dict[str, str]:
+    return {
+        get_prompt("intake.system").text: KIND_REPLY,
+        get_prompt("intake.question_analyzer.system").text: KIND_QUESTION_ANALYSIS,
+        get_prompt("intake.extraction.system").text: KIND_EXTRACTION,
+        get_prompt("intake.summary.system").text: KIND_SUMMARY,
+    }
+
+
+class FakeWatsonx(FakeService):
+    """watsonx.ai + IAM stand-in with configurable latency and failures."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[Latency] = None,
+        tokens_per_second: float = 80.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        iam_latency: Optional[Latency] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__((host, port), FakeWatsonxHandler)
+        self.latency = latency or Latency("lognormal", 600, 0.4, seed)
+        self.iam_latency = iam_latency or Latency("fixed", 150)
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.kinds = _system_prompt_kinds()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @property
+    def iam_url(self) -> str:
+        return f"{self.url}/identity/token"
+
+    def should_fail(self) -> bool:
+        with self._random_lock:
+            return self._random.random() < self.failure_rate
+
+    def classify(self, payload: Dict[str, Any]) -> str:
+        messages = payload.get("messages") or [{}]
+        kind = self.kinds.get(messages[0].get("content", ""))
+        if kind:
+            return kind
+        # Unknown prompt (e.g. edited without restarting the fake): guess from the budget
+        max_tokens = payload.get("max_tokens", 0)
+        if max_tokens <= 10:
+            return KIND_QUESTION_ANALYSIS
+        return KIND_EXTRACTION if max_tokens >= 1500 else KIND_REPLY
+
+    def respond(self, kind: str, payload: Dict[str, Any]) -> str:
+        if kind == KIND_QUESTION_ANALYSIS:
+            return "YES"
+        if kind == KIND_EXTRACTION:
+            return json.dumps(EXTRACTION_RECORD, indent=2)
+        if kind == KIND_SUMMARY:
+            return json.dumps(SUMMARY_RECORD, indent=2)
+        return self._next_question(payload.get("messages") or [])
+
+    def _next_question(self, messages: List[Dict[str, str]]) -> str:
+        asked = -1
+        for message in reversed(messages):
+            if message.get("role") != "assistant":
+                continue
+            for index, question in enumerate(INTAKE_QUESTIONS):
+                if question in message.get("content", ""):
+                    asked = index
+                    break
+            break
+        acknowledgement = ACKNOWLEDGEMENTS[(asked + 1) % len(ACKNOWLEDGEMENTS)]
+        if asked + 1 < len(INTAKE_QUESTIONS):
+            question = INTAKE_QUESTIONS[asked + 1]
+        else:
+            question = "Is there anything else I can help you with today?"
+        # Trailing text past the question is what stop_when saves generating
+        return f"{acknowledgement} {question} Take your time, there's no wrong answer here."
+
+
+class FakeWatsonxHandler(JSONHandler):
+    server: FakeWatsonx
+
+    def do_POST(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/identity/token":
+            self._token()
+        elif path == "/ml/v1/text/chat":
+            self._chat(stream=False)
+        elif path == "/ml/v1/text/chat_stream":
+            self._chat(stream=True)
+        else:
+            self.read_body()
+            self.send_json(404, {"errors": [{"code": "not_found", "message": f"No route for {path}"}]})
+
+    def _token(self) -> None:
+        self.read_body()
+        with self.server.stats.track("iam_token"):
+            time.sleep(self.server.iam_latency.sample())
+            self.send_json(200, {
+                "access_token": "fake-watsonx-token",
+                "refresh_token": "not_supported",
+                "token_type": "Bearer",
+                "expires_in": 3600,
+                "expiration": int(time.time()) + 3600,
+            })
+
+    def _chat(self, stream: bool) -> None:
+        payload = self.read_json() or {}
+        kind = self.server.classify(payload)
+        with self.server.stats.track(kind):
+            time.sleep(self.server.latency.sample())
+            if self.server.should_fail():
+                self.server.stats.add_failure()
+                self.send_json(self.server.failure_status, {
+                    "errors": [{"code": "service_unavailable", "message": "Injected failure"}],
+                    "status_code": self.server.failure_status,
+                })
+                return
+            text = self.server.respond(kind, payload)
+            if stream:
+                self._stream(text, payload)
+            else:
+                time.sleep(self._tokens(text) / self.server.tokens_per_second)
+                self.send_json(200, {
+                    "model_id": payload.get("model_id"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    "usage": self._usage(payload, text),
+                })
+
+    def _stream(self, text: str, payload: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        chunk_chars = TOKENS_PER_CHUNK * CHARS_PER_TOKEN
+        chunk_delay = TOKENS_PER_CHUNK / self.server.tokens_per_second
+        try:
+            for start in range(0, len(text), chunk_chars):
+                time.sleep(chunk_delay)
+                self._event({"choices": [{"index": 0, "delta": {"content": text[start:start + chunk_chars]}, "finish_reason": None}]})
+            self._event({
+                "choices": [{"index": 0, "delta": {"content": ""}, "finish_reason": "stop"}],
+                "usage": self._usage(payload, text),
+            })
+        except (BrokenPipeError, ConnectionResetError):
+            # The client got what it needed and hung up (stop_when)
+            pass
+
+    def _event(self, data: Dict[str, Any]) -> None:
+        body = f"id: 1\nevent: message\ndata: {json.dumps(data)}\n\n".encode()
+        self.wfile.write(body)
+        self.wfile.flush()
+        self.server.stats.add_bytes(sent=len(body))
+
+    def _tokens(self, text: str) -> int:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+
+    def _usage(self, payload: Dict[str, Any], text: str) -> Dict[str, int]:
+        prompt_tokens = sum(self._tokens(message.get("content", "")) for message in payload.get("messages", []))
+        completion_tokens = self._tokens(text)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local watsonx.ai + IAM stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--latency', default='lognormal:600:0.4', help="Time to first token, e.g. lognormal:600:0.4 or fixed:200")
+    parser.add_argument('--tokens-per-second', type=float, default=80.0, help="Generation speed once streaming")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Share of chat requests that fail (0-1)")
+    parser.add_argument('--failure-status', type=int, default=503, help="HTTP status of injected failures (e.g. 429, 503)")
+    parser.add_argument('--iam-latency', default='fixed:150', help="IAM token endpoint latency")
+    args = parser.parse_args()
+
+    server = FakeWatsonx(
+        args.host,
+        args.port,
+        latency=Latency.parse(args.latency),
+        tokens_per_second=args.tokens_per_second,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        iam_latency=Latency.parse(args.iam_latency),
+    )
+    print(f"🤖 Fake watsonx listening on {server.url} ({server.latency}, {args.tokens_per_second:g} tokens/s, {args.failure_rate:.0%} failures)")
+    print(f"   WATSON_URL={server.url}")
+    print(f"   WATSON_IAM_URL={server.iam_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {json.dumps(server.stats.snapshot(), indent=2)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Latency distributions for the fake upstream services
+A spec is ``<distribution>:<median ms>[:<spread>]``:
+
+    fixed:200          always 200 ms
+    lognormal:800:0.5  median 800 ms, sigma 0.5 (long right tail, like real LLM calls)
+    exponential:300    mean 300 ms
+    uniform:100:400    anywhere between 100 and 400 ms
+"""
+import math
+import random
+from typing import Optional
+
+DISTRIBUTIONS = ("fixed", "lognormal", "exponential", "uniform")
+
+
+class Latency:
+    """Samples a delay in seconds from a configured distribution."""
+
+    def __init__(self, distribution: str = "fixed", median_ms: float = 0.0, spread: float = 0.0, seed: Optional[int] = None):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}; use one of {', '.join(DISTRIBUTIONS)}")
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.spread = spread
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "Latency":
+        parts = spec.split(":")
+        try:
+            values = [float(part) for part in parts[1:]]
+        except ValueError:
+            raise ValueError(f"Bad latency spec {spec!r}; expected <distribution>:<ms>[:<spread>]")
+        if not values:
+            raise ValueError(f"Bad latency spec {spec!r}; expected <distribution>:<ms>[:<spread>]")
+        spread = values[1] if len(values) > 1 else (0.5 if parts[0] == "lognormal" else 0.0)
+        return cls(parts[0], values[0], spread, seed)
+
+    def sample(self) -> float:
+        """One delay in seconds."""
+        if self.distribution == "fixed":
+            ms = self.median_ms
+        elif self.distribution == "lognormal":
+            ms = self._random.lognormvariate(math.log(max(self.median_ms, 1e-3)), self.spread)
+        elif self.distribution == "exponential":
+            ms = self._random.expovariate(1.0 / self.median_ms) if self.median_ms > 0 else 0.0
+        else:
+            ms = self._random.uniform(self.median_ms, max(self.spread, self.median_ms))
+        return max(ms, 0.0) / 1000
+
+    def __str__(self) -> str:
+        if self.distribution == "fixed":
+            return f"fixed {self.median_ms:g} ms"
+        if self.distribution == "uniform":
+            return f"uniform {self.median_ms:g}-{self.spread:g} ms"
+        if self.distribution == "exponential":
+            return f"exponential mean {self.median_ms:g} ms"
+        return f"lognormal median {self.median_ms:g} ms, sigma {self.spread:g}"
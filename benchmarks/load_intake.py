@@ -0,0 +1,430 @@
+"""
+Load driver: N concurrent applicants walking a full intake
+Each simulated applicant creates a conversation and answers the intake one
+message at a time through send_message (about 25 questions) until the
+backend reports the intake complete, just like the chat frontend.
+
+By default the driver starts the fake watsonx and PostgREST
+services in-process, migrates a throwaway SQLite database and launches the
+backend the way the Procfile does (gunicorn + uvicorn workers), so nothing
+touches IBM, Supabase or your dev database:
+
+    python -m benchmarks.load_intake --applicants 50
+    python -m benchmarks.load_intake --applicants 50 --sync-views --threads 16
+    python -m benchmarks.load_intake --base-url http://127.0.0.1:8000 --applicants 5
+
+The report covers throughput, p50/p95/p99 latency per intake phase, errors,
+and saturation: requests in flight at the server vs. its capacity, calls in
+flight at watsonx, time per turn spent outside watsonx, and conversation
+lock contention from /metrics (the started backend gets a throwaway
+METRICS_TOKEN; pass --metrics-token with --base-url).
+
+SQLite serializes writes, so at high concurrency the database becomes the
+bottleneck; set SUPABASE_DB_* to benchmark against Postgres instead.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import secrets
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_postgrest import FAKE_ANON_KEY, FakePostgrest
+from benchmarks.fake_watsonx import FakeWatsonx
+from benchmarks.latency import Latency
+from benchmarks.stats import summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SATURATION_INTERVAL = 0.5
+
+# One applicant's answers, in the order the fake assistant asks its questions
+APPLICANT_ANSWERS: List[str] = [
+    "Hi, I'm hoping to get some help with food and rent.",
+    "My name is Maria Lopez.",
+    "April 12, 1990.",
+    "(510) 555-0134",
+    "Yes, maria.lopez@example.com",
+    "Three of us.",
+    "My two kids, Sofia is 7 and Diego is 4.",
+    "Yes, part time.",
+    "I'm a cashier at Fresh Market Grocery.",
+    "About two years now.",
+    "Around $1,850 a month.",
+    "I get $250 a month in child support.",
+    "Maybe $400 in savings.",
+    "We rent an apartment.",
+    "$1,450 a month.",
+    "Usually around $160.",
+    "Yes, I got a late rent notice last week.",
+    "No.",
+    "No, I lost my coverage in the spring.",
+    "About $60 a month for my son's inhaler.",
+    "Yes, $300 a month for after-school care.",
+    "Yes, I was born in California.",
+    "Just SNAP right now.",
+    "PG&E sent a shutoff warning, so that's the most urgent.",
+    "1234 Elm Street, Apt 5, Oakland, CA 94601.",
+    "No, I think that covers everything. Thank you.",
+]
+
+PHASE_CREATE = "create conversation"
+PHASE_COMPLETE = "completing turn"
+PHASES = [PHASE_CREATE, "turns 1-8", "turns 9-16", "turns 17+", PHASE_COMPLETE]
+
+
+def turn_phase(turn_number: int) -> str:
+    """Later turns carry more history, so latency is reported per stretch of the intake."""
+    if turn_number <= 8:
+        return "turns 1-8"
+    if turn_number <= 16:
+        return "turns 9-16"
+    return "turns 17+"
+
+
+class LoadRun:
+    """Drives the applicants and collects latencies and saturation samples."""
+
+    def __init__(
+        self,
+        base_url: str,
+        applicants: int,
+        intakes: int,
+        think_time: Latency,
+        max_turns: int,
+        timeout: float,
+        watsonx: Optional[FakeWatsonx] = None,
+        metrics_token: Optional[str] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.applicants = applicants
+        self.intakes = intakes
+        self.think_time = think_time
+        self.max_turns = max_turns
+        self.timeout = timeout
+        self.watsonx = watsonx
+        self.metrics_token = metrics_token
+
+        self.latencies: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+        self.errors: Dict[str, int] = {}
+        self.completed = 0
+        self.abandoned = 0
+        self.turns = 0
+        self.in_flight = 0
+        self.samples: List[Dict[str, int]] = []
+        self.final_locks: Dict[str, float] = {}
+        self._next_intake = 0
+
+    def _error(self, label: str) -> None:
+        self.errors[label] = self.errors.get(label, 0) + 1
+
+    async def _post(self, client: httpx.AsyncClient, path: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        self.in_flight += 1
+        try:
+            return await client.post(f"{self.base_url}{path}", json=payload, headers=headers)
+        except httpx.HTTPError as e:
+            self._error(type(e).__name__)
+            return None
+        finally:
+            self.in_flight -= 1
+
+    async def _intake(self, client: httpx.AsyncClient) -> None:
+        started = time.perf_counter()
+        response = await self._post(client, "/api/chatbot/conversations/", {})
+        if response is None or response.status_code != 201:
+            if response is not None:
+                self._error(f"create HTTP {response.status_code}")
+            self.abandoned += 1
+            return
+        self.latencies[PHASE_CREATE].append(time.perf_counter() - started)
+        conversation_id = response.json()["id"]
+
+        for turn_number in range(1, self.max_turns + 1):
+            answer = APPLICANT_ANSWERS[min(turn_number - 1, len(APPLICANT_ANSWERS) - 1)]
+            await asyncio.sleep(self.think_time.sample())
+            started = time.perf_counter()
+            response = await self._post(
+                client,
+                f"/api/chatbot/conversations/{conversation_id}/send_message/",
+                {"message": answer},
+                headers={"Idempotency-Key": str(uuid.uuid4())},
+            )
+            elapsed = time.perf_counter() - started
+            if response is None or response.status_code != 200:
+                if response is not None:
+                    self._error(f"send_message HTTP {response.status_code}")
+                self.abandoned += 1
+                return
+            self.turns += 1
+            if response.json().get("is_complete"):
+                self.latencies[PHASE_COMPLETE].append(elapsed)
+                self.completed += 1
+                return
+            self.latencies[turn_phase(turn_number)].append(elapsed)
+
+        self._error(f"not complete after {self.max_turns} turns")
+        self.abandoned += 1
+
+    async def _applicant(self, client: httpx.AsyncClient) -> None:
+        while self._next_intake < self.intakes:
+            self._next_intake += 1
+            await self._intake(client)
+
+    async def _lock_metrics(self, client: httpx.AsyncClient) -> Dict[str, float]:
+        """Conversation lock series scraped from /metrics ({} without a token)."""
+        if not self.metrics_token:
+            return {}
+        try:
+            response = await client.get(
+                f"{self.base_url}/metrics", headers={"Authorization": f"Bearer {self.metrics_token}"}, timeout=5
+            )
+        except httpx.HTTPError:
+            return {}
+        if response.status_code != 200:
+            return {}
+        return parse_lock_metrics(response.text)
+
+    async def _sample_saturation(self, client: httpx.AsyncClient) -> None:
+        while True:
+            locks = await self._lock_metrics(client)
+            self.samples.append({
+                "client_in_flight": self.in_flight,
+                "watsonx_in_flight": self.watsonx.stats.in_flight if self.watsonx else 0,
+                "queued_turns": int(locks.get("queued_turns", 0)),
+            })
+            await asyncio.sleep(SATURATION_INTERVAL)
+
+    async def run(self) -> float:
+        limits = httpx.Limits(max_connections=self.applicants + 2, max_keepalive_connections=self.applicants + 2)
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout) as client:
+            sampler = asyncio.create_task(self._sample_saturation(client))
+            started = time.perf_counter()
+            await asyncio.gather(*(self._applicant(client) for _ in range(self.applicants)))
+            elapsed = time.perf_counter() - started
+            sampler.cancel()
+            self.final_locks = await self._lock_metrics(client)
+        return elapsed
+
+
+# Prometheus series -> key in the lock summary
+LOCK_SERIES = {
+    "claimit_conversation_turns_queued": "queued_turns",
+    'claimit_conversation_lock_acquisitions_total{contended="false"}': "uncontended_acquisitions",
+    'claimit_conversation_lock_acquisitions_total{contended="true"}': "contended_acquisitions",
+    "claimit_conversation_lock_wait_seconds_sum": "wait_seconds_total",
+}
+
+
+def parse_lock_metrics(text: str) -> Dict[str, float]:
+    """Pick the conversation lock series out of a /metrics scrape."""
+    locks: Dict[str, float] = {}
+    for line in text.splitlines():
+        series, _, value = line.rpartition(" ")
+        if series in LOCK_SERIES:
+            locks[LOCK_SERIES[series]] = float(value)
+    return locks
+
+
+# ============================================
+# SERVER UNDER TEST
+# ============================================
+
+def start_backend(
+    args: argparse.Namespace, watsonx: FakeWatsonx, postgrest: FakePostgrest, workdir: str, metrics_token: str
+) -> subprocess.Popen:
+    """Migrate a throwaway database and start the backend pointed at the fakes."""
+    env = dict(
+        os.environ,
+        WATSON_URL=watsonx.url,
+        WATSON_IAM_URL=watsonx.iam_url,
+        WATSON_API_KEY="benchmark",
+        WATSON_ASSISTANT_ID="benchmark",
+        SUPABASE_URL=postgrest.url,
+        SUPABASE_ANON_KEY=FAKE_ANON_KEY,
+        SUPABASE_DB_HOST="",
+        SQLITE_PATH=os.path.join(workdir, "benchmark.sqlite3"),
+        ASYNC_VIEWS="false" if args.sync_views else "true",
+        METRICS_TOKEN=metrics_token,
+        PYTHONUNBUFFERED="1",
+    )
+    log = open(os.path.join(workdir, "server.log"), "w")
+    subprocess.run([sys.executable, "manage.py", "migrate", "--noinput"], cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT, check=True)
+
+    command = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{args.port}", "--workers", str(args.workers), "--timeout", "300"]
+    if args.sync_views:
+        command += ["-k", "gthread", "--threads", str(args.threads), "backend.wsgi:application"]
+    else:
+        command += ["-k", "uvicorn_worker.UvicornWorker", "backend.asgi:application"]
+    return subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(base_url: str, process: Optional[subprocess.Popen], timeout: float = 60) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            return False
+        try:
+            if httpx.get(f"{base_url}/healthz/", timeout=2).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+# ============================================
+# REPORT
+# ============================================
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:,.0f}"
+
+
+def print_report(run: LoadRun, elapsed: float, capacity: Optional[int], postgrest: Optional[FakePostgrest]) -> None:
+    print("\n" + "="*72)
+    print(f"📊 LOAD TEST RESULTS ({run.applicants} concurrent applicants, {elapsed:.1f}s)")
+    print("="*72)
+    print(f"   Intakes completed: {run.completed}/{run.intakes} ({run.abandoned} abandoned)")
+    print(f"   Throughput:        {run.turns / elapsed:.2f} turns/s, {run.completed / elapsed * 60:.1f} intakes/min")
+
+    print(f"\n⏱️ Latency per phase (ms)")
+    print(f"   {'phase':<22}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for phase in PHASES:
+        stats = summarize(run.latencies[phase])
+        print(f"   {phase:<22}{stats['count']:>7}{_ms(stats['p50']):>9}{_ms(stats['p95']):>9}{_ms(stats['p99']):>9}{_ms(stats['max']):>9}")
+
+    if run.errors:
+        print(f"\n❌ Errors")
+        for label, count in sorted(run.errors.items(), key=lambda item: -item[1]):
+            print(f"   - {label}: {count}")
+
+    print(f"\n🔥 Saturation")
+    samples = run.samples or [{"client_in_flight": 0, "watsonx_in_flight": 0, "queued_turns": 0}]
+    in_flight = [sample["client_in_flight"] for sample in samples]
+    mean_in_flight = sum(in_flight) / len(in_flight)
+    print(f"   Requests in flight at server: mean {mean_in_flight:.1f}, peak {max(in_flight)}")
+    if capacity:
+        saturated = sum(1 for value in in_flight if value >= capacity) / len(in_flight)
+        print(f"   Worker utilisation:           {min(mean_in_flight / capacity, 1):.0%} of {capacity} threads, saturated {saturated:.0%} of the time")
+    else:
+        print(f"   Worker utilisation:           async workers (bounded by WATSON_ASYNC_MAX_CONNECTIONS, not threads)")
+
+    if run.watsonx is not None:
+        watsonx = run.watsonx.stats.snapshot()
+        upstream = [sample["watsonx_in_flight"] for sample in samples]
+        print(f"   watsonx calls in flight:      mean {sum(upstream) / len(upstream):.1f}, peak {watsonx['peak_in_flight']}")
+        turn_seconds = sum(sum(run.latencies[phase]) for phase in PHASES if phase != PHASE_CREATE)
+        if run.turns:
+            calls = {kind: count for kind, count in watsonx["requests"].items() if kind != "iam_token"}
+            per_turn = ", ".join(f"{kind} {count / run.turns:.2f}" for kind, count in sorted(calls.items()))
+            outside = max(turn_seconds - watsonx["busy_seconds"], 0) / run.turns
+            print(f"   watsonx calls per turn:       {per_turn}")
+            print(f"   Time per turn outside watsonx: {_ms(outside)} ms (queueing, DB, Supabase, app code)")
+        if watsonx["failures"]:
+            print(f"   Injected watsonx failures:    {watsonx['failures']}")
+
+    locks = run.final_locks
+    if locks:
+        contended = int(locks.get("contended_acquisitions", 0))
+        acquisitions = contended + int(locks.get("uncontended_acquisitions", 0))
+        wait_avg = locks.get("wait_seconds_total", 0) / contended if contended else 0.0
+        queued = max(sample["queued_turns"] for sample in samples)
+        print(
+            f"   Conversation locks:           {contended}/{acquisitions} contended, "
+            f"wait avg {_ms(wait_avg)} ms, peak queue {queued}"
+        )
+
+    if postgrest is not None:
+        rest = postgrest.stats.snapshot()
+        print(f"\n🗄️ Supabase (fake PostgREST): {rest['total_requests']} requests, {rest['bytes_in'] / 1024:,.0f} KiB received")
+        for kind, count in sorted(rest["requests"].items()):
+            print(f"   - {kind}: {count}")
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate concurrent applicants walking a full intake")
+    parser.add_argument('--applicants', type=int, default=20, help="Concurrent applicants")
+    parser.add_argument('--intakes', type=int, help="Total intakes to run (default: one per applicant)")
+    parser.add_argument('--think-time', default='fixed:0', help="Pause before each answer, e.g. lognormal:3000:0.5")
+    parser.add_argument('--max-turns', type=int, default=40, help="Give up on an intake after this many turns")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument('--base-url', help="Benchmark an already running backend instead of starting one")
+    parser.add_argument('--metrics-token', default=os.getenv('METRICS_TOKEN'), help="METRICS_TOKEN of the --base-url backend, for lock contention")
+    server = parser.add_argument_group("server under test (unless --base-url)")
+    server.add_argument('--port', type=int, default=8765)
+    server.add_argument('--workers', type=int, default=1, help="gunicorn workers; intake state is per process, so keep 1 unless sessions are sticky")
+    server.add_argument('--sync-views', action='store_true', help="Serve the sync views over WSGI (gthread) instead of ASGI")
+    server.add_argument('--threads', type=int, default=8, help="Threads per worker with --sync-views")
+    fakes = parser.add_argument_group("fake upstreams (unless --base-url)")
+    fakes.add_argument('--watson-latency', default='lognormal:600:0.4', help="watsonx time to first token")
+    fakes.add_argument('--tokens-per-second', type=float, default=80.0)
+    fakes.add_argument('--failure-rate', type=float, default=0.0, help="Share of watsonx chat calls that fail")
+    fakes.add_argument('--failure-status', type=int, default=503)
+    fakes.add_argument('--supabase-latency', default='fixed:15', help="Fake PostgREST per-request latency")
+    fakes.add_argument('--seed', type=int, help="Seed the fakes' random latencies and failures")
+    args = parser.parse_args()
+
+    watsonx: Optional[FakeWatsonx] = None
+    postgrest: Optional[FakePostgrest] = None
+    process: Optional[subprocess.Popen] = None
+    capacity: Optional[int] = None
+    workdir = tempfile.mkdtemp(prefix="claimit-bench-")
+
+    metrics_token = args.metrics_token
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        watsonx = FakeWatsonx(
+            latency=Latency.parse(args.watson_latency, args.seed),
+            tokens_per_second=args.tokens_per_second,
+            failure_rate=args.failure_rate,
+            failure_status=args.failure_status,
+            seed=args.seed,
+        ).start()
+        postgrest = FakePostgrest(latency=Latency.parse(args.supabase_latency, args.seed)).start()
+        print(f"🤖 Fake watsonx at {watsonx.url} ({watsonx.latency}, {args.tokens_per_second:g} tokens/s)")
+        print(f"🗄️ Fake PostgREST at {postgrest.url} ({postgrest.latency})")
+        metrics_token = secrets.token_urlsafe(16)
+        process = start_backend(args, watsonx, postgrest, workdir, metrics_token)
+        base_url = f"http://127.0.0.1:{args.port}"
+        if args.sync_views:
+            capacity = args.workers * args.threads
+
+    print(f"🚀 Waiting for backend at {base_url}...")
+    try:
+        if not wait_until_ready(base_url, process):
+            print(f"❌ Backend did not become ready; see {os.path.join(workdir, 'server.log')}")
+            sys.exit(1)
+
+        run = LoadRun(
+            base_url,
+            applicants=args.applicants,
+            intakes=args.intakes or args.applicants,
+            think_time=Latency.parse(args.think_time, args.seed),
+            max_turns=args.max_turns,
+            timeout=args.timeout,
+            watsonx=watsonx,
+            metrics_token=metrics_token,
+        )
+        print(f"👥 Running {run.intakes} intakes with {run.applicants} concurrent applicants...")
+        elapsed = asyncio.run(run.run())
+        print_report(run, elapsed, capacity, postgrest)
+        if process is not None:
+            print(f"📝 Server log: {os.path.join(workdir, 'server.log')}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        for service in (watsonx, postgrest):
+            if service is not None:
+                service.stop()
+
+
+if __name__ == "__main__":
+    main()
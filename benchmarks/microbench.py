@@ -0,0 +1,230 @@
+"""
+Microbenchmarks for the pure helpers on every intake turn
+Times the text and normalization helpers that run on each applicant message
+or model reply, with no Watson calls and no database: reply cleanup, the
+one-question rule, topic counting, urgency scoring, the CaseSubmission
+normalizers and WatsonAssistantSimple's value parsing. Corpora are built
+from the scripted applicant (load_intake) and the fake watsonx fixtures:
+short answers, "mega answers" covering many intake topics at once, and long
+model replies with several questions and role contamination.
+
+Results are ops/sec (helper calls per second, best of --repeat runs). Keep
+the report of each release and compare the next one against it:
+
+    python -m benchmarks.microbench --report reports/micro-new.json \\
+        --compare reports/micro-old.json --max-regression 10
+
+Exits 1 if any benchmark got slower than --max-regression percent. Only
+compare reports taken on the same machine and Python version, and keep the
+threshold above the run-to-run noise (check by comparing a build with
+itself; shared CI runners can vary by 10-20%).
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import django
+
+# Setup Django (the CaseSubmission normalizers live in chatbot.views)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Nothing is sent anywhere, but the assistants insist on credentials
+for _name in ("WATSON_URL", "WATSON_API_KEY", "WATSON_ASSISTANT_ID"):
+    os.environ.setdefault(_name, "microbench")
+django.setup()
+
+from benchmarks.fake_watsonx import ACKNOWLEDGEMENTS, EXTRACTION_RECORD, INTAKE_QUESTIONS, SUMMARY_RECORD
+from benchmarks.load_intake import APPLICANT_ANSWERS
+
+# (benchmark name, helper, argument tuples it is called with)
+Benchmark = Tuple[str, Callable[..., Any], List[Tuple[Any, ...]]]
+
+# ============================================
+# CORPORA
+# ============================================
+
+SHORT_ANSWERS: List[str] = list(APPLICANT_ANSWERS)
+
+# Applicants who answer most of the intake in one message
+MEGA_ANSWERS: List[str] = [
+    "Hi, my name is Maria Lopez, I'm 34 years old and my cell is (510) 555-0134. There are three people "
+    "in my household, me and my two kids. I work part time as a cashier and make about $1,850 a month. "
+    "We rent an apartment for $1,450 and I got a late rent notice last week, so it's urgent.",
+    "I'm James, born in 1961, disabled since my accident and I can't work anymore. I get about $900 a month "
+    "in disability benefits and Medicaid covers my doctor visits but not my prescriptions. I'm a US citizen "
+    "and I've been struggling to keep up with the mortgage on my house.",
+    "My wife and I have a daughter and a son. I'm unemployed, looking for work since March, and we're receiving "
+    "unemployment benefits of $1,200 monthly plus SNAP. No health insurance right now. Email me at "
+    "dan.k@example.com. We're behind on rent and really need help before the end of the month.",
+    "Household of five, two adults and three kids. My husband is working at a warehouse and earns around $3,100 "
+    "a month, I stay home with the baby. We own a small house but the PG&E bill is overdue and they sent an "
+    "emergency shutoff notice. We are permanent residents, not citizens yet, and we don't get any assistance.",
+]
+
+ROLE_CONTAMINATION = "User: my name is Maria\nAssistant: Thank you!\n\"My name is Maria Lopez.\"\n"
+
+
+def long_replies() -> List[str]:
+    """Model replies as they arrive: acknowledgement, question, often a second question or echoed roles."""
+    replies = []
+    for index, question in enumerate(INTAKE_QUESTIONS):
+        acknowledgement = ACKNOWLEDGEMENTS[index % len(ACKNOWLEDGEMENTS)]
+        following = INTAKE_QUESTIONS[(index + 1) % len(INTAKE_QUESTIONS)]
+        replies.append(f"{acknowledgement} {question}")
+        replies.append(f"{acknowledgement} {question} Also, {following[0].lower()}{following[1:]}")
+        replies.append(f"{ROLE_CONTAMINATION}{acknowledgement}\n\n{question}")
+    replies.append(f"{SUMMARY_RECORD['summary']}\n\n{SUMMARY_RECORD['actions']}\n\n{INTAKE_QUESTIONS[-1]}")
+    return replies
+
+
+def extractions() -> List[Dict[str, Any]]:
+    """A full extraction, a sparse early-intake one and one with every urgency flag set."""
+    sparse = {"personal": {"full_name": "Maria Lopez"}, "household": {"size": 3}}
+    urgent = json.loads(json.dumps(EXTRACTION_RECORD))
+    urgent["housing"].update(status="homeless", at_risk_of_homelessness=True)
+    urgent["financial"]["monthly_income"] = 0
+    urgent["health"].update(has_disability=True, has_insurance=False)
+    return [EXTRACTION_RECORD, sparse, urgent, {}]
+
+
+# Raw values as the model returns them for CaseSubmission columns
+RAW_VALUES: List[Any] = [
+    None, "null", "", "  Maria Lopez  ", "NULL", 1850, 34.0, True,
+    ["SNAP"], '["Medi-Cal", "CalWORKs"]', "SNAP", "None", '"SNAP"',
+    {"rent": 1450}, '{"rent": 1450, "utilities": 160}', "not json", "[broken",
+    EXTRACTION_RECORD["financial"]["income_sources"], EXTRACTION_RECORD["emergency"]["details"],
+]
+
+# (field, value) pairs as WatsonAssistantSimple receives them
+SIMPLE_UPDATES: List[Tuple[str, Any]] = [
+    ("name", "  Maria Lopez "), ("household_size", "3"), ("household_size", "three people"),
+    ("monthly_income", "$1,850"), ("monthly_income", "about 1.2k a month"), ("monthly_income", 2400),
+    ("age", "34"), ("age", 61.6), ("assets", "$400"), ("assets", "none"),
+    ("is_employed", "yes"), ("is_employed", "No"), ("has_children", True), ("has_disability", 0),
+    ("has_health_insurance", "maybe"), ("citizenship_status", "US citizen"), ("housing_costs", ""),
+    ("utility_costs", None),
+]
+
+AMOUNTS: List[Any] = [value for field, value in SIMPLE_UPDATES if field in {"monthly_income", "assets", "age", "household_size"}]
+
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def build_benchmarks() -> List[Benchmark]:
+    from app.Backend.watson import WatsonAssistantSimple
+    from app.Backend.watson_intake import WatsonIntakeAssistant
+    from chatbot.views import safe_dict, safe_list, safe_str
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        intake = WatsonIntakeAssistant()
+        simple = WatsonAssistantSimple()
+
+    replies = [(reply,) for reply in long_replies()]
+    raw_values = [(value,) for value in RAW_VALUES]
+    return [
+        ("clean_response/long_replies", intake._clean_response, replies),
+        ("enforce_single_question/long_replies", intake._enforce_single_question, replies),
+        ("count_topics/short_answers", intake._count_topics_in_response, [(answer,) for answer in SHORT_ANSWERS]),
+        ("count_topics/mega_answers", intake._count_topics_in_response, [(answer,) for answer in MEGA_ANSWERS]),
+        ("calculate_urgency_score/extractions", intake._calculate_urgency_score, [(data,) for data in extractions()]),
+        ("safe_str/raw_values", safe_str, raw_values),
+        ("safe_list/raw_values", safe_list, raw_values),
+        ("safe_dict/raw_values", safe_dict, raw_values),
+        ("simple_normalize_value/updates", simple._normalize_value, SIMPLE_UPDATES),
+        ("simple_parse_float/amounts", simple._parse_float, [(amount,) for amount in AMOUNTS]),
+    ]
+
+
+def measure(function: Callable[..., Any], calls: List[Tuple[Any, ...]], repeat: int) -> Dict[str, Any]:
+    """Helper calls per second over the whole corpus, best of ``repeat`` runs of at least 0.2s."""
+    def run_corpus() -> None:
+        for args in calls:
+            function(*args)
+
+    timer = timeit.Timer(run_corpus)
+    loops, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=loops))
+    return {
+        "ops_per_sec": round(len(calls) * loops / best, 1),
+        "corpus_size": len(calls),
+        "loops": loops,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], max_regression: Optional[float], only: Optional[str] = None
+) -> bool:
+    """Print ops/sec deltas; False if any benchmark slowed down more than ``max_regression`` percent."""
+    print(f"\n📈 Compared with {baseline.get('label') or 'baseline'} (ops/sec, higher is better)")
+    if baseline.get("python") != current["python"] or baseline.get("machine") != current["machine"]:
+        print("   ⚠️ The reports come from different machines or Python versions; deltas are not comparable")
+    ok = True
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name, {}).get("ops_per_sec")
+        new = result["ops_per_sec"]
+        if not old:
+            print(f"   {name:<38}{'new':>14} → {new:>14,.0f}")
+            continue
+        change = (new - old) / old * 100
+        flag = ""
+        if max_regression is not None and -change > max_regression:
+            flag = "  ❌ regression"
+            ok = False
+        print(f"   {name:<38}{old:>14,.0f} → {new:>14,.0f}  ({change:+.1f}%){flag}")
+    for name in sorted(baseline["results"].keys() - current["results"].keys()):
+        if only and only not in name:
+            continue
+        print(f"   {name:<38}  ⚠️ missing from this run")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmark the pure intake helpers")
+    parser.add_argument('--only', help="Run benchmarks whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per benchmark; the best counts")
+    parser.add_argument('--report', help="Write the results as JSON")
+    parser.add_argument('--label', help="Name for this run in reports (e.g. a release tag)")
+    parser.add_argument('--compare', help="Earlier report to compare against")
+    parser.add_argument('--max-regression', type=float, help="Exit 1 if any benchmark loses more than this percent of ops/sec")
+    args = parser.parse_args()
+
+    # The one-question rule logs a warning per truncation; keep the timings about the helpers
+    logging.disable(logging.WARNING)
+
+    benchmarks = [b for b in build_benchmarks() if not args.only or args.only in b[0]]
+    print(f"⏱️ Running {len(benchmarks)} microbenchmarks (best of {args.repeat})")
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, function, calls in benchmarks:
+        results[name] = measure(function, calls, args.repeat)
+        print(f"   {name:<38}{results[name]['ops_per_sec']:>14,.0f} ops/sec  ({len(calls)} inputs)")
+
+    report = {
+        "label": args.label,
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.report}")
+
+    ok = True
+    if args.compare:
+        with open(args.compare) as f:
+            ok = compare(report, json.load(f), args.max_regression, args.only)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
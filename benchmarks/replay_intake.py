@@ -0,0 +1,163 @@
+"""
+Deterministic intake benchmark on recorded Watson calls
+Walks the scripted applicant from load_intake through WatsonIntakeAssistant
+directly (no HTTP, no database) with a cassette (app/Backend/cassettes.py),
+then reports per conversation: Watson calls, prompt/completion tokens,
+turns and wall time.
+
+Record once against watsonx, or against the fake
+(WATSON_URL / WATSON_IAM_URL from benchmarks.fake_watsonx):
+
+    python -m benchmarks.replay_intake --record benchmarks/cassettes/intake.json.gz
+
+Replay on every release and compare with the previous release's report:
+
+    python -m benchmarks.replay_intake --replay benchmarks/cassettes/intake.json.gz \\
+        --report reports/intake-new.json --compare reports/intake-old.json
+
+Without --latency replay is instant, so wall time is the backend's own
+overhead per conversation; with it, recorded response times are replayed.
+A cassette miss means the prompt pipeline changed and must be re-recorded.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.Backend.cassettes import MODE_RECORD, MODE_REPLAY, Cassette
+from benchmarks.load_intake import APPLICANT_ANSWERS
+
+# Totals compared between reports; higher is worse for all of them
+COMPARED = ("calls", "prompt_tokens", "completion_tokens", "turns", "wall_seconds")
+
+
+def run_conversation(assistant, cassette: Cassette, max_turns: int) -> Dict[str, Any]:
+    conversation_id = str(uuid.uuid4())
+    before = dict(cassette.stats)
+    started = time.perf_counter()
+    turns = 0
+    completed = False
+    for answer in (APPLICANT_ANSWERS * 2)[:max_turns]:
+        result = assistant.send_message(conversation_id, answer)
+        turns += 1
+        if result["is_complete"]:
+            assistant.generate_case_summary(conversation_id)
+            completed = True
+            break
+    wall_seconds = time.perf_counter() - started
+    assistant.conversations.pop(conversation_id, None)
+    return {
+        "turns": turns,
+        "completed": completed,
+        "calls": cassette.stats["calls"] - before["calls"],
+        "misses": cassette.stats["misses"] - before["misses"],
+        "prompt_tokens": cassette.stats["prompt_tokens"] - before["prompt_tokens"],
+        "completion_tokens": cassette.stats["completion_tokens"] - before["completion_tokens"],
+        "recorded_seconds": round(cassette.stats["recorded_seconds"] - before["recorded_seconds"], 3),
+        "wall_seconds": round(wall_seconds, 4),
+    }
+
+
+def totals(conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-conversation means, so runs with different --conversations compare."""
+    count = max(len(conversations), 1)
+    summary = {name: round(sum(c[name] for c in conversations) / count, 4) for name in COMPARED}
+    summary["completed"] = sum(1 for c in conversations if c["completed"])
+    summary["misses"] = sum(c["misses"] for c in conversations)
+    return summary
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """Print deltas per conversation; False if anything regressed past ``max_regression`` percent."""
+    print(f"\n📈 Compared with {baseline.get('label') or 'baseline'} (per conversation)")
+    if baseline.get("playback_latency") != current["playback_latency"]:
+        print("   ⚠️ Only one of the runs replayed recorded latency; wall times are not comparable")
+    ok = True
+    for name in COMPARED:
+        old, new = baseline["totals"].get(name, 0), current["totals"][name]
+        change = (new - old) / old * 100 if old else 0.0
+        flag = ""
+        if max_regression is not None and change > max_regression:
+            flag = "  ❌ regression"
+            ok = False
+        print(f"   {name:<18}{old:>12,.2f} → {new:>12,.2f}  ({change:+.1f}%){flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the intake pipeline on recorded Watson calls")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--record', metavar='CASSETTE', help="Call watsonx and record a cassette")
+    mode.add_argument('--replay', metavar='CASSETTE', help="Serve Watson calls from a cassette")
+    parser.add_argument('--latency', action='store_true', help="Replay recorded response times")
+    parser.add_argument('--conversations', type=int, default=3, help="Scripted conversations to run")
+    parser.add_argument('--max-turns', type=int, default=40)
+    parser.add_argument('--report', help="Write the results as JSON")
+    parser.add_argument('--label', help="Name for this run in reports (e.g. a release tag)")
+    parser.add_argument('--compare', help="Earlier report to compare against")
+    parser.add_argument('--max-regression', type=float, help="Exit 1 if any compared value grows more than this percent")
+    parser.add_argument('--verbose', action='store_true', help="Show the assistant's own logging")
+    args = parser.parse_args()
+
+    if args.replay:
+        # Nothing is sent anywhere on replay, but the assistant insists on credentials
+        for name in ("WATSON_URL", "WATSON_API_KEY", "WATSON_ASSISTANT_ID"):
+            os.environ.setdefault(name, "replay")
+    os.environ.pop("WATSON_CASSETTE", None)
+
+    from app.Backend.watson_intake import WatsonIntakeAssistant
+
+    path = args.record or args.replay
+    cassette = Cassette(path, MODE_RECORD if args.record else MODE_REPLAY, playback_latency=args.latency)
+    assistant = WatsonIntakeAssistant()
+    assistant.cassette = cassette
+
+    print(f"📼 {'Recording' if args.record else 'Replaying'} {args.conversations} scripted conversations ({path})")
+    conversations = []
+    for index in range(args.conversations):
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            result = run_conversation(assistant, cassette, args.max_turns)
+        conversations.append(result)
+        print(
+            f"   {index + 1}. {'✅' if result['completed'] else '⚠️'} {result['turns']} turns, {result['calls']} calls, "
+            f"{result['prompt_tokens']:,} prompt + {result['completion_tokens']:,} completion tokens, "
+            f"{result['wall_seconds']:.2f}s"
+            + (f", {result['misses']} cassette misses" if result["misses"] else "")
+        )
+
+    if args.record:
+        cassette.save()
+        print(f"💾 Saved {len(cassette.interactions)} interactions to {path}")
+
+    report = {
+        "label": args.label,
+        "cassette": path,
+        "mode": MODE_RECORD if args.record else MODE_REPLAY,
+        "playback_latency": args.latency,
+        "conversations": conversations,
+        "totals": totals(conversations),
+        "generation_stats": assistant.generation_stats,
+        "extraction_stats": assistant.extraction_stats,
+    }
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.report}")
+
+    ok = report["totals"]["misses"] == 0
+    if not ok:
+        print(f"❌ {report['totals']['misses']} requests were not in the cassette; the prompt pipeline changed, re-record it")
+    if args.compare:
+        with open(args.compare) as f:
+            ok = compare(report, json.load(f), args.max_regression) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
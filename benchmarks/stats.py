@@ -0,0 +1,79 @@
+"""
+Counters and percentiles shared by the fake services and the load driver
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """count / p50 / p95 / p99 / max of a latency sample, in seconds."""
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+class ServiceStats:
+    """Thread-safe request counters for one fake service."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.failures = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.busy_seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @contextmanager
+    def track(self, kind: str) -> Iterator[None]:
+        """Count one request of ``kind`` and the time it was in flight."""
+        started = time.perf_counter()
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.busy_seconds += time.perf_counter() - started
+
+    def add_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def add_bytes(self, received: int = 0, sent: int = 0) -> None:
+        with self._lock:
+            self.bytes_in += received
+            self.bytes_out += sent
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "failures": self.failures,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
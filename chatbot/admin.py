@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message, CaseSubmission
+from .models import Conversation, Message, CaseSubmission, ChatTurn
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
@@ -64,3 +64,11 @@ class CaseSubmissionAdmin(admin.ModelAdmin):
     def programs_preview(self, obj):
         return ', '.join(obj.recommended_programs) if obj.recommended_programs else 'None'
     programs_preview.short_description = 'Recommended Programs'
+
+@admin.register(ChatTurn)
+class ChatTurnAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation', 'status', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['id', 'conversation__id']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'result', 'error']
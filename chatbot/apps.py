@@ -8,6 +8,12 @@ class ChatbotConfig(AppConfig):
     def ready(self):
         """Run startup checks when Django app is ready"""
         import os
+        from django.db.backends.signals import connection_created
+        from app.Backend.structured_logging import configure_logging
+        from .middleware import install_query_tracing
+        configure_logging()
+        connection_created.connect(install_query_tracing, dispatch_uid='chatbot.query_tracing')
+
         # Only test connection in production or when explicitly enabled
         if os.getenv('DJANGO_SETTINGS_MODULE') == 'backend.settings_production' or os.getenv('TEST_SUPABASE_ON_STARTUP'):
             from .supabase_sync import test_supabase_connection
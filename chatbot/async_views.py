@@ -0,0 +1,458 @@
+"""
+Async (ASGI) variants of the chat and dashboard endpoints
+Same request/response contract as the DRF views in views.py, but Watson and
+Supabase round-trips are awaited on the event loop instead of holding a
+worker thread, so one process can carry hundreds of in-flight intakes.
+Routed instead of the sync views when settings.ASYNC_VIEWS is on.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import check_password
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from app.Backend.token_usage import rollup as token_usage_rollup
+
+from . import dashboard_queries
+from .models import Conversation, CaseSubmission, ChatTurn
+from .serializers import ConversationSerializer
+from .supabase_sync import get_async_supabase_client, sync_turn_to_supabase_async
+from .turns import aexecute_turn, await_turn, claim_turn, find_idempotent_turn, turn_payload, wait_seconds
+from .unit_of_work import TurnUnitOfWork
+from .views import (
+    INTAKE_COMPLETE_RESPONSE,
+    build_case_submission,
+    enqueue_turn_response,
+    existing_turn_response,
+    get_turn_pool,
+    get_watson_instance,
+    idempotency_key,
+    replayed_turn_response,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _error(message: str, status: int) -> JsonResponse:
+    return JsonResponse({'error': message}, status=status)
+
+
+def _method_not_allowed(request) -> JsonResponse:
+    return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+
+def _json_body(request) -> Dict[str, Any]:
+    if not request.body:
+        return {}
+    try:
+        data = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _supabase_or_error():
+    supabase = await get_async_supabase_client()
+    if not supabase:
+        return None, _error('Database connection unavailable', 503)
+    return supabase, None
+
+
+def _serialize_conversation(conversation: Conversation) -> Dict[str, Any]:
+    return ConversationSerializer(conversation).data
+
+
+async def aprocess_user_message(conversation: Conversation, user_message: str) -> Dict[str, Any]:
+    """Async counterpart of views.process_user_message()."""
+    turn = TurnUnitOfWork(conversation)
+    turn.add_message('user', user_message)
+    turn.after_commit(sync_turn_to_supabase_async)
+
+    watson = get_watson_instance()
+    if watson:
+        try:
+            result = await watson.asend_message(str(conversation.id), user_message)
+
+            assistant_message = result.get('watson_response', 'I understand.')
+            is_complete = result.get('is_complete', False)
+            questions_asked = result.get('questions_asked', 0)
+
+            # Update conversation status
+            turn.update_conversation(is_complete=is_complete)
+
+            # If complete, generate case submission
+            if is_complete and not await CaseSubmission.objects.filter(conversation=conversation).aexists():
+                logger.info("📝 Creating case submission for conversation %s", conversation.id)
+                summary_data = await watson.agenerate_case_summary(str(conversation.id))
+                turn.add_case_submission(build_case_submission(conversation, summary_data))
+
+        except Exception as e:
+            logger.error("❌ Watson error: %s", e, exc_info=True)
+            assistant_message = "I'm having trouble processing that. Could you please try again?"
+            is_complete = False
+            questions_asked = 0
+    else:
+        assistant_message = "Watson assistant is not available. Please check configuration."
+        is_complete = False
+        questions_asked = 0
+
+    turn.add_message('assistant', assistant_message)
+    await turn.acommit()
+    if turn.case_submission:
+        logger.info("✅ Case submission created: %s (urgency %s/10)", turn.case_submission.id, turn.case_submission.urgency_score)
+
+    return {
+        'is_complete': is_complete,
+        'questions_asked': questions_asked,
+        'latest_message': assistant_message,
+    }
+
+
+async def _replay_turn(turn: ChatTurn, user_message: str) -> JsonResponse:
+    """Wait for a duplicate request's original turn, then answer with its reply."""
+    if turn.message == user_message:
+        turn = await await_turn(turn, settings.CHAT_TURN_MAX_WAIT)
+    payload, status = await sync_to_async(replayed_turn_response)(turn, user_message)
+    return JsonResponse(payload, status=status, headers={'Idempotent-Replayed': 'true'})
+
+
+@csrf_exempt
+async def send_message(request, pk):
+    """
+    Send a message in a conversation and continue intake process.
+    Returns AI response + current progress.
+    Retries carrying the same Idempotency-Key join or replay the first attempt.
+    """
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+
+    try:
+        conversation = await Conversation.objects.aget(pk=pk)
+    except (Conversation.DoesNotExist, ValidationError):
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    user_message = _json_body(request).get('message', '')
+    if not user_message:
+        return _error('Message is required', 400)
+
+    key, key_error = idempotency_key(request)
+    if key_error:
+        return _error(key_error, 400)
+
+    # A retried request joins (or replays) the turn its first attempt started
+    turn = await sync_to_async(find_idempotent_turn)(conversation, key) if key else None
+    if turn:
+        return await _replay_turn(turn, user_message)
+
+    # CRITICAL: If conversation is already complete, don't process new messages
+    if conversation.is_complete:
+        return JsonResponse(INTAKE_COMPLETE_RESPONSE)
+
+    if key:
+        turn, created = await sync_to_async(claim_turn)(conversation, user_message, key, ChatTurn.RUNNING)
+        if not created:
+            return await _replay_turn(turn, user_message)
+        turn = await aexecute_turn(turn, aprocess_user_message)
+        if turn.status == ChatTurn.FAILED:
+            return _error('Failed to process message', 500)
+        reply = turn.result
+    else:
+        reply = await aprocess_user_message(conversation, user_message)
+
+    # Return response with progress info
+    response_data = await sync_to_async(_serialize_conversation)(conversation)
+    response_data.update(reply)
+
+    return JsonResponse(response_data)
+
+
+@csrf_exempt
+async def enqueue_turn(request, pk):
+    """
+    Queue a message for processing and return 202 with a turn id right away.
+    Poll GET /turns/<turn_id>/?wait=<seconds> for the reply.
+    Re-posting with the same Idempotency-Key returns the existing turn.
+    """
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+
+    try:
+        conversation = await Conversation.objects.aget(pk=pk)
+    except (Conversation.DoesNotExist, ValidationError):
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    user_message = _json_body(request).get('message', '')
+    if not user_message:
+        return _error('Message is required', 400)
+
+    key, key_error = idempotency_key(request)
+    if key_error:
+        return _error(key_error, 400)
+
+    turn = await sync_to_async(find_idempotent_turn)(conversation, key) if key else None
+    if turn:
+        payload, status = existing_turn_response(turn, user_message)
+        return JsonResponse(payload, status=status, headers={'Idempotent-Replayed': 'true'})
+
+    if conversation.is_complete:
+        return JsonResponse(INTAKE_COMPLETE_RESPONSE)
+
+    turn, created = await sync_to_async(claim_turn)(conversation, user_message, key)
+    if not created:
+        payload, status = existing_turn_response(turn, user_message)
+        return JsonResponse(payload, status=status, headers={'Idempotent-Replayed': 'true'})
+    pool = await sync_to_async(get_turn_pool)()
+    pool.submit(turn)
+
+    payload = enqueue_turn_response(turn)
+    return JsonResponse(payload, status=202, headers={'Location': payload['poll_url']})
+
+
+async def turn_detail(request, turn_id):
+    """
+    Status of a queued chat turn; includes the reply once it is done.
+    ?wait=<seconds> long-polls until the turn finishes without tying up a thread.
+    Returns 200 once the turn is done or failed, 202 while it is still pending.
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    try:
+        turn = await ChatTurn.objects.aget(pk=turn_id)
+    except (ChatTurn.DoesNotExist, ValidationError):
+        return _error('Turn not found', 404)
+
+    turn = await await_turn(turn, wait_seconds(request.GET.get('wait'), settings.CHAT_TURN_MAX_WAIT))
+    return JsonResponse(turn_payload(turn), status=200 if turn.is_finished else 202)
+
+
+@csrf_exempt
+async def employee_login(request):
+    """
+    Authenticate an employee using Supabase
+    """
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+
+    body = _json_body(request)
+    email = str(body.get('email', '')).strip()
+    password = body.get('password', '')
+
+    if not email or not password:
+        return _error('Email and password are required', 400)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        result = await dashboard_queries.employee_query(supabase, email).execute()
+
+        if not result.data:
+            return _error('Invalid email or password', 401)
+
+        employee = result.data[0]
+
+        # Password hashing is CPU-bound; keep it off the event loop
+        if await sync_to_async(check_password)(password, employee['password_hash']):
+            return JsonResponse({
+                'id': employee['id'],
+                'email': employee['email'],
+                'full_name': employee['full_name'],
+                'role': employee['role'],
+            })
+        return _error('Invalid email or password', 401)
+    except Exception:
+        logger.exception("❌ Login error")
+        return _error('Authentication failed', 500)
+
+
+async def dashboard_cases(request):
+    """
+    Get all cases from Supabase for dashboard
+    Supports filtering and sorting
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        result = await dashboard_queries.cases_query(
+            supabase,
+            request.GET.get('sort_by', 'urgency_score'),
+            request.GET.get('order', 'desc'),
+            request.GET.get('search', '').strip(),
+        ).execute()
+
+        return JsonResponse({
+            'total_cases': len(result.data),
+            'cases': result.data
+        })
+    except Exception:
+        logger.exception("❌ Dashboard cases error")
+        return _error('Failed to fetch cases', 500)
+
+
+async def dashboard_case_detail(request, case_id):
+    """
+    Get detailed case information including conversation history
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        case_result = await dashboard_queries.case_query(supabase, case_id).execute()
+
+        if not case_result.data:
+            return _error('Case not found', 404)
+
+        case = case_result.data[0]
+        conversation_id = case['conversation_id']
+
+        # Conversation and messages are independent; fetch them together
+        conv_result, messages_result = await asyncio.gather(
+            dashboard_queries.conversation_query(supabase, conversation_id).execute(),
+            dashboard_queries.conversation_messages_query(supabase, conversation_id).execute(),
+        )
+
+        return JsonResponse({
+            'case': case,
+            'conversation': conv_result.data[0] if conv_result.data else None,
+            'messages': messages_result.data
+        })
+    except Exception:
+        logger.exception("❌ Case detail error")
+        return _error('Failed to fetch case details', 500)
+
+
+async def dashboard_conversations(request):
+    """
+    Get all conversations from Supabase for dashboard
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        result = await dashboard_queries.conversations_query(supabase, request.GET.get('is_complete', None)).execute()
+
+        return JsonResponse({
+            'total_conversations': len(result.data) if result.data else 0,
+            'conversations': result.data or []
+        })
+    except Exception:
+        logger.exception("❌ Dashboard conversations error")
+        return _error('Failed to fetch conversations', 500)
+
+
+async def dashboard_conversation_detail(request, conversation_id):
+    """
+    Get a specific conversation with its messages
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        conv_result, messages_result = await asyncio.gather(
+            dashboard_queries.conversation_query(supabase, conversation_id).execute(),
+            dashboard_queries.conversation_messages_query(supabase, conversation_id).execute(),
+        )
+
+        if not conv_result.data:
+            return _error('Conversation not found', 404)
+
+        conversation = conv_result.data[0]
+        conversation['messages'] = messages_result.data or []
+
+        return JsonResponse(conversation)
+    except Exception:
+        logger.exception("❌ Dashboard conversation detail error")
+        return _error('Failed to fetch conversation details', 500)
+
+
+async def dashboard_conversation_case(request, conversation_id):
+    """
+    Get case submission for a conversation (if it exists)
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        case_result = await dashboard_queries.conversation_case_query(supabase, conversation_id).execute()
+
+        if not case_result.data:
+            return _error('No case submission found for this conversation', 404)
+
+        return JsonResponse(case_result.data[0])
+    except Exception:
+        logger.exception("❌ Dashboard conversation case error")
+        return _error('Failed to fetch case submission', 500)
+
+
+async def dashboard_token_usage(request):
+    """
+    watsonx token usage and estimated cost across case submissions, in total,
+    per case and per intake task
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        result = await dashboard_queries.token_usage_query(supabase).execute()
+        return JsonResponse(token_usage_rollup(row.get('token_usage') for row in result.data or []))
+    except Exception:
+        logger.exception("❌ Dashboard token usage error")
+        return _error('Failed to fetch token usage', 500)
+
+
+async def dashboard_stats(request):
+    """
+    Get dashboard statistics
+    """
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    supabase, error = await _supabase_or_error()
+    if error:
+        return error
+
+    try:
+        # The count queries are independent; run them concurrently
+        queries = dashboard_queries.stats_queries(supabase)
+        results = await asyncio.gather(*(query.execute() for query in queries.values()))
+
+        return JsonResponse({
+            name: len(result.data) if result.data else 0
+            for name, result in zip(queries, results)
+        })
+    except Exception:
+        logger.exception("❌ Dashboard stats error")
+        return _error('Failed to fetch statistics', 500)
@@ -0,0 +1,66 @@
+"""
+Supabase queries behind the caseworker dashboard
+Each function builds a PostgREST query on either the sync or the async
+Supabase client; callers run it with .execute() or await .execute().
+"""
+from typing import Any, Dict, Optional
+
+
+def employee_query(supabase, email: str):
+    return supabase.table('employees').select('*').eq('email', email).eq('is_active', True)
+
+
+def cases_query(supabase, sort_by: str = 'urgency_score', order: str = 'desc', search: str = ''):
+    query = supabase.table('case_submissions').select('*')
+
+    # Apply search filter if provided
+    if search:
+        query = query.or_(f'full_name.ilike.%{search}%,email.ilike.%{search}%')
+
+    # Apply sorting
+    ascending = (order == 'asc')
+    return query.order(sort_by, desc=not ascending)
+
+
+def case_query(supabase, case_id: str):
+    return supabase.table('case_submissions').select('*').eq('id', case_id)
+
+
+def conversation_query(supabase, conversation_id: str):
+    return supabase.table('conversations').select('*').eq('id', conversation_id)
+
+
+def conversation_messages_query(supabase, conversation_id: str):
+    return supabase.table('messages').select('*').eq('conversation_id', conversation_id).order('created_at', desc=False)
+
+
+def conversation_case_query(supabase, conversation_id: str):
+    return supabase.table('case_submissions').select('*').eq('conversation_id', conversation_id)
+
+
+def conversations_query(supabase, is_complete: Optional[str] = None):
+    query = supabase.table('conversations').select('*')
+
+    # Filter by completion status if specified
+    if is_complete is not None:
+        query = query.eq('is_complete', is_complete.lower() == 'true')
+
+    # Sort by most recent first
+    return query.order('created_at', desc=True)
+
+
+def stats_queries(supabase) -> Dict[str, Any]:
+    """One count query per dashboard statistic, keyed by response field."""
+    return {
+        'total_conversations': supabase.table('conversations').select('id', count='exact'),
+        'completed_conversations': supabase.table('conversations').select('id', count='exact').eq('is_complete', True),
+        'total_cases': supabase.table('case_submissions').select('id', count='exact'),
+        # High urgency cases (score >= 8)
+        'high_urgency_cases': supabase.table('case_submissions').select('id', count='exact').gte('urgency_score', 8),
+        'emergency_cases': supabase.table('case_submissions').select('id', count='exact').eq('has_emergency_needs', True),
+    }
+
+
+def token_usage_query(supabase):
+    """Each case's watsonx token ledger, without the rest of additional_data."""
+    return supabase.table('case_submissions').select('token_usage:additional_data->token_usage')
@@ -0,0 +1,142 @@
+"""
+Request tracing
+TracingMiddleware starts a trace per request (continuing the caller's W3C
+traceparent when one is sent) and returns the per-phase breakdown in
+Server-Timing and X-Trace-Id headers, so slow turns can be read straight
+from the browser's network panel. Database queries are timed by an execute
+wrapper installed on every new connection (see ChatbotConfig.ready).
+
+ProfilingMiddleware samples single requests on demand (app/Backend/profiling.py).
+"""
+import random
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from app.Backend import profiling
+from app.Backend.tracing import Trace, current_trace, span, trace
+
+# First SQL keyword -> span name
+_QUERY_KINDS = {
+    'SELECT': 'db.read',
+    'INSERT': 'db.write',
+    'UPDATE': 'db.write',
+    'DELETE': 'db.write',
+    'REPLACE': 'db.write',
+}
+
+
+def _traced_execute(execute, sql, params, many, context):
+    if current_trace() is None:
+        return execute(sql, params, many, context)
+    verb = sql.split(None, 1)[0].upper() if sql else ''
+    with span(_QUERY_KINDS.get(verb, 'db.other'), statement=verb, many=many):
+        return execute(sql, params, many, context)
+
+
+def install_query_tracing(sender, connection, **kwargs):
+    """connection_created receiver: time this connection's queries."""
+    if _traced_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_traced_execute)
+
+
+class TracingMiddleware:
+    """Trace each request and report it in Server-Timing; sync and async capable."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with trace(request.method, request.headers.get('traceparent')) as current:
+            response = self.get_response(request)
+            self._finish(current, request, response)
+        return self._annotate(current, response)
+
+    async def __acall__(self, request):
+        with trace(request.method, request.headers.get('traceparent')) as current:
+            response = await self.get_response(request)
+            self._finish(current, request, response)
+        return self._annotate(current, response)
+
+    def _finish(self, current: Trace, request, response) -> None:
+        """Name the trace after the matched URL pattern, not the raw path (ids would explode cardinality)."""
+        if current is None:
+            return
+        match = getattr(request, 'resolver_match', None)
+        # DRF router patterns are regexes; drop their anchors
+        route = f"/{match.route.lstrip('^').rstrip('$')}" if match and match.route else request.path
+        current.name = current.root.name = f"{request.method} {route}"
+        current.root.attributes.update({
+            'http.method': request.method,
+            'http.route': route,
+            'http.status_code': response.status_code,
+        })
+
+    def _annotate(self, current: Trace, response):
+        if current is not None:
+            response['Server-Timing'] = current.server_timing()
+            response['X-Trace-Id'] = current.trace_id
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that send a valid signed X-Profile header, or a random
+    PROFILING_SAMPLE_RATE fraction of them. Removed at startup when profiling
+    is not configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not profiling.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _requested(self, request) -> bool:
+        return profiling.verify(request.headers.get('X-Profile')) or (
+            profiling.SAMPLE_RATE > 0 and random.random() < profiling.SAMPLE_RATE
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._requested(request):
+            return self.get_response(request)
+        sampler = profiling.StackSampler(threading.get_ident()).start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        return self._save(sampler, request, response)
+
+    async def __acall__(self, request):
+        if not self._requested(request):
+            return await self.get_response(request)
+        sampler = profiling.StackSampler(threading.get_ident()).start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        return self._save(sampler, request, response)
+
+    def _save(self, sampler, request, response):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match and match.route else request.path
+        path = profiling.save(sampler, f"{request.method} {route}")
+        if path:
+            response['X-Profile-File'] = path.rsplit('/', 1)[-1]
+        return response
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0004_chatturn'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatturn',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='chatturn',
+            constraint=models.UniqueConstraint(fields=('conversation', 'idempotency_key'), name='unique_turn_idempotency_key'),
+        ),
+    ]
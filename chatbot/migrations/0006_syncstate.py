@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0005_chatturn_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('row_id', models.UUIDField()),
+                ('row_hash', models.CharField(max_length=32)),
+                ('column_digests', models.JSONField(default=dict)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('model', 'row_id'), name='unique_sync_state_row')],
+            },
+        ),
+    ]
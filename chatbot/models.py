@@ -1,8 +1,77 @@
 from django.db import models
+import hashlib
 import uuid
 import json
+from typing import Any, Dict, Optional, Tuple
 
-class Conversation(models.Model):
+
+def _sync_digest(value: Any) -> str:
+    return hashlib.md5(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SyncState(models.Model):
+    """
+    What was last written to Supabase for one synced row
+    A content hash of the whole payload plus a digest per column, so any
+    worker can skip an unchanged row or PATCH just the columns that moved.
+    """
+    model = models.CharField(max_length=100)  # model label, e.g. "chatbot.Conversation"
+    row_id = models.UUIDField()
+    row_hash = models.CharField(max_length=32)
+    column_digests = models.JSONField(default=dict)  # {"is_complete": "<md5>", ...}
+    synced_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'row_id'], name='unique_sync_state_row'),
+        ]
+    
+    def __str__(self):
+        return f"Sync state {self.model} {self.row_id}"
+
+
+class SyncTrackedMixin:
+    """
+    Change tracking against what was last written to Supabase
+    After a successful sync the row's baseline is stored in SyncState, so a
+    later sync of the same row, from any request or worker, can skip it when
+    nothing changed and PATCH only the columns that moved. A row without a
+    baseline (new, or synced before tracking existed) gets a full upsert.
+    """
+    
+    def _sync_state_lookup(self) -> Dict[str, Any]:
+        return {'model': self._meta.label, 'row_id': self.pk}
+    
+    def supabase_changes(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Columns of ``payload`` that differ from the last synced version.
+        Returns {} when nothing changed and None when there is no baseline.
+        """
+        state = SyncState.objects.filter(**self._sync_state_lookup()).first()
+        if state is None:
+            return None
+        if _sync_digest(payload) == state.row_hash:
+            return {}
+        return {
+            name: value for name, value in payload.items()
+            if state.column_digests.get(name) != _sync_digest(value)
+        }
+    
+    def mark_synced(self, payload: Dict[str, Any]) -> None:
+        """Record ``payload`` as the row's current Supabase state."""
+        SyncState.objects.update_or_create(
+            **self._sync_state_lookup(),
+            defaults={
+                'row_hash': _sync_digest(payload),
+                'column_digests': {name: _sync_digest(value) for name, value in payload.items()},
+            },
+        )
+    
+    def forget_synced(self) -> None:
+        SyncState.objects.filter(**self._sync_state_lookup()).delete()
+
+
+class Conversation(SyncTrackedMixin, models.Model):
     """Stores ongoing chat conversation and basic metadata"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -16,7 +85,7 @@ class Conversation(models.Model):
         return f"Conversation {self.id}"
 
 
-class CaseSubmission(models.Model):
+class CaseSubmission(SyncTrackedMixin, models.Model):
     """Complete intake case submitted to caseworker - structured for Supabase migration"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     conversation = models.OneToOneField(Conversation, on_delete=models.CASCADE, related_name='case_submission')
@@ -111,3 +180,45 @@ class Message(models.Model):
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}"
+
+
+class ChatTurn(models.Model):
+    """A user message queued for processing off the request path (202 Accepted flow)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    FINISHED = (DONE, FAILED)
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='turns')
+    message = models.TextField()
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)  # Idempotency-Key header, released after IDEMPOTENCY_KEY_TTL
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(default=dict, blank=True)  # {"latest_message": "...", "is_complete": false, "questions_asked": 3}
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'idempotency_key'], name='unique_turn_idempotency_key'),
+        ]
+    
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED
+    
+    def __str__(self):
+        return f"Turn {self.id} ({self.status})"
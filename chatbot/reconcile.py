@@ -0,0 +1,253 @@
+"""
+Checksum reconciliation between the Django DB and Supabase
+Both sides bucket rows by the hex prefix of their UUID and checksum each
+bucket as the sum of per-row hashes (row hash = first 60 bits of md5 over
+a canonical text of every column the sync sends). Only buckets whose count
+or checksum differ are split further, so a mostly-in-sync table costs a few
+dozen small RPC calls. Differing leaf buckets are compared row by row and
+the local rows are re-upserted in batches.
+
+The Supabase side is computed by the reconcile_buckets / reconcile_rows SQL
+functions from setup_supabase_tables.py. Its reconcile_row_expr must match
+row_expr_sql() below; paste the new output there whenever a synced column
+changes (the tests check the two agree).
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from chatbot.sync_engine import DEFAULT_BATCH_SIZE, SYNC_TABLES, SyncTable, upsert_batch
+
+logger = logging.getLogger(__name__)
+
+# Prefix length of the deepest buckets; 16**4 leaves keep leaf buckets small
+# well into tens of millions of rows
+MAX_DEPTH = 4
+# Differing buckets at most this large are compared row by row instead of split
+LEAF_ROWS = 500
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# (row count, checksum) of one bucket
+BucketSum = Tuple[int, int]
+
+
+def _micros(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _md5(text: Optional[str]) -> str:
+    return hashlib.md5((text or "").encode()).hexdigest()
+
+
+def _json_string(text: str) -> str:
+    """A string as Postgres prints it inside jsonb (escape_json)."""
+    escaped = []
+    for char in text:
+        if char in '"\\':
+            escaped.append("\\" + char)
+        elif char in "\b\f\n\r\t":
+            escaped.append(json.dumps(char)[1:-1])
+        elif char < " ":
+            escaped.append(f"\\u{ord(char):04x}")
+        else:
+            escaped.append(char)
+    return f'"{"".join(escaped)}"'
+
+
+def jsonb_text(value: Any) -> str:
+    """
+    ``value`` as Supabase's jsonb::text prints it after receiving the sync's
+    JSON: keys ordered by length then bytes, ", " / ": " separators and
+    numbers as numeric text (no exponent, float scale kept: 1850.0).
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return format(Decimal(repr(value)), "f")
+    if isinstance(value, str):
+        return _json_string(value)
+    if isinstance(value, dict):
+        keys = sorted(value, key=lambda key: (len(key.encode()), key.encode()))
+        return "{" + ", ".join(f"{_json_string(key)}: {jsonb_text(value[key])}" for key in keys) + "}"
+    return "[" + ", ".join(jsonb_text(item) for item in value) + "]"
+
+
+# Column kind -> (canonical text of a local value, SQL expression for a column).
+# NULL becomes '' except for text and JSON, which are hashed.
+COLUMN_TEXT: Dict[str, Tuple[Callable[[Any], str], str]] = {
+    "uuid": (lambda value: "" if value is None else str(value), "coalesce({c}::text, '')"),
+    "timestamp": (lambda value: "" if value is None else str(_micros(value)), "coalesce(reconcile_us({c})::text, '')"),
+    "date": (lambda value: "" if value is None else value.isoformat(), "coalesce({c}::text, '')"),
+    "int": (lambda value: "" if value is None else str(value), "coalesce({c}::text, '')"),
+    # Cents; float8 -> bigint and Python's round() both round half to even
+    "float": (lambda value: "" if value is None else str(round(value * 100)), "coalesce(({c} * 100)::bigint::text, '')"),
+    "bool": (lambda value: "" if value is None else str(int(value)), "coalesce({c}::int::text, '')"),
+    "text": (_md5, "md5(coalesce({c}, ''))"),
+    "json": (lambda value: _md5(None if value is None else jsonb_text(value)), "md5(coalesce({c}::text, ''))"),
+}
+
+FIELD_KINDS = {
+    "UUIDField": "uuid", "ForeignKey": "uuid", "OneToOneField": "uuid",
+    "DateTimeField": "timestamp", "DateField": "date",
+    "IntegerField": "int", "FloatField": "float", "BooleanField": "bool",
+    "CharField": "text", "TextField": "text", "EmailField": "text",
+    "JSONField": "json",
+}
+
+
+def row_columns(model: type) -> List[Tuple[str, str]]:
+    """(column, kind) of every column the sync sends, in model field order."""
+    return [(field.attname, FIELD_KINDS[field.get_internal_type()]) for field in model._meta.concrete_fields]
+
+
+def row_text(columns: List[Tuple[str, str]], values: Tuple[Any, ...]) -> str:
+    return "|".join(COLUMN_TEXT[kind][0](value) for (_, kind), value in zip(columns, values))
+
+
+def row_expr_sql(model: type) -> str:
+    """The SQL twin of row_text() for reconcile_row_expr in setup_supabase_tables.py."""
+    return "\n               || '|' || ".join(COLUMN_TEXT[kind][1].format(c=column) for column, kind in row_columns(model))
+
+
+def row_hash(text: str) -> int:
+    return int(hashlib.md5(text.encode()).hexdigest()[:15], 16)
+
+
+def _bounds(prefix: str) -> Tuple[UUID, UUID]:
+    """Smallest and largest UUID starting with ``prefix`` (an index range, not a LIKE)."""
+    return UUID(prefix.ljust(32, "0")), UUID(prefix.ljust(32, "f"))
+
+
+def _local_rows(table: SyncTable, prefix: str = "", chunk_size: int = 2000) -> Iterator[Tuple[str, int]]:
+    """Stream (uuid hex, row hash) for local rows under ``prefix``."""
+    columns = row_columns(table.model)
+    rows = table.model.objects.all()
+    if prefix:
+        low, high = _bounds(prefix)
+        rows = rows.filter(pk__gte=low, pk__lte=high)
+    for values in rows.values_list(*(column for column, _ in columns)).iterator(chunk_size=chunk_size):
+        yield values[0].hex, row_hash(row_text(columns, values))
+
+
+def local_tree(table: SyncTable) -> Dict[str, List[int]]:
+    """One streaming pass building [count, checksum] for every prefix up to MAX_DEPTH."""
+    tree: Dict[str, List[int]] = {}
+    for hex_id, digest in _local_rows(table):
+        for depth in range(MAX_DEPTH + 1):
+            bucket = tree.setdefault(hex_id[:depth], [0, 0])
+            bucket[0] += 1
+            bucket[1] += digest
+    return tree
+
+
+def _remote_buckets(supabase, table: str, prefix: str) -> Dict[str, BucketSum]:
+    result = supabase.rpc("reconcile_buckets", {"p_table": table, "p_prefix": prefix}).execute()
+    return {row["bucket"]: (int(row["row_count"]), int(row["checksum"])) for row in result.data or []}
+
+
+def _remote_rows(supabase, table: str, prefix: str) -> Dict[str, int]:
+    result = supabase.rpc("reconcile_rows", {"p_table": table, "p_prefix": prefix}).execute()
+    return {row["id"].replace("-", ""): int(row["digest"]) for row in result.data or []}
+
+
+def find_differences(supabase, table: SyncTable, stats: Dict[str, int]) -> Tuple[Set[str], Set[str]]:
+    """
+    Walk the bucket tree from the root, descending only where the two sides
+    disagree. Returns (ids to upsert, ids only present in Supabase).
+    """
+    tree = local_tree(table)
+    stale: Set[str] = set()
+    extra: Set[str] = set()
+    frontier = [""]
+
+    while frontier:
+        prefix = frontier.pop()
+        remote = _remote_buckets(supabase, table.name, prefix)
+        stats["rpc_calls"] += 1
+        depth = len(prefix) + 1
+        local = {bucket: tuple(tree[bucket]) for bucket in _child_buckets(tree, prefix, depth)}
+
+        for bucket in set(local) | set(remote):
+            stats["buckets_compared"] += 1
+            local_sum = local.get(bucket, (0, 0))
+            remote_sum = remote.get(bucket, (0, 0))
+            if local_sum == remote_sum:
+                continue
+            if depth < MAX_DEPTH and max(local_sum[0], remote_sum[0]) > LEAF_ROWS:
+                frontier.append(bucket)
+                continue
+
+            local_rows = dict(_local_rows(table, bucket))
+            remote_rows = _remote_rows(supabase, table.name, bucket)
+            stats["rpc_calls"] += 1
+            stats["rows_compared"] += len(local_rows)
+            stale.update(hex_id for hex_id, digest in local_rows.items() if remote_rows.get(hex_id) != digest)
+            extra.update(hex_id for hex_id in remote_rows if hex_id not in local_rows)
+
+    return stale, extra
+
+
+def _child_buckets(tree: Dict[str, List[int]], prefix: str, depth: int) -> Iterator[str]:
+    for digit in "0123456789abcdef":
+        bucket = prefix + digit
+        if len(bucket) == depth and bucket in tree:
+            yield bucket
+
+
+def repair(supabase, table: SyncTable, ids: Set[str], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Re-upsert the given local rows in batches; returns the number of requests."""
+    ordered = sorted(ids)
+    requests_sent = 0
+    for start in range(0, len(ordered), batch_size):
+        chunk = [UUID(hex_id) for hex_id in ordered[start:start + batch_size]]
+        payload = [table.payload(row) for row in table.model.objects.filter(pk__in=chunk)]
+        if payload:
+            upsert_batch(supabase, table.name, payload)
+            requests_sent += 1
+    return requests_sent
+
+
+def delete_extra(supabase, table: SyncTable, ids: Set[str], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    ordered = [str(UUID(hex_id)) for hex_id in sorted(ids)]
+    for start in range(0, len(ordered), batch_size):
+        supabase.table(table.name).delete().in_("id", ordered[start:start + batch_size]).execute()
+
+
+def reconcile(
+    supabase,
+    dry_run: bool = False,
+    delete_remote_extra: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    tables: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Reconcile each table in SYNC_TABLES order (parents first, so repairs satisfy foreign keys)."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for table in SYNC_TABLES:
+        if tables and table.name not in tables:
+            continue
+        logger.info("🔍 Reconciling %s...", table.name)
+        stats = {"rpc_calls": 0, "buckets_compared": 0, "rows_compared": 0, "repair_requests": 0}
+        stale, extra = find_differences(supabase, table, stats)
+        stats["stale"] = len(stale)
+        stats["extra"] = len(extra)
+
+        if not dry_run:
+            stats["repair_requests"] = repair(supabase, table, stale, batch_size)
+            if delete_remote_extra and extra:
+                delete_extra(supabase, table, extra, batch_size)
+
+        if stale or extra:
+            logger.warning("⚠️ %s: %d missing/outdated in Supabase, %d only in Supabase", table.name, len(stale), len(extra))
+        else:
+            logger.info("✅ %s: in sync (%d RPC calls)", table.name, stats["rpc_calls"])
+        results[table.name] = stats
+    return results
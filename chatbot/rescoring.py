@@ -0,0 +1,95 @@
+"""
+Batch urgency rescoring for stored case submissions
+Streams CaseSubmission rows in chunks, scores each chunk with the vectorized
+urgency engine and writes back only the rows whose score or reasoning changed.
+"""
+import logging
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pandas as pd
+from django.db import transaction
+
+from app.Backend.urgency import FACT_COLUMNS, URGENCY_RULES, UrgencyRule, score_frame
+from chatbot.models import CaseSubmission
+from chatbot.supabase_sync import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def iter_case_frames(columns: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Stream CaseSubmission columns as DataFrames of at most ``chunk_size`` rows."""
+    rows = CaseSubmission.objects.order_by("pk").values_list(*columns).iterator(chunk_size=chunk_size)
+    batch: List[Tuple[Any, ...]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch, columns=columns)
+
+
+def _push_to_supabase(supabase, changed: pd.DataFrame) -> int:
+    """
+    Mirror changed scores to Supabase with one UPDATE per distinct
+    (score, reasoning) pair instead of one request per case.
+    """
+    requests_sent = 0
+    for (score, reasoning), group in changed.groupby(["new_score", "new_reasoning"]):
+        ids = [str(case_id) for case_id in group["id"]]
+        supabase.table("case_submissions").update({
+            "urgency_score": int(score),
+            "urgency_reasoning": reasoning,
+        }).in_("id", ids).execute()
+        requests_sent += 1
+    return requests_sent
+
+
+def rescore_case_submissions(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+    sync: bool = True,
+    rules: List[UrgencyRule] = URGENCY_RULES,
+) -> Dict[str, int]:
+    """
+    Re-apply the urgency rules table to every stored case.
+    Each chunk is written in its own transaction with bulk_update, so a long
+    run never holds one giant transaction open.
+    """
+    stats = {"scanned": 0, "changed": 0, "chunks": 0, "supabase_requests": 0}
+    supabase = get_supabase_client() if sync and not dry_run else None
+
+    columns = ["id", "urgency_score", "urgency_reasoning", *FACT_COLUMNS]
+    for frame in iter_case_frames(columns, chunk_size):
+        scores, reasoning = score_frame(frame, rules)
+        frame["new_score"] = scores
+        frame["new_reasoning"] = reasoning
+        changed = frame[
+            (frame["new_score"] != frame["urgency_score"])
+            | (frame["new_reasoning"] != frame["urgency_reasoning"])
+        ]
+
+        stats["scanned"] += len(frame)
+        stats["chunks"] += 1
+        stats["changed"] += len(changed)
+        if dry_run or changed.empty:
+            continue
+
+        updates = [
+            CaseSubmission(id=case_id, urgency_score=int(score), urgency_reasoning=text)
+            for case_id, score, text in zip(changed["id"], changed["new_score"], changed["new_reasoning"])
+        ]
+        with transaction.atomic():
+            CaseSubmission.objects.bulk_update(updates, ["urgency_score", "urgency_reasoning"], batch_size=chunk_size)
+
+        if supabase:
+            try:
+                stats["supabase_requests"] += _push_to_supabase(supabase, changed)
+            except Exception:
+                logger.exception("⚠️ Failed to sync rescored chunk to Supabase")
+
+        logger.info("✅ Chunk %d: %d/%d cases rescored", stats["chunks"], len(changed), len(frame))
+
+    return stats
@@ -0,0 +1,112 @@
+"""
+Batch eligibility screening for stored case submissions
+Screens the whole case table chunk by chunk with the vectorized rules engine
+and records each program's status and deciding rule in additional_data.
+Changed rows are mirrored to Supabase, where the dashboards read them; the
+incremental sync keys case submissions on submitted_at and would never
+resend a re-screened case.
+"""
+import logging
+from typing import Any, Dict, List
+
+from django.db import transaction
+
+from app.Backend.eligibility import ELIGIBILITY_RULES_VERSION, FACT_COLUMNS, PROGRAM_RULES, ProgramRule, screen_frame
+from chatbot.models import CaseSubmission
+from chatbot.rescoring import DEFAULT_CHUNK_SIZE, iter_case_frames
+from chatbot.supabase_sync import case_submission_payload, get_supabase_client
+from chatbot.sync_engine import DEFAULT_BATCH_SIZE, upsert_batch
+
+logger = logging.getLogger(__name__)
+
+
+def _push_to_supabase(supabase, case_ids: List[Any], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Mirror re-screened cases to Supabase as full-row upserts in batches.
+    additional_data differs per case, so unlike rescoring there are no
+    shared values to group one UPDATE by.
+    """
+    requests_sent = 0
+    for start in range(0, len(case_ids), batch_size):
+        cases = CaseSubmission.objects.filter(pk__in=case_ids[start:start + batch_size])
+        upsert_batch(supabase, "case_submissions", [case_submission_payload(case) for case in cases])
+        requests_sent += 1
+    return requests_sent
+
+
+def screen_case_submissions(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+    sync: bool = True,
+    update_programs: bool = False,
+    rules: List[ProgramRule] = PROGRAM_RULES,
+) -> Dict[str, int]:
+    """
+    Re-screen every stored case against the program rules.
+    With ``update_programs`` the eligible programs also replace
+    recommended_programs; otherwise only additional_data['eligibility'] changes.
+    """
+    stats: Dict[str, int] = {"scanned": 0, "changed": 0, "chunks": 0, "supabase_requests": 0}
+    supabase = get_supabase_client() if sync and not dry_run else None
+    for rule in rules:
+        stats[rule.program] = 0
+
+    columns = ["id", "additional_data", "recommended_programs", *FACT_COLUMNS]
+    fields = ["additional_data", "recommended_programs"] if update_programs else ["additional_data"]
+
+    for frame in iter_case_frames(columns, chunk_size):
+        screened = screen_frame(frame, rules)
+        stats["scanned"] += len(frame)
+        stats["chunks"] += 1
+
+        updates = []
+        for position, (case_id, additional_data, programs) in enumerate(
+            zip(frame["id"], frame["additional_data"], frame["recommended_programs"])
+        ):
+            eligible = screened["eligible_programs"].iat[position]
+            for program in eligible:
+                stats[program] += 1
+
+            eligibility = {
+                "programs": eligible,
+                "results": [
+                    {
+                        "program": rule.program,
+                        "status": screened[f"{rule.rule_id}_status"].iat[position],
+                        "rule": screened[f"{rule.rule_id}_rule"].iat[position],
+                    }
+                    for rule in rules
+                ],
+                "rules_version": ELIGIBILITY_RULES_VERSION,
+            }
+            additional_data = dict(additional_data or {})
+            previous = additional_data.get("eligibility") or {}
+            same_results = [
+                {key: result.get(key) for key in ("program", "status", "rule")}
+                for result in previous.get("results", [])
+            ] == eligibility["results"]
+            if same_results and (not update_programs or programs == eligible):
+                continue
+
+            additional_data["eligibility"] = eligibility
+            case = CaseSubmission(id=case_id, additional_data=additional_data)
+            if update_programs:
+                case.recommended_programs = eligible
+            updates.append(case)
+
+        stats["changed"] += len(updates)
+        if dry_run or not updates:
+            continue
+
+        with transaction.atomic():
+            CaseSubmission.objects.bulk_update(updates, fields, batch_size=chunk_size)
+
+        if supabase:
+            try:
+                stats["supabase_requests"] += _push_to_supabase(supabase, [case.id for case in updates])
+            except Exception:
+                logger.exception("⚠️ Failed to sync re-screened chunk to Supabase")
+
+        logger.info("✅ Chunk %d: %d/%d cases re-screened", stats["chunks"], len(updates), len(frame))
+
+    return stats
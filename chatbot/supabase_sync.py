@@ -1,40 +1,237 @@
 """
 Supabase sync utilities
 """
+import asyncio
+import functools
+import inspect
+import json
+import logging
 import os
-from typing import Dict, Any, Optional
-from supabase import create_client, Client
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Any, Optional, Tuple
+from asgiref.sync import sync_to_async
+from supabase import create_client, Client, acreate_client, AsyncClient
 from dotenv import load_dotenv
 
+from app.Backend.metrics import SUPABASE_SYNC_SECONDS, SUPABASE_SYNCS
+from app.Backend.tracing import traced
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://uwqxplllohfdevxvsyii.supabase.co")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 
 if not SUPABASE_KEY:
-    print("⚠️ WARNING: SUPABASE_ANON_KEY not found in environment variables")
+    logger.warning("⚠️ SUPABASE_ANON_KEY not found in environment variables")
 
 def get_supabase_client() -> Optional[Client]:
     """
     Get a fresh Supabase client
     """
     if not SUPABASE_KEY:
-        print("⚠️ Supabase not available: Missing SUPABASE_ANON_KEY")
-        print(f"   SUPABASE_URL present: {bool(SUPABASE_URL)}")
+        logger.debug("Supabase not available: missing SUPABASE_ANON_KEY (SUPABASE_URL present: %s)", bool(SUPABASE_URL))
         return None
         
     try:
         client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print(f"✅ Supabase client created successfully (URL: {SUPABASE_URL[:30]}...)")
+        logger.debug("Supabase client created (URL: %s...)", SUPABASE_URL[:30])
         return client
-    except Exception as e:
-        import traceback
-        print(f"⚠️ Supabase client creation failed: {e}")
-        print(f"   SUPABASE_URL: {SUPABASE_URL}")
-        print(f"   Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.warning("⚠️ Supabase client creation failed (URL: %s)", SUPABASE_URL, exc_info=True)
         return None
 
 
+# ============================================
+# ROW PAYLOADS
+# ============================================
+# Shared by the sync and async sync paths.
+
+def conversation_payload(conversation) -> Dict[str, Any]:
+    return {
+        "id": str(conversation.id),
+        "created_at": conversation.created_at.isoformat(),
+        "updated_at": conversation.updated_at.isoformat(),
+        "is_complete": conversation.is_complete,
+    }
+
+
+def message_payload(message) -> Dict[str, Any]:
+    return {
+        "id": str(message.id),
+        "conversation_id": str(message.conversation_id),
+        "role": message.role,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def case_submission_payload(case_submission) -> Dict[str, Any]:
+    return {
+        "id": str(case_submission.id),
+        "conversation_id": str(case_submission.conversation_id),
+        "submitted_at": case_submission.submitted_at.isoformat(),
+        
+        # Urgency
+        "urgency_score": case_submission.urgency_score,
+        "urgency_reasoning": case_submission.urgency_reasoning,
+        
+        # Personal
+        "full_name": case_submission.full_name,
+        "date_of_birth": case_submission.date_of_birth.isoformat() if case_submission.date_of_birth else None,
+        "age": case_submission.age,
+        "phone_number": case_submission.phone_number,
+        "email": case_submission.email,
+        
+        # Household
+        "household_size": case_submission.household_size,
+        "household_members": case_submission.household_members,
+        "has_children": case_submission.has_children,
+        
+        # Financial
+        "monthly_income": case_submission.monthly_income,
+        "income_sources": case_submission.income_sources,
+        "total_assets": case_submission.total_assets,
+        "monthly_expenses": case_submission.monthly_expenses,
+        "monthly_rent": case_submission.monthly_rent,
+        
+        # Employment
+        "employment_status": case_submission.employment_status,
+        "current_employer": case_submission.current_employer,
+        "job_title": case_submission.job_title,
+        "employment_duration": case_submission.employment_duration,
+        
+        # Housing
+        "housing_situation": case_submission.housing_situation,
+        "address": case_submission.address,
+        "at_risk_of_homelessness": case_submission.at_risk_of_homelessness,
+        
+        # Health
+        "has_disability": case_submission.has_disability,
+        "disability_details": case_submission.disability_details,
+        "has_medical_expenses": case_submission.has_medical_expenses,
+        "monthly_medical_costs": case_submission.monthly_medical_costs,
+        "has_health_insurance": case_submission.has_health_insurance,
+        
+        # Legal
+        "citizenship_status": case_submission.citizenship_status,
+        "immigration_status": case_submission.immigration_status,
+        
+        # Benefits
+        "current_benefits": case_submission.current_benefits,
+        
+        # Emergency
+        "has_emergency_needs": case_submission.has_emergency_needs,
+        "emergency_details": case_submission.emergency_details,
+        
+        # AI Generated
+        "structured_summary": case_submission.structured_summary,
+        "ai_summary": case_submission.ai_summary,
+        "recommended_programs": case_submission.recommended_programs,
+        "recommended_actions": case_submission.recommended_actions,
+        
+        # Additional
+        "additional_data": case_submission.additional_data,
+    }
+
+
+# ============================================
+# CHANGED-COLUMN SYNC
+# ============================================
+# Conversations and case submissions track what was last sent (SyncTrackedMixin,
+# persisted in SyncState): unchanged rows are skipped, known rows get a PATCH of
+# the changed columns only.
+
+_savings_lock = threading.Lock()
+_savings = {"skipped": 0, "patched": 0, "upserted": 0, "full_bytes": 0, "sent_bytes": 0}
+
+
+def _payload_bytes(data: Any) -> int:
+    return len(json.dumps(data, default=str))
+
+
+def _plan_row_sync(instance, payload: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """('skip', None), ('patch', changed columns) or ('upsert', full payload)"""
+    changes = instance.supabase_changes(payload)
+    if changes is None:
+        return "upsert", payload
+    if not changes:
+        return "skip", None
+    return "patch", changes
+
+
+def _record_sync(instance, action: str, payload: Dict[str, Any], sent: Optional[Dict[str, Any]]) -> None:
+    if action != "skip":
+        instance.mark_synced(payload)
+    with _savings_lock:
+        _savings["skipped" if action == "skip" else f"{action}ed"] += 1
+        _savings["full_bytes"] += _payload_bytes(payload)
+        _savings["sent_bytes"] += _payload_bytes(sent) if sent else 0
+
+
+def sync_savings() -> Dict[str, Any]:
+    """Counters for /healthz: rows skipped or patched and the payload bytes that saved"""
+    with _savings_lock:
+        stats = dict(_savings)
+    stats["bytes_saved"] = stats["full_bytes"] - stats["sent_bytes"]
+    return stats
+
+
+def _describe(action: str, sent: Optional[Dict[str, Any]]) -> str:
+    if action == "patch":
+        return f"patched {', '.join(sorted(sent))}"
+    return "unchanged, skipped" if action == "skip" else "upserted"
+
+
+def _sync_row(supabase, table: str, instance, payload: Dict[str, Any]) -> str:
+    """Send only what changed since the row was last synced; returns a description of what was sent"""
+    action, data = _plan_row_sync(instance, payload)
+    if action == "patch":
+        result = supabase.table(table).update(data).eq("id", payload["id"]).execute()
+        if not result.data:
+            # Row is missing remotely (e.g. deleted by hand): recreate it
+            action, data = "upsert", payload
+    if action == "upsert":
+        supabase.table(table).upsert(payload).execute()
+    _record_sync(instance, action, payload, data)
+    return _describe(action, data)
+
+
+def _instrumented(operation: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Trace span plus success/failure and latency metrics for a sync function returning bool"""
+    def record(started: float, ok: bool) -> None:
+        SUPABASE_SYNC_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        SUPABASE_SYNCS.inc(operation=operation, outcome="success" if ok else "failure")
+
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        func = traced(f"supabase.{operation}")(func)
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                started, ok = time.perf_counter(), False
+                try:
+                    ok = await func(*args, **kwargs)
+                    return ok
+                finally:
+                    record(started, bool(ok))
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started, ok = time.perf_counter(), False
+            try:
+                ok = func(*args, **kwargs)
+                return ok
+            finally:
+                record(started, bool(ok))
+        return wrapper
+    return decorate
+
+
+@_instrumented("sync_conversation")
 def sync_conversation_to_supabase(conversation) -> bool:
     """
     Sync a conversation to Supabase
@@ -42,28 +239,19 @@ def sync_conversation_to_supabase(conversation) -> bool:
     """
     supabase = get_supabase_client()
     if not supabase:
-        print(f"⚠️ Supabase client not available - cannot sync conversation {conversation.id}")
+        logger.warning("⚠️ Supabase client not available - cannot sync conversation %s", conversation.id)
         return False
     
     try:
-        data = {
-            "id": str(conversation.id),
-            "created_at": conversation.created_at.isoformat(),
-            "updated_at": conversation.updated_at.isoformat(),
-            "is_complete": conversation.is_complete,
-        }
-        
-        # Upsert (insert or update)
-        result = supabase.table("conversations").upsert(data).execute()
-        print(f"📤 Synced conversation {conversation.id} to Supabase (status: {result.data is not None})")
+        sent = _sync_row(supabase, "conversations", conversation, conversation_payload(conversation))
+        logger.debug("📤 Synced conversation %s to Supabase (%s)", conversation.id, sent)
         return True
-    except Exception as e:
-        import traceback
-        print(f"⚠️ Failed to sync conversation {conversation.id}: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.warning("⚠️ Failed to sync conversation %s", conversation.id, exc_info=True)
         return False
 
 
+@_instrumented("sync_message")
 def sync_message_to_supabase(message) -> bool:
     """
     Sync a message to Supabase
@@ -71,28 +259,21 @@ def sync_message_to_supabase(message) -> bool:
     """
     supabase = get_supabase_client()
     if not supabase:
-        print(f"⚠️ Supabase client not available - cannot sync message {message.id}")
+        logger.warning("⚠️ Supabase client not available - cannot sync message %s", message.id)
         return False
     
     try:
-        data = {
-            "id": str(message.id),
-            "conversation_id": str(message.conversation_id),
-            "role": message.role,
-            "content": message.content,
-            "created_at": message.created_at.isoformat(),
-        }
+        data = message_payload(message)
         
         result = supabase.table("messages").upsert(data).execute()
-        print(f"📤 Synced message {message.id} to Supabase (status: {result.data is not None})")
+        logger.debug("📤 Synced message %s to Supabase (status: %s)", message.id, result.data is not None)
         return True
-    except Exception as e:
-        import traceback
-        print(f"⚠️ Failed to sync message {message.id}: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.warning("⚠️ Failed to sync message %s", message.id, exc_info=True)
         return False
 
 
+@_instrumented("sync_case_submission")
 def sync_case_submission_to_supabase(case_submission) -> bool:
     """
     Sync a case submission to Supabase
@@ -104,81 +285,15 @@ def sync_case_submission_to_supabase(case_submission) -> bool:
         return False
     
     try:
-        data = {
-            "id": str(case_submission.id),
-            "conversation_id": str(case_submission.conversation_id),
-            "submitted_at": case_submission.submitted_at.isoformat(),
-            
-            # Urgency
-            "urgency_score": case_submission.urgency_score,
-            "urgency_reasoning": case_submission.urgency_reasoning,
-            
-            # Personal
-            "full_name": case_submission.full_name,
-            "date_of_birth": case_submission.date_of_birth.isoformat() if case_submission.date_of_birth else None,
-            "age": case_submission.age,
-            "phone_number": case_submission.phone_number,
-            "email": case_submission.email,
-            
-            # Household
-            "household_size": case_submission.household_size,
-            "household_members": case_submission.household_members,
-            "has_children": case_submission.has_children,
-            
-            # Financial
-            "monthly_income": case_submission.monthly_income,
-            "income_sources": case_submission.income_sources,
-            "total_assets": case_submission.total_assets,
-            "monthly_expenses": case_submission.monthly_expenses,
-            "monthly_rent": case_submission.monthly_rent,
-            
-            # Employment
-            "employment_status": case_submission.employment_status,
-            "current_employer": case_submission.current_employer,
-            "job_title": case_submission.job_title,
-            "employment_duration": case_submission.employment_duration,
-            
-            # Housing
-            "housing_situation": case_submission.housing_situation,
-            "address": case_submission.address,
-            "at_risk_of_homelessness": case_submission.at_risk_of_homelessness,
-            
-            # Health
-            "has_disability": case_submission.has_disability,
-            "disability_details": case_submission.disability_details,
-            "has_medical_expenses": case_submission.has_medical_expenses,
-            "monthly_medical_costs": case_submission.monthly_medical_costs,
-            "has_health_insurance": case_submission.has_health_insurance,
-            
-            # Legal
-            "citizenship_status": case_submission.citizenship_status,
-            "immigration_status": case_submission.immigration_status,
-            
-            # Benefits
-            "current_benefits": case_submission.current_benefits,
-            
-            # Emergency
-            "has_emergency_needs": case_submission.has_emergency_needs,
-            "emergency_details": case_submission.emergency_details,
-            
-            # AI Generated
-            "structured_summary": case_submission.structured_summary,
-            "ai_summary": case_submission.ai_summary,
-            "recommended_programs": case_submission.recommended_programs,
-            "recommended_actions": case_submission.recommended_actions,
-            
-            # Additional
-            "additional_data": case_submission.additional_data,
-        }
-        
-        supabase.table("case_submissions").upsert(data).execute()
-        print(f"📤 Synced case submission {case_submission.id} to Supabase")
+        sent = _sync_row(supabase, "case_submissions", case_submission, case_submission_payload(case_submission))
+        logger.info("📤 Synced case submission %s to Supabase (%s)", case_submission.id, sent)
         return True
-    except Exception as e:
-        print(f"⚠️ Failed to sync case submission: {e}")
+    except Exception:
+        logger.warning("⚠️ Failed to sync case submission %s", case_submission.id, exc_info=True)
         return False
 
 
+@_instrumented("bulk_sync_conversation_with_messages")
 def bulk_sync_conversation_with_messages(conversation) -> bool:
     """
     Efficiently sync a conversation with all its messages
@@ -201,12 +316,35 @@ def bulk_sync_conversation_with_messages(conversation) -> bool:
         if hasattr(conversation, 'case_submission'):
             sync_case_submission_to_supabase(conversation.case_submission)
         
-        print(f"✅ Fully synced conversation {conversation.id} with {len(messages)} messages")
+        logger.info("✅ Fully synced conversation %s with %d messages", conversation.id, len(messages))
+        return True
+    except Exception:
+        logger.warning("⚠️ Failed to bulk sync conversation %s", conversation.id, exc_info=True)
+        return False
+
+
+@_instrumented("sync_turn")
+def sync_turn_to_supabase(turn) -> bool:
+    """
+    Post-commit hook for a TurnUnitOfWork: mirror the rows one chat turn wrote
+    Messages go up in a single upsert; a completed intake gets a full sync
+    """
+    if turn.case_submission is not None:
+        return bulk_sync_conversation_with_messages(turn.conversation)
+    
+    supabase = get_supabase_client()
+    if not supabase:
+        logger.warning("⚠️ Turn for conversation %s NOT synced to Supabase", turn.conversation.id)
+        return False
+    
+    try:
+        _sync_row(supabase, "conversations", turn.conversation, conversation_payload(turn.conversation))
+        if turn.messages:
+            supabase.table("messages").upsert([message_payload(message) for message in turn.messages]).execute()
+        logger.debug("📤 Synced turn for conversation %s (%d messages)", turn.conversation.id, len(turn.messages))
         return True
-    except Exception as e:
-        import traceback
-        print(f"⚠️ Failed to bulk sync: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.warning("⚠️ Turn for conversation %s NOT synced to Supabase", turn.conversation.id, exc_info=True)
         return False
 
 
@@ -215,19 +353,140 @@ def test_supabase_connection() -> bool:
     Test Supabase connection at startup
     Returns True if connection is working, False otherwise
     """
-    print("🔌 Testing Supabase connection...")
+    logger.info("🔌 Testing Supabase connection...")
     supabase = get_supabase_client()
     if not supabase:
-        print("❌ Supabase connection test FAILED: Could not create client")
+        logger.error("❌ Supabase connection test FAILED: could not create client")
         return False
     
     try:
         # Try a simple query
         result = supabase.table("conversations").select("id").limit(1).execute()
-        print(f"✅ Supabase connection test PASSED (found {len(result.data)} conversations)")
+        logger.info("✅ Supabase connection test PASSED (found %d conversations)", len(result.data))
+        return True
+    except Exception:
+        logger.error("❌ Supabase connection test FAILED", exc_info=True)
+        return False
+
+
+# ============================================
+# ASYNC CLIENT
+# ============================================
+# Used by the ASGI views so Supabase round-trips don't block a worker thread.
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+async def get_async_supabase_client() -> Optional[AsyncClient]:
+    """
+    Get the async Supabase client for the running event loop
+    Created once per loop and reused, so its connection pool is shared
+    """
+    if not SUPABASE_KEY:
+        logger.debug("Supabase not available: missing SUPABASE_ANON_KEY")
+        return None
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        try:
+            client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+        except Exception:
+            logger.warning("⚠️ Async Supabase client creation failed", exc_info=True)
+            return None
+        _async_clients[loop] = client
+        logger.info("✅ Async Supabase client created (URL: %s...)", SUPABASE_URL[:30])
+    return client
+
+
+async def _upsert_async(table: str, data: Any, label: str) -> bool:
+    supabase = await get_async_supabase_client()
+    if not supabase:
+        logger.warning("⚠️ Supabase client not available - cannot sync %s", label)
+        return False
+
+    try:
+        await supabase.table(table).upsert(data).execute()
+        logger.debug("📤 Synced %s to Supabase", label)
         return True
-    except Exception as e:
-        import traceback
-        print(f"❌ Supabase connection test FAILED: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.warning("⚠️ Failed to sync %s", label, exc_info=True)
         return False
+
+
+async def _sync_row_async(table: str, instance, payload: Dict[str, Any], label: str) -> bool:
+    """Async variant of _sync_row"""
+    supabase = await get_async_supabase_client()
+    if not supabase:
+        logger.warning("⚠️ Supabase client not available - cannot sync %s", label)
+        return False
+
+    try:
+        action, data = await sync_to_async(_plan_row_sync)(instance, payload)
+        if action == "patch":
+            result = await supabase.table(table).update(data).eq("id", payload["id"]).execute()
+            if not result.data:
+                action, data = "upsert", payload
+        if action == "upsert":
+            await supabase.table(table).upsert(payload).execute()
+        await sync_to_async(_record_sync)(instance, action, payload, data)
+        logger.debug("📤 Synced %s to Supabase (%s)", label, _describe(action, data))
+        return True
+    except Exception:
+        logger.warning("⚠️ Failed to sync %s", label, exc_info=True)
+        return False
+
+
+@_instrumented("sync_conversation")
+async def sync_conversation_to_supabase_async(conversation) -> bool:
+    """Async variant of sync_conversation_to_supabase"""
+    return await _sync_row_async("conversations", conversation, conversation_payload(conversation), f"conversation {conversation.id}")
+
+
+@_instrumented("sync_message")
+async def sync_message_to_supabase_async(message) -> bool:
+    """Async variant of sync_message_to_supabase"""
+    return await _upsert_async("messages", message_payload(message), f"message {message.id}")
+
+
+@_instrumented("sync_case_submission")
+async def sync_case_submission_to_supabase_async(case_submission) -> bool:
+    """Async variant of sync_case_submission_to_supabase"""
+    return await _sync_row_async("case_submissions", case_submission, case_submission_payload(case_submission), f"case submission {case_submission.id}")
+
+
+@_instrumented("bulk_sync_conversation_with_messages")
+async def bulk_sync_conversation_with_messages_async(conversation) -> bool:
+    """
+    Async variant of bulk_sync_conversation_with_messages
+    Messages go up in a single upsert instead of one request each
+    """
+    from .models import CaseSubmission
+
+    messages = [message_payload(message) async for message in conversation.messages.all()]
+    synced = await sync_conversation_to_supabase_async(conversation)
+    if messages:
+        synced = await _upsert_async("messages", messages, f"{len(messages)} messages") and synced
+
+    case_submission = await CaseSubmission.objects.filter(conversation=conversation).afirst()
+    if case_submission:
+        synced = await sync_case_submission_to_supabase_async(case_submission) and synced
+
+    if synced:
+        logger.info("✅ Fully synced conversation %s with %d messages", conversation.id, len(messages))
+    return synced
+
+
+@_instrumented("sync_turn")
+async def sync_turn_to_supabase_async(turn) -> bool:
+    """Async variant of sync_turn_to_supabase"""
+    if turn.case_submission is not None:
+        return await bulk_sync_conversation_with_messages_async(turn.conversation)
+
+    synced = await sync_conversation_to_supabase_async(turn.conversation)
+    if turn.messages:
+        messages = [message_payload(message) for message in turn.messages]
+        synced = await _upsert_async("messages", messages, f"{len(messages)} messages") and synced
+    if not synced:
+        logger.warning("⚠️ Turn for conversation %s NOT synced to Supabase", turn.conversation.id)
+    return synced
@@ -0,0 +1,187 @@
+"""
+Incremental bulk sync of local tables to Supabase
+Rows are streamed with .iterator() in (high-water mark, id) order, upserted
+in batches of hundreds with a bounded number of requests in flight, and a
+checkpoint file records how far each table got. Reruns only send rows past
+the checkpoint, and an interrupted run resumes where it stopped.
+"""
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.db.models import Model, Q, QuerySet
+
+from chatbot.models import CaseSubmission, Conversation, Message
+from chatbot.supabase_sync import case_submission_payload, conversation_payload, message_payload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".supabase_sync_checkpoint.json")
+UPSERT_ATTEMPTS = 3
+
+# (watermark value, primary key) of the last row a table has synced up to
+Position = Tuple[datetime, str]
+
+
+class SyncTable(NamedTuple):
+    """A local model mirrored to a Supabase table, ordered by ``watermark``."""
+
+    name: str
+    model: type
+    watermark: str
+    payload: Callable[[Model], Dict[str, Any]]
+
+
+# Parents first so foreign keys exist by the time child rows arrive.
+# Messages are never edited, so created_at is their high-water mark.
+SYNC_TABLES: List[SyncTable] = [
+    SyncTable("conversations", Conversation, "updated_at", conversation_payload),
+    SyncTable("messages", Message, "created_at", message_payload),
+    SyncTable("case_submissions", CaseSubmission, "submitted_at", case_submission_payload),
+]
+
+
+class SyncError(Exception):
+    """A batch kept failing; the checkpoint holds the last fully synced position."""
+
+
+class SyncCheckpoint:
+    """Per-table sync positions persisted as JSON, rewritten atomically on every advance."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self._positions: Dict[str, Dict[str, str]] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._positions = json.load(f).get("tables", {})
+
+    def position(self, table: str) -> Optional[Position]:
+        entry = self._positions.get(table)
+        if not entry:
+            return None
+        return datetime.fromisoformat(entry["watermark"]), entry["last_id"]
+
+    def advance(self, table: str, position: Position) -> None:
+        watermark, last_id = position
+        self._positions[table] = {"watermark": watermark.isoformat(), "last_id": last_id}
+        self._save()
+
+    def reset(self) -> None:
+        self._positions = {}
+        self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"version": 1, "tables": self._positions}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def changed_rows(table: SyncTable, position: Optional[Position]) -> QuerySet:
+    """Rows after ``position`` in (watermark, pk) order; keyset paging keeps resumes exact."""
+    rows = table.model.objects.order_by(table.watermark, "pk")
+    if position is None:
+        return rows
+    watermark, last_id = position
+    return rows.filter(
+        Q(**{f"{table.watermark}__gt": watermark})
+        | Q(**{table.watermark: watermark, "pk__gt": last_id})
+    )
+
+
+def _batches(rows: Iterator[Model], batch_size: int) -> Iterator[List[Model]]:
+    batch: List[Model] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_batch(supabase, table: str, payload: List[Dict[str, Any]]) -> None:
+    for attempt in range(UPSERT_ATTEMPTS):
+        try:
+            supabase.table(table).upsert(payload).execute()
+            return
+        except Exception:
+            if attempt == UPSERT_ATTEMPTS - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def sync_table(
+    supabase,
+    table: SyncTable,
+    checkpoint: SyncCheckpoint,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, int]:
+    """
+    Upsert every row of ``table`` past its checkpoint.
+    At most ``workers`` batches are in flight. Batches are settled oldest
+    first, so the checkpoint only ever moves past rows whose batch and every
+    earlier batch have been written.
+    """
+    stats = {"rows": 0, "batches": 0}
+    rows = changed_rows(table, checkpoint.position(table.name)).iterator(chunk_size=batch_size)
+    in_flight: Deque[Tuple[Future, Position, int]] = deque()
+
+    def settle_oldest() -> None:
+        future, position, count = in_flight.popleft()
+        try:
+            future.result()
+        except Exception as e:
+            raise SyncError(f"{table.name}: batch ending at {position[1]} failed: {e}") from e
+        checkpoint.advance(table.name, position)
+        stats["rows"] += count
+        stats["batches"] += 1
+        if stats["batches"] % 10 == 0:
+            logger.info("… %s: %d rows", table.name, stats["rows"])
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"sync-{table.name}") as pool:
+        try:
+            for batch in _batches(rows, batch_size):
+                last = batch[-1]
+                position = (getattr(last, table.watermark), str(last.pk))
+                payload = [table.payload(row) for row in batch]
+                in_flight.append((pool.submit(upsert_batch, supabase, table.name, payload), position, len(batch)))
+                if len(in_flight) >= workers:
+                    settle_oldest()
+            while in_flight:
+                settle_oldest()
+        except SyncError:
+            # Let requests already sent finish, but don't record them: an earlier batch failed
+            for future, _, _ in in_flight:
+                future.cancel()
+            raise
+
+    return stats
+
+
+def sync_to_supabase(
+    supabase,
+    checkpoint: SyncCheckpoint,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    tables: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, int]]:
+    """Sync each table in SYNC_TABLES order (optionally only ``tables``)."""
+    results: Dict[str, Dict[str, int]] = {}
+    for table in SYNC_TABLES:
+        if tables and table.name not in tables:
+            continue
+        logger.info("📤 Syncing %s...", table.name)
+        results[table.name] = sync_table(supabase, table, checkpoint, batch_size, workers)
+        logger.info("✅ %s: %d rows in %d batches", table.name, results[table.name]["rows"], results[table.name]["batches"])
+    return results
@@ -0,0 +1,291 @@
+"""
+Job-based chat turns (202 Accepted + poll / long-poll)
+A POST stores the user message as a queued ChatTurn and returns at once; a
+worker pool runs the Watson pipeline off the request path and records the
+reply on the turn. Clients poll the turn, optionally holding the request open
+until it finishes. Turns of one conversation always land on the same worker
+thread, so they are processed strictly in the order they were queued.
+
+Turns also back Idempotency-Key support: a retried request carrying the same
+key finds the turn its first attempt created and joins or replays it instead
+of storing the message a second time.
+"""
+import asyncio
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from app.Backend.tracing import ensure_trace
+
+from .models import ChatTurn, Conversation
+
+logger = logging.getLogger(__name__)
+
+# Runs one user message through the intake pipeline and returns the reply fields
+TurnHandler = Callable[[Conversation, str], Dict[str, Any]]
+AsyncTurnHandler = Callable[[Conversation, str], Awaitable[Dict[str, Any]]]
+
+# Turns still "running" this long after they started were cut off by a restart
+STALE_RUNNING_SECONDS = 600
+
+# Long-poll requests re-read the turn at least this often, so they also pick up
+# turns finished by another process (whose wakeups never reach this one)
+POLL_INTERVAL_SECONDS = 1.0
+
+
+class TurnWaiters:
+    """Wakes long-poll requests in this process when a turn finishes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+
+    def _add(self, turn_id: str, callback: Callable[[], None]) -> None:
+        with self._lock:
+            self._callbacks.setdefault(turn_id, []).append(callback)
+
+    def _remove(self, turn_id: str, callback: Callable[[], None]) -> None:
+        with self._lock:
+            callbacks = self._callbacks.get(turn_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._callbacks.pop(turn_id, None)
+
+    def wait(self, turn_id: str, timeout: float) -> None:
+        """Block the calling thread until the turn is notified or timeout passes."""
+        event = threading.Event()
+        self._add(turn_id, event.set)
+        try:
+            event.wait(timeout)
+        finally:
+            self._remove(turn_id, event.set)
+
+    async def await_turn(self, turn_id: str, timeout: float) -> None:
+        """Async counterpart of wait(); never blocks the event loop."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        self._add(turn_id, wake)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._remove(turn_id, wake)
+
+    def notify(self, turn_id: str) -> None:
+        with self._lock:
+            callbacks = self._callbacks.pop(turn_id, [])
+        for callback in callbacks:
+            callback()
+
+
+waiters = TurnWaiters()
+
+
+class TurnWorkerPool:
+    """
+    Sharded worker threads for queued chat turns.
+    Each shard is a single-thread executor and a conversation always hashes to
+    the same shard, which gives per-conversation ordering without locks while
+    different conversations run in parallel.
+    """
+
+    def __init__(self, handler: TurnHandler, workers: int = 8):
+        self._handler = handler
+        self._shards = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"chat-turn-{index}")
+            for index in range(max(1, workers))
+        ]
+
+    def _shard(self, conversation_id: Any) -> ThreadPoolExecutor:
+        key = zlib.crc32(str(conversation_id).encode())
+        return self._shards[key % len(self._shards)]
+
+    def submit(self, turn: ChatTurn) -> None:
+        self._shard(turn.conversation_id).submit(self._process, turn.id)
+
+    def _process(self, turn_id: Any) -> None:
+        close_old_connections()
+        try:
+            # Claim the turn; another process may already have picked it up
+            claimed = ChatTurn.objects.filter(pk=turn_id, status=ChatTurn.QUEUED).update(
+                status=ChatTurn.RUNNING, started_at=timezone.now()
+            )
+            if not claimed:
+                return
+
+            execute_turn(ChatTurn.objects.select_related('conversation').get(pk=turn_id), self._handler)
+        finally:
+            close_old_connections()
+
+    def recover(self) -> int:
+        """
+        Re-queue turns left behind by a previous process.
+        Turns stuck in "running" past STALE_RUNNING_SECONDS are failed rather
+        than replayed, since their user message may already have been handled.
+        """
+        now = timezone.now()
+        ChatTurn.objects.filter(
+            status=ChatTurn.RUNNING,
+            started_at__lt=now - timedelta(seconds=STALE_RUNNING_SECONDS),
+        ).update(status=ChatTurn.FAILED, error='Interrupted by a server restart', finished_at=now)
+
+        queued = list(ChatTurn.objects.filter(status=ChatTurn.QUEUED).order_by('created_at'))
+        for turn in queued:
+            self.submit(turn)
+        if queued:
+            logger.info("🔄 Re-queued %d pending chat turns", len(queued))
+        return len(queued)
+
+
+def find_idempotent_turn(conversation: Conversation, idempotency_key: str) -> Optional[ChatTurn]:
+    """
+    The live turn holding this idempotency key, if any. Keys past
+    IDEMPOTENCY_KEY_TTL, and keys of failed turns, are released first so
+    those requests run again.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    ChatTurn.objects.filter(conversation=conversation, idempotency_key=idempotency_key).filter(
+        Q(created_at__lt=cutoff) | Q(status=ChatTurn.FAILED)
+    ).update(idempotency_key=None)
+    return ChatTurn.objects.filter(conversation=conversation, idempotency_key=idempotency_key).first()
+
+
+def claim_turn(
+    conversation: Conversation,
+    message: str,
+    idempotency_key: Optional[str] = None,
+    status: str = ChatTurn.QUEUED,
+) -> Tuple[ChatTurn, bool]:
+    """
+    Create a turn, or return the live turn already holding this idempotency key.
+    Returns (turn, created).
+    """
+    if idempotency_key:
+        existing = find_idempotent_turn(conversation, idempotency_key)
+        if existing:
+            return existing, False
+
+    try:
+        with transaction.atomic():
+            turn = ChatTurn.objects.create(
+                conversation=conversation,
+                message=message,
+                idempotency_key=idempotency_key or None,
+                status=status,
+                started_at=timezone.now() if status == ChatTurn.RUNNING else None,
+            )
+    except IntegrityError:
+        # A concurrent retry claimed the key between our lookup and insert
+        return ChatTurn.objects.get(conversation=conversation, idempotency_key=idempotency_key), False
+    return turn, True
+
+
+def _outcome(turn: ChatTurn, result: Optional[Dict[str, Any]], error: Optional[Exception]) -> Dict[str, Any]:
+    if error is not None:
+        logger.error("❌ Chat turn %s failed", turn.id, exc_info=error)
+        return {'status': ChatTurn.FAILED, 'error': str(error), 'finished_at': timezone.now()}
+    return {'status': ChatTurn.DONE, 'result': result, 'finished_at': timezone.now()}
+
+
+def execute_turn(turn: ChatTurn, handler: TurnHandler) -> ChatTurn:
+    """Run a claimed turn, store its outcome and wake anyone waiting on it."""
+    result, error = None, None
+    # Queued turns run on worker threads, outside any request's trace
+    with ensure_trace("chat turn"):
+        try:
+            result = handler(turn.conversation, turn.message)
+        except Exception as e:
+            error = e
+
+    fields = _outcome(turn, result, error)
+    try:
+        ChatTurn.objects.filter(pk=turn.pk).update(**fields)
+    finally:
+        waiters.notify(str(turn.id))
+    for name, value in fields.items():
+        setattr(turn, name, value)
+    return turn
+
+
+async def aexecute_turn(turn: ChatTurn, handler: AsyncTurnHandler) -> ChatTurn:
+    """Async counterpart of execute_turn()."""
+    result, error = None, None
+    with ensure_trace("chat turn"):
+        try:
+            result = await handler(turn.conversation, turn.message)
+        except Exception as e:
+            error = e
+
+    fields = _outcome(turn, result, error)
+    try:
+        await ChatTurn.objects.filter(pk=turn.pk).aupdate(**fields)
+    finally:
+        waiters.notify(str(turn.id))
+    for name, value in fields.items():
+        setattr(turn, name, value)
+    return turn
+
+
+def turn_payload(turn: ChatTurn) -> Dict[str, Any]:
+    """Response body for a turn; reply fields are only present once it is done."""
+    payload = {
+        'turn_id': str(turn.id),
+        'conversation_id': str(turn.conversation_id),
+        'status': turn.status,
+        'created_at': turn.created_at.isoformat(),
+        'started_at': turn.started_at.isoformat() if turn.started_at else None,
+        'finished_at': turn.finished_at.isoformat() if turn.finished_at else None,
+    }
+    if turn.status == ChatTurn.DONE:
+        payload.update(turn.result)
+    elif turn.status == ChatTurn.FAILED:
+        payload['error'] = turn.error
+    return payload
+
+
+def wait_seconds(raw: Optional[str], limit: float) -> float:
+    """Parse the ?wait= long-poll parameter, clamped to [0, limit]."""
+    try:
+        seconds = float(raw) if raw else 0.0
+    except ValueError:
+        return 0.0
+    return min(max(seconds, 0.0), limit)
+
+
+def wait_for_turn(turn: ChatTurn, timeout: float) -> ChatTurn:
+    """Hold a sync request until the turn finishes or timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not turn.is_finished:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        waiters.wait(str(turn.id), min(remaining, POLL_INTERVAL_SECONDS))
+        turn.refresh_from_db()
+    return turn
+
+
+async def await_turn(turn: ChatTurn, timeout: float) -> ChatTurn:
+    """Async counterpart of wait_for_turn()."""
+    deadline = time.monotonic() + timeout
+    while not turn.is_finished:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        await waiters.await_turn(str(turn.id), min(remaining, POLL_INTERVAL_SECONDS))
+        await turn.arefresh_from_db()
+    return turn
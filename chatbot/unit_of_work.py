@@ -0,0 +1,95 @@
+"""
+Unit of work for one chat turn
+A turn used to make several autocommit writes (user message, full-row
+conversation save, assistant message, case submission). The unit collects
+them in memory while Watson runs and writes them in one short transaction:
+messages with a single bulk_create, the conversation with update_fields.
+Post-commit hooks (e.g. Supabase sync) only ever see fully written turns.
+"""
+import inspect
+import logging
+from functools import partial
+from typing import Any, Callable, List, Optional, Set
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from .models import CaseSubmission, Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+# Called with the committed unit; may return an awaitable when committed via acommit()
+CommitHook = Callable[['TurnUnitOfWork'], Any]
+
+
+class TurnUnitOfWork:
+    """Pending writes of one chat turn, committed together."""
+
+    def __init__(self, conversation: Conversation):
+        self.conversation = conversation
+        self.messages: List[Message] = []
+        self.case_submission: Optional[CaseSubmission] = None
+        self._conversation_fields: Set[str] = set()
+        self._hooks: List[CommitHook] = []
+        self.committed = False
+
+    def add_message(self, role: str, content: str) -> Message:
+        message = Message(conversation=self.conversation, role=role, content=content)
+        self.messages.append(message)
+        return message
+
+    def update_conversation(self, **fields: Any) -> None:
+        for name, value in fields.items():
+            setattr(self.conversation, name, value)
+        self._conversation_fields.update(fields)
+
+    def add_case_submission(self, case_submission: CaseSubmission) -> CaseSubmission:
+        self.case_submission = case_submission
+        return case_submission
+
+    def after_commit(self, hook: CommitHook) -> None:
+        self._hooks.append(hook)
+
+    def _write(self) -> None:
+        if self.committed:
+            raise RuntimeError("Turn already committed")
+        with transaction.atomic():
+            if self.messages:
+                Message.objects.bulk_create(self.messages)
+            if self._conversation_fields:
+                # auto_now only refreshes updated_at when it is listed
+                self.conversation.save(update_fields=sorted(self._conversation_fields | {'updated_at'}))
+            if self.case_submission is not None:
+                self.case_submission.save(force_insert=True)
+        self.committed = True
+
+    def commit(self) -> 'TurnUnitOfWork':
+        """Write the turn in one transaction, then run the post-commit hooks."""
+        self._write()
+        for hook in self._hooks:
+            # Runs right away under autocommit, or once an enclosing transaction commits
+            transaction.on_commit(partial(self._run_hook, hook))
+        return self
+
+    async def acommit(self) -> 'TurnUnitOfWork':
+        """Async counterpart of commit(); awaitable hooks are awaited on the loop."""
+        await sync_to_async(self._write)()
+        for hook in self._hooks:
+            result = self._run_hook(hook)
+            if inspect.isawaitable(result):
+                try:
+                    await result
+                except Exception as e:
+                    self._hook_failed(e)
+        return self
+
+    def _run_hook(self, hook: CommitHook) -> Any:
+        # A failing hook must not undo or fail a turn that is already committed
+        try:
+            return hook(self)
+        except Exception as e:
+            self._hook_failed(e)
+            return None
+
+    def _hook_failed(self, error: Exception) -> None:
+        logger.warning("⚠️ Post-commit hook failed for conversation %s", self.conversation.id, exc_info=error)
@@ -1,27 +1,34 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import (
-    ConversationViewSet,
-    employee_login,
-    dashboard_cases,
-    dashboard_case_detail,
-    dashboard_conversations,
-    dashboard_conversation_detail,
-    dashboard_conversation_case,
-    dashboard_stats,
-)
+from . import async_views, views
+from .views import ConversationViewSet
 
 router = DefaultRouter()
 router.register(r'conversations', ConversationViewSet, basename='conversation')
 
-urlpatterns = [
+# Under ASGI the async variants replace their sync counterparts
+endpoints = async_views if settings.ASYNC_VIEWS else views
+
+urlpatterns = []
+if settings.ASYNC_VIEWS:
+    # Listed before the router so they take over the viewset's send_message and turns actions
+    urlpatterns += [
+        path('conversations/<str:pk>/send_message/', async_views.send_message, name='conversation-send-message-async'),
+        path('conversations/<str:pk>/turns/', async_views.enqueue_turn, name='conversation-turns-async'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
+    # Queued chat turns (202 Accepted flow)
+    path('turns/<str:turn_id>/', endpoints.turn_detail, name='chat-turn-detail'),
     # Dashboard endpoints
-    path('auth/login/', employee_login, name='employee-login'),
-    path('dashboard/cases/', dashboard_cases, name='dashboard-cases'),
-    path('dashboard/cases/<str:case_id>/', dashboard_case_detail, name='dashboard-case-detail'),
-    path('dashboard/conversations/', dashboard_conversations, name='dashboard-conversations'),
-    path('dashboard/conversations/<str:conversation_id>/', dashboard_conversation_detail, name='dashboard-conversation-detail'),
-    path('dashboard/conversations/<str:conversation_id>/case_summary/', dashboard_conversation_case, name='dashboard-conversation-case'),
-    path('dashboard/stats/', dashboard_stats, name='dashboard-stats'),
+    path('auth/login/', endpoints.employee_login, name='employee-login'),
+    path('dashboard/cases/', endpoints.dashboard_cases, name='dashboard-cases'),
+    path('dashboard/cases/<str:case_id>/', endpoints.dashboard_case_detail, name='dashboard-case-detail'),
+    path('dashboard/conversations/', endpoints.dashboard_conversations, name='dashboard-conversations'),
+    path('dashboard/conversations/<str:conversation_id>/', endpoints.dashboard_conversation_detail, name='dashboard-conversation-detail'),
+    path('dashboard/conversations/<str:conversation_id>/case_summary/', endpoints.dashboard_conversation_case, name='dashboard-conversation-case'),
+    path('dashboard/stats/', endpoints.dashboard_stats, name='dashboard-stats'),
+    path('dashboard/token_usage/', endpoints.dashboard_token_usage, name='dashboard-token-usage'),
 ]
@@ -1,31 +1,51 @@
 import sys
 import os
+import hmac
 import json
+import logging
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'Backend'))
 
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional, Tuple
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
 from django.http import HttpResponse, JsonResponse
-from .models import Conversation, Message, CaseSubmission
+from .models import Conversation, Message, CaseSubmission, ChatTurn
 from .serializers import ConversationSerializer, MessageSerializer
+from app.Backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS_REGISTRY
+from app.Backend.token_usage import rollup as token_usage_rollup
+from . import dashboard_queries
+from .unit_of_work import TurnUnitOfWork
+from .turns import (
+    TurnWorkerPool,
+    claim_turn,
+    execute_turn,
+    find_idempotent_turn,
+    turn_payload,
+    wait_for_turn,
+    wait_seconds,
+)
 from datetime import datetime
 
 # Import Supabase sync utilities
 from .supabase_sync import (
     sync_conversation_to_supabase,
-    sync_message_to_supabase,
-    sync_case_submission_to_supabase,
-    bulk_sync_conversation_with_messages,
+    sync_savings,
+    sync_turn_to_supabase,
     get_supabase_client,
 )
 
+logger = logging.getLogger(__name__)
+
 # Import the Watson Intake Assistant
 try:
     from app.Backend.watson_intake import WatsonIntakeAssistant
 except ImportError:
-    print("⚠️ Failed to import WatsonIntakeAssistant")
+    logger.warning("⚠️ Failed to import WatsonIntakeAssistant", exc_info=True)
     WatsonIntakeAssistant = None
 
 # Create a single shared Watson instance to maintain conversation state
@@ -36,12 +56,24 @@ def get_watson_instance():
     if _watson_instance is None and WatsonIntakeAssistant:
         try:
             _watson_instance = WatsonIntakeAssistant()
-            print("✅ Watson Intake Assistant initialized")
-        except Exception as e:
-            print(f"❌ Failed to initialize Watson: {e}")
+            logger.info("✅ Watson Intake Assistant initialized")
+        except Exception:
+            logger.exception("❌ Failed to initialize Watson")
             _watson_instance = None
     return _watson_instance
 
+# Worker threads for queued chat turns, started on first use
+_turn_pool = None
+_turn_pool_lock = threading.Lock()
+
+# Matches ChatTurn.idempotency_key
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+INTAKE_COMPLETE_RESPONSE = {
+    'is_complete': True,
+    'latest_message': 'Your intake is complete. A caseworker will contact you within 48 hours. Thank you!',
+    'questions_asked': 25,  # Indicate completion
+}
 
 
 
@@ -68,8 +100,8 @@ class ConversationViewSet(viewsets.ModelViewSet):
                 conversation_id = response.data.get('id')
                 conversation = Conversation.objects.get(id=conversation_id)
                 sync_conversation_to_supabase(conversation)
-            except Exception as e:
-                print(f"⚠️ Failed to sync new conversation: {e}")
+            except Exception:
+                logger.warning("⚠️ Failed to sync new conversation", exc_info=True)
         
         return response
     
@@ -79,6 +111,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
         Send a message in a conversation and continue intake process.
         Returns AI response + current progress.
         Automatically syncs to Supabase at key points.
+        Retries carrying the same Idempotency-Key join or replay the first attempt.
         """
         conversation = self.get_object()
         user_message = request.data.get('message', '')
@@ -89,227 +122,83 @@ class ConversationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # CRITICAL: If conversation is already complete, don't process new messages
-        if conversation.is_complete:
-            return Response(
-                {
-                    'is_complete': True,
-                    'latest_message': 'Your intake is complete. A caseworker will contact you within 48 hours. Thank you!',
-                    'questions_asked': 25,  # Indicate completion
-                },
-                status=status.HTTP_200_OK
-            )
-        
-        # Save user message
-        user_msg = Message.objects.create(
-            conversation=conversation,
-            role='user',
-            content=user_message
-        )
+        key, key_error = idempotency_key(request)
+        if key_error:
+            return Response({'error': key_error}, status=status.HTTP_400_BAD_REQUEST)
         
-        # CRITICAL: Always sync user message to Supabase immediately
-        user_sync_result = sync_message_to_supabase(user_msg)
-        if not user_sync_result:
-            print(f"⚠️ WARNING: User message {user_msg.id} NOT synced to Supabase!")
+        # A retried request joins (or replays) the turn its first attempt started
+        turn = find_idempotent_turn(conversation, key) if key else None
+        if turn:
+            return self._replay_turn(turn, user_message)
         
-        # Get Watson response
-        if self.watson:
-            try:
-                result = self.watson.send_message(str(conversation.id), user_message)
-                
-                assistant_message = result.get('watson_response', 'I understand.')
-                extracted_data = result.get('extracted_data', {})
-                is_complete = result.get('is_complete', False)
-                questions_asked = result.get('questions_asked', 0)
-                
-                # Update conversation status
-                conversation.is_complete = is_complete
-                conversation.save()
-                
-                # Sync conversation status update
-                sync_conversation_to_supabase(conversation)
-                
-                # If complete, generate case submission
-                if is_complete:
-                    # Check if submission already exists
-                    if not hasattr(conversation, 'case_submission'):
-                        self._create_case_submission(conversation, result)
-                        
-                        # CRITICAL: Sync complete conversation with all data to Supabase
-                        print("🔄 Conversation complete - syncing all data to Supabase...")
-                        bulk_sync_conversation_with_messages(conversation)
-                
-            except Exception as e:
-                print(f"❌ Watson error: {e}")
-                import traceback
-                traceback.print_exc()
-                assistant_message = "I'm having trouble processing that. Could you please try again?"
-                is_complete = False
-                questions_asked = 0
+        # CRITICAL: If conversation is already complete, don't process new messages
+        if conversation.is_complete:
+            return Response(INTAKE_COMPLETE_RESPONSE, status=status.HTTP_200_OK)
+        
+        if key:
+            turn, created = claim_turn(conversation, user_message, key, status=ChatTurn.RUNNING)
+            if not created:
+                return self._replay_turn(turn, user_message)
+            turn = execute_turn(turn, process_user_message)
+            if turn.status == ChatTurn.FAILED:
+                return Response(
+                    {'error': 'Failed to process message'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+            reply = turn.result
         else:
-            assistant_message = "Watson assistant is not available. Please check configuration."
-            is_complete = False
-            questions_asked = 0
-        
-        # Save assistant message
-        assistant_msg = Message.objects.create(
-            conversation=conversation,
-            role='assistant',
-            content=assistant_message
-        )
-        
-        # CRITICAL: Always sync assistant message to Supabase immediately
-        assistant_sync_result = sync_message_to_supabase(assistant_msg)
-        if not assistant_sync_result:
-            print(f"⚠️ WARNING: Assistant message {assistant_msg.id} NOT synced to Supabase!")
+            reply = process_user_message(conversation, user_message)
         
         # Return response with progress info
         serializer = self.get_serializer(conversation)
         response_data = serializer.data
-        response_data['is_complete'] = is_complete
-        response_data['questions_asked'] = questions_asked
-        response_data['latest_message'] = assistant_message
+        response_data.update(reply)
         
         return Response(response_data)
     
-    def _create_case_submission(self, conversation: Conversation, watson_result: Dict) -> CaseSubmission:
+    def _replay_turn(self, turn: ChatTurn, user_message: str) -> Response:
+        """Wait for a duplicate request's original turn, then answer with its reply."""
+        if turn.message == user_message:
+            turn = wait_for_turn(turn, settings.CHAT_TURN_MAX_WAIT)
+        payload, status_code = replayed_turn_response(turn, user_message)
+        return Response(payload, status=status_code, headers={'Idempotent-Replayed': 'true'})
+    
+    @action(detail=True, methods=['post'])
+    def turns(self, request, pk=None):
         """
-        Create a case submission from completed intake conversation.
-        Generates summary, urgency score, and recommendations.
+        Queue a message for processing and return 202 with a turn id right away.
+        Poll GET /turns/<turn_id>/?wait=<seconds> for the reply.
+        Re-posting with the same Idempotency-Key returns the existing turn.
         """
-        print(f"📝 Creating case submission for conversation {conversation.id}")
-        
-        # Generate comprehensive summary
-        summary_data = self.watson.generate_case_summary(str(conversation.id))
-        
-        extracted_data = summary_data.get('extracted_data', {})
-        personal = extracted_data.get('personal', {})
-        household = extracted_data.get('household', {})
-        employment = extracted_data.get('employment', {})
-        financial = extracted_data.get('financial', {})
-        housing = extracted_data.get('housing', {})
-        health = extracted_data.get('health', {})
-        legal = extracted_data.get('legal', {})
-        current_benefits = extracted_data.get('current_benefits', {})
-        emergency = extracted_data.get('emergency', {})
-
-        def safe_str(value: Any) -> str:
-            """Normalize optional string values so we never insert NULLs."""
-            if value is None:
-                return ''
-            if isinstance(value, str):
-                cleaned = value.strip()
-                return '' if cleaned.lower() == 'null' else cleaned
-            return str(value)
-
-        def safe_list(value: Any) -> list:
-            if isinstance(value, list):
-                return value
-            if isinstance(value, str):
-                cleaned = value.strip()
-                if cleaned.lower() in ('', 'null', 'none'):
-                    return []
-                try:
-                    parsed = json.loads(cleaned)
-                    if isinstance(parsed, list):
-                        return parsed
-                    if parsed in (None, '', 'null'):
-                        return []
-                    return [parsed]
-                except json.JSONDecodeError:
-                    return [cleaned]
-            return [] if value in (None, '', 'null') else [value]
-
-        def safe_dict(value: Any) -> dict:
-            if isinstance(value, dict):
-                return value
-            if isinstance(value, str):
-                cleaned = value.strip()
-                if cleaned.lower() in ('', 'null', 'none'):
-                    return {}
-                try:
-                    parsed = json.loads(cleaned)
-                    return parsed if isinstance(parsed, dict) else {}
-                except json.JSONDecodeError:
-                    return {}
-            return {}
+        conversation = self.get_object()
+        user_message = request.data.get('message', '')
         
-        # Parse date of birth if available
-        dob = None
-        dob_str = personal.get('date_of_birth')
-        if dob_str and dob_str != 'null':
-            try:
-                dob = datetime.strptime(dob_str, '%Y-%m-%d').date()
-            except:
-                pass
-        
-        # Create case submission
-        full_name = safe_str(personal.get('full_name'))
-        if not full_name:
-            full_name = safe_str(personal.get('first_name'))
-
-        case = CaseSubmission.objects.create(
-            conversation=conversation,
-            urgency_score=summary_data.get('urgency_score', 5),
-            urgency_reasoning=safe_str(summary_data.get('urgency_reasoning', '')),
-            
-            # Personal info
-            full_name=full_name[:255] if full_name else '',
-            date_of_birth=dob,
-            age=personal.get('age'),
-            phone_number=safe_str(personal.get('phone', ''))[:20],
-            email=safe_str(personal.get('email', ''))[:254],
-            
-            # Household
-            household_size=household.get('size'),
-            household_members=safe_list(household.get('members', [])),
-            has_children=household.get('has_children'),
-            
-            # Financial
-            monthly_income=financial.get('monthly_income'),
-            income_sources=safe_list(financial.get('income_sources', [])),
-            total_assets=financial.get('total_assets'),
-            monthly_expenses=safe_dict(financial.get('monthly_expenses', {})),
-            monthly_rent=financial.get('monthly_rent'),
-            
-            # Employment
-            employment_status=safe_str(employment.get('status', ''))[:50],
-            current_employer=safe_str(employment.get('employer', ''))[:255],
-            job_title=safe_str(employment.get('job_title', ''))[:255],
-            employment_duration=safe_str(employment.get('duration', ''))[:100],
-            
-            # Housing
-            housing_situation=safe_str(housing.get('status', ''))[:100],
-            address=safe_str(housing.get('address', '')),
-            at_risk_of_homelessness=bool(housing.get('at_risk_of_homelessness', False)),
-            
-            # Health
-            has_disability=health.get('has_disability'),
-            disability_details=safe_str(health.get('disability_details', '')),
-            has_medical_expenses=health.get('has_medical_expenses'),
-            monthly_medical_costs=health.get('monthly_medical_costs'),
-            has_health_insurance=health.get('has_insurance'),
-            
-            # Legal
-            citizenship_status=safe_str(legal.get('citizenship_status', ''))[:100],
-            immigration_status=safe_str(legal.get('immigration_status', ''))[:100],
-            
-            # Current benefits
-            current_benefits=safe_list(current_benefits.get('programs', [])),
-            
-            # Emergency
-            has_emergency_needs=bool(emergency.get('has_urgent_needs', False)),
-            emergency_details=safe_str(emergency.get('details', '')),
-            
-            # AI-generated content
-            structured_summary=safe_dict(extracted_data),
-            ai_summary=safe_str(summary_data.get('ai_summary', '')),
-            recommended_programs=safe_list(summary_data.get('recommended_programs', [])),
-            recommended_actions=safe_str(summary_data.get('recommended_actions', '')),
-        )
+        if not user_message:
+            return Response(
+                {'error': 'Message is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        key, key_error = idempotency_key(request)
+        if key_error:
+            return Response({'error': key_error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        turn = find_idempotent_turn(conversation, key) if key else None
+        if turn:
+            payload, status_code = existing_turn_response(turn, user_message)
+            return Response(payload, status=status_code, headers={'Idempotent-Replayed': 'true'})
+        
+        if conversation.is_complete:
+            return Response(INTAKE_COMPLETE_RESPONSE, status=status.HTTP_200_OK)
+        
+        turn, created = claim_turn(conversation, user_message, key)
+        if not created:
+            payload, status_code = existing_turn_response(turn, user_message)
+            return Response(payload, status=status_code, headers={'Idempotent-Replayed': 'true'})
+        get_turn_pool().submit(turn)
         
-        print(f"✅ Case submission created: {case.id} (Urgency: {case.urgency_score}/10)")
-        return case
+        payload = enqueue_turn_response(turn)
+        return Response(payload, status=status.HTTP_202_ACCEPTED, headers={'Location': payload['poll_url']})
     
     @action(detail=True, methods=['get'])
     def case_summary(self, request, pk=None):
@@ -445,10 +334,261 @@ class ConversationViewSet(viewsets.ModelViewSet):
         })
 
 
+# Normalizers for model output headed into CaseSubmission columns
+def safe_str(value: Any) -> str:
+    """Normalize optional string values so we never insert NULLs."""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        cleaned = value.strip()
+        return '' if cleaned.lower() == 'null' else cleaned
+    return str(value)
+
+
+def safe_list(value: Any) -> list:
+    """Coerce a list, a JSON-encoded list or a scalar to a list."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        cleaned = value.strip()
+        if cleaned.lower() in ('', 'null', 'none'):
+            return []
+        try:
+            parsed = json.loads(cleaned)
+            if isinstance(parsed, list):
+                return parsed
+            if parsed in (None, '', 'null'):
+                return []
+            return [parsed]
+        except json.JSONDecodeError:
+            return [cleaned]
+    return [] if value in (None, '', 'null') else [value]
+
+
+def safe_dict(value: Any) -> dict:
+    """Coerce a dict or a JSON-encoded object to a dict; anything else is empty."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        cleaned = value.strip()
+        if cleaned.lower() in ('', 'null', 'none'):
+            return {}
+        try:
+            parsed = json.loads(cleaned)
+            return parsed if isinstance(parsed, dict) else {}
+        except json.JSONDecodeError:
+            return {}
+    return {}
+
+
+def build_case_submission(conversation: Conversation, summary_data: Dict[str, Any]) -> CaseSubmission:
+    """
+    Turn a generated case summary into an unsaved CaseSubmission.
+    Shared by the sync and async send_message views, which save it as part
+    of the turn's unit of work.
+    """
+    extracted_data = summary_data.get('extracted_data', {})
+    personal = extracted_data.get('personal', {})
+    household = extracted_data.get('household', {})
+    employment = extracted_data.get('employment', {})
+    financial = extracted_data.get('financial', {})
+    housing = extracted_data.get('housing', {})
+    health = extracted_data.get('health', {})
+    legal = extracted_data.get('legal', {})
+    current_benefits = extracted_data.get('current_benefits', {})
+    emergency = extracted_data.get('emergency', {})
+
+    # Parse date of birth if available
+    dob = None
+    dob_str = personal.get('date_of_birth')
+    if dob_str and dob_str != 'null':
+        try:
+            dob = datetime.strptime(dob_str, '%Y-%m-%d').date()
+        except:
+            pass
+    
+    # Create case submission
+    full_name = safe_str(personal.get('full_name'))
+    if not full_name:
+        full_name = safe_str(personal.get('first_name'))
+
+    return CaseSubmission(
+        conversation=conversation,
+        urgency_score=summary_data.get('urgency_score', 5),
+        urgency_reasoning=safe_str(summary_data.get('urgency_reasoning', '')),
+        
+        # Personal info
+        full_name=full_name[:255] if full_name else '',
+        date_of_birth=dob,
+        age=personal.get('age'),
+        phone_number=safe_str(personal.get('phone', ''))[:20],
+        email=safe_str(personal.get('email', ''))[:254],
+        
+        # Household
+        household_size=household.get('size'),
+        household_members=safe_list(household.get('members', [])),
+        has_children=household.get('has_children'),
+        
+        # Financial
+        monthly_income=financial.get('monthly_income'),
+        income_sources=safe_list(financial.get('income_sources', [])),
+        total_assets=financial.get('total_assets'),
+        monthly_expenses=safe_dict(financial.get('monthly_expenses', {})),
+        monthly_rent=financial.get('monthly_rent'),
+        
+        # Employment
+        employment_status=safe_str(employment.get('status', ''))[:50],
+        current_employer=safe_str(employment.get('employer', ''))[:255],
+        job_title=safe_str(employment.get('job_title', ''))[:255],
+        employment_duration=safe_str(employment.get('duration', ''))[:100],
+        
+        # Housing
+        housing_situation=safe_str(housing.get('status', ''))[:100],
+        address=safe_str(housing.get('address', '')),
+        at_risk_of_homelessness=bool(housing.get('at_risk_of_homelessness', False)),
+        
+        # Health
+        has_disability=health.get('has_disability'),
+        disability_details=safe_str(health.get('disability_details', '')),
+        has_medical_expenses=health.get('has_medical_expenses'),
+        monthly_medical_costs=health.get('monthly_medical_costs'),
+        has_health_insurance=health.get('has_insurance'),
+        
+        # Legal
+        citizenship_status=safe_str(legal.get('citizenship_status', ''))[:100],
+        immigration_status=safe_str(legal.get('immigration_status', ''))[:100],
+        
+        # Current benefits
+        current_benefits=safe_list(current_benefits.get('programs', [])),
+        
+        # Emergency
+        has_emergency_needs=bool(emergency.get('has_urgent_needs', False)),
+        emergency_details=safe_str(emergency.get('details', '')),
+        
+        # AI-generated content
+        structured_summary=safe_dict(extracted_data),
+        ai_summary=safe_str(summary_data.get('ai_summary', '')),
+        recommended_programs=safe_list(summary_data.get('recommended_programs', [])),
+        recommended_actions=safe_str(summary_data.get('recommended_actions', '')),
+        
+        # Prompt versions, rule-based eligibility screening and watsonx token usage for this intake
+        additional_data={
+            'prompt_versions': summary_data.get('prompt_versions', {}),
+            'eligibility': summary_data.get('eligibility', {}),
+            'token_usage': summary_data.get('token_usage', {}),
+        },
+    )
+
+
+def process_user_message(conversation: Conversation, user_message: str) -> Dict[str, Any]:
+    """
+    Run one user message through the intake pipeline: get Watson's reply and,
+    once intake completes, the case submission. All of the turn's rows are
+    written in one transaction and synced to Supabase after it commits.
+    Shared by the send_message view and the chat turn workers.
+    """
+    turn = TurnUnitOfWork(conversation)
+    turn.add_message('user', user_message)
+    turn.after_commit(sync_turn_to_supabase)
+    
+    # Get Watson response
+    watson = get_watson_instance()
+    if watson:
+        try:
+            result = watson.send_message(str(conversation.id), user_message)
+            
+            assistant_message = result.get('watson_response', 'I understand.')
+            is_complete = result.get('is_complete', False)
+            questions_asked = result.get('questions_asked', 0)
+            
+            # Update conversation status
+            turn.update_conversation(is_complete=is_complete)
+            
+            # If complete, generate case submission
+            if is_complete:
+                # Check if submission already exists
+                if not CaseSubmission.objects.filter(conversation=conversation).exists():
+                    logger.info("📝 Creating case submission for conversation %s", conversation.id)
+                    summary_data = watson.generate_case_summary(str(conversation.id))
+                    turn.add_case_submission(build_case_submission(conversation, summary_data))
+            
+        except Exception as e:
+            logger.error("❌ Watson error: %s", e, exc_info=True)
+            assistant_message = "I'm having trouble processing that. Could you please try again?"
+            is_complete = False
+            questions_asked = 0
+    else:
+        assistant_message = "Watson assistant is not available. Please check configuration."
+        is_complete = False
+        questions_asked = 0
+    
+    turn.add_message('assistant', assistant_message)
+    turn.commit()
+    if turn.case_submission:
+        logger.info("✅ Case submission created: %s (urgency %s/10)", turn.case_submission.id, turn.case_submission.urgency_score)
+    
+    return {
+        'is_complete': is_complete,
+        'questions_asked': questions_asked,
+        'latest_message': assistant_message,
+    }
+
+
+def get_turn_pool() -> TurnWorkerPool:
+    """Start the chat turn workers on first use, picking up turns left queued by a restart."""
+    global _turn_pool
+    with _turn_pool_lock:
+        if _turn_pool is None:
+            _turn_pool = TurnWorkerPool(process_user_message, settings.CHAT_TURN_WORKERS)
+            _turn_pool.recover()
+    return _turn_pool
+
+
+def enqueue_turn_response(turn: ChatTurn) -> Dict[str, Any]:
+    """202 body for a freshly queued turn, pointing the client at its poll URL."""
+    payload = turn_payload(turn)
+    payload['poll_url'] = reverse('chat-turn-detail', args=[turn.id])
+    return payload
+
+
+def idempotency_key(request) -> Tuple[Optional[str], Optional[str]]:
+    """Read the Idempotency-Key header; returns (key, error message)."""
+    key = request.headers.get('Idempotency-Key', '').strip()
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return None, f'Idempotency-Key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'
+    return key or None, None
+
+
+def existing_turn_response(turn: ChatTurn, user_message: str) -> Tuple[Dict[str, Any], int]:
+    """Body and status for a turns POST whose Idempotency-Key matched an earlier turn."""
+    if turn.message != user_message:
+        return {'error': 'Idempotency-Key was already used with a different message'}, 422
+    return enqueue_turn_response(turn), 200 if turn.is_finished else 202
+
+
+def replayed_turn_response(turn: ChatTurn, user_message: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Body and status for a send_message retry whose Idempotency-Key matched an
+    earlier turn: the stored reply once done, otherwise 202 with its poll URL.
+    """
+    if turn.message != user_message:
+        return {'error': 'Idempotency-Key was already used with a different message'}, 422
+    if turn.status == ChatTurn.FAILED:
+        return {'error': 'Failed to process message'}, 500
+    if turn.status != ChatTurn.DONE:
+        return enqueue_turn_response(turn), 202
+    
+    conversation = Conversation.objects.get(pk=turn.conversation_id)
+    payload = ConversationSerializer(conversation).data
+    payload.update(turn.result)
+    return payload, 200
+
+
 # Dashboard API Views for Caseworkers
 
 from rest_framework.decorators import api_view
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from django.contrib.auth.hashers import make_password, check_password
 
 
@@ -456,9 +596,44 @@ from django.contrib.auth.hashers import make_password, check_password
 def healthz(request):
     """
     Simple health check endpoint for uptime monitors (Render, UptimeRobot, etc.)
-    Returns 200 OK when the Django app is responsive.
+    Returns 200 OK when the Django app is responsive, plus Supabase sync
+    savings. Conversation lock contention is on the token-gated /metrics.
+    """
+    return Response({'status': 'ok', 'supabase_sync': sync_savings()})
+
+
+@require_GET
+def metrics(request):
     """
-    return Response({'status': 'ok'})
+    Prometheus scrape endpoint for the intake pipeline (app/Backend/metrics.py).
+    Scrapers must send settings.METRICS_TOKEN as a bearer token; without a
+    token configured the endpoint does not exist.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        return HttpResponse('Not Found\n', status=404, content_type='text/plain')
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(METRICS_REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@api_view(['GET'])
+def turn_detail(request, turn_id):
+    """
+    Status of a queued chat turn; includes the reply once it is done.
+    ?wait=<seconds> long-polls until the turn finishes (capped by CHAT_TURN_MAX_WAIT).
+    Returns 200 once the turn is done or failed, 202 while it is still pending.
+    """
+    try:
+        turn = ChatTurn.objects.get(pk=turn_id)
+    except (ChatTurn.DoesNotExist, ValidationError):
+        return Response({'error': 'Turn not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    turn = wait_for_turn(turn, wait_seconds(request.GET.get('wait'), settings.CHAT_TURN_MAX_WAIT))
+    return Response(
+        turn_payload(turn),
+        status=status.HTTP_200_OK if turn.is_finished else status.HTTP_202_ACCEPTED
+    )
 
 
 @api_view(['POST'])
@@ -485,7 +660,7 @@ def employee_login(request):
     
     try:
         # Query employee from Supabase
-        result = supabase.table('employees').select('*').eq('email', email).eq('is_active', True).execute()
+        result = dashboard_queries.employee_query(supabase, email).execute()
         
         if not result.data or len(result.data) == 0:
             return Response(
@@ -510,10 +685,8 @@ def employee_login(request):
                 {'error': 'Invalid email or password'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-    except Exception as e:
-        print(f"❌ Login error: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Login error")
         return Response(
             {'error': 'Authentication failed'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -539,25 +712,14 @@ def dashboard_cases(request):
         order = request.GET.get('order', 'desc')
         search = request.GET.get('search', '').strip()
         
-        # Build query
-        query = supabase.table('case_submissions').select('*')
-        
-        # Apply search filter if provided
-        if search:
-            query = query.or_(f'full_name.ilike.%{search}%,email.ilike.%{search}%')
-        
-        # Apply sorting
-        ascending = (order == 'asc')
-        query = query.order(sort_by, desc=not ascending)
-        
-        result = query.execute()
+        result = dashboard_queries.cases_query(supabase, sort_by, order, search).execute()
         
         return Response({
             'total_cases': len(result.data),
             'cases': result.data
         })
-    except Exception as e:
-        print(f"❌ Dashboard cases error: {e}")
+    except Exception:
+        logger.exception("❌ Dashboard cases error")
         return Response(
             {'error': 'Failed to fetch cases'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -578,7 +740,7 @@ def dashboard_case_detail(request, case_id):
     
     try:
         # Get case submission
-        case_result = supabase.table('case_submissions').select('*').eq('id', case_id).execute()
+        case_result = dashboard_queries.case_query(supabase, case_id).execute()
         
         if not case_result.data:
             return Response(
@@ -590,18 +752,18 @@ def dashboard_case_detail(request, case_id):
         conversation_id = case['conversation_id']
         
         # Get conversation
-        conv_result = supabase.table('conversations').select('*').eq('id', conversation_id).execute()
+        conv_result = dashboard_queries.conversation_query(supabase, conversation_id).execute()
         
         # Get messages
-        messages_result = supabase.table('messages').select('*').eq('conversation_id', conversation_id).order('created_at').execute()
+        messages_result = dashboard_queries.conversation_messages_query(supabase, conversation_id).execute()
         
         return Response({
             'case': case,
             'conversation': conv_result.data[0] if conv_result.data else None,
             'messages': messages_result.data
         })
-    except Exception as e:
-        print(f"❌ Case detail error: {e}")
+    except Exception:
+        logger.exception("❌ Case detail error")
         return Response(
             {'error': 'Failed to fetch case details'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -624,27 +786,14 @@ def dashboard_conversations(request):
         # Get query parameters
         is_complete = request.GET.get('is_complete', None)
         
-        # Build query
-        query = supabase.table('conversations').select('*')
-        
-        # Filter by completion status if specified
-        if is_complete is not None:
-            is_complete_bool = is_complete.lower() == 'true'
-            query = query.eq('is_complete', is_complete_bool)
-        
-        # Sort by most recent first
-        query = query.order('created_at', desc=True)
-        
-        result = query.execute()
+        result = dashboard_queries.conversations_query(supabase, is_complete).execute()
         
         return Response({
             'total_conversations': len(result.data) if result.data else 0,
             'conversations': result.data or []
         })
-    except Exception as e:
-        print(f"❌ Dashboard conversations error: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Dashboard conversations error")
         return Response(
             {'error': 'Failed to fetch conversations'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -665,7 +814,7 @@ def dashboard_conversation_detail(request, conversation_id):
     
     try:
         # Get conversation
-        conv_result = supabase.table('conversations').select('*').eq('id', conversation_id).execute()
+        conv_result = dashboard_queries.conversation_query(supabase, conversation_id).execute()
         
         if not conv_result.data or len(conv_result.data) == 0:
             return Response(
@@ -676,15 +825,13 @@ def dashboard_conversation_detail(request, conversation_id):
         conversation = conv_result.data[0]
         
         # Get messages for this conversation
-        messages_result = supabase.table('messages').select('*').eq('conversation_id', conversation_id).order('created_at', desc=False).execute()
+        messages_result = dashboard_queries.conversation_messages_query(supabase, conversation_id).execute()
         
         conversation['messages'] = messages_result.data or []
         
         return Response(conversation)
-    except Exception as e:
-        print(f"❌ Dashboard conversation detail error: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Dashboard conversation detail error")
         return Response(
             {'error': 'Failed to fetch conversation details'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -705,7 +852,7 @@ def dashboard_conversation_case(request, conversation_id):
     
     try:
         # Get case submission for this conversation
-        case_result = supabase.table('case_submissions').select('*').eq('conversation_id', conversation_id).execute()
+        case_result = dashboard_queries.conversation_case_query(supabase, conversation_id).execute()
         
         if not case_result.data or len(case_result.data) == 0:
             return Response(
@@ -714,8 +861,8 @@ def dashboard_conversation_case(request, conversation_id):
             )
         
         return Response(case_result.data[0])
-    except Exception as e:
-        print(f"❌ Dashboard conversation case error: {e}")
+    except Exception:
+        logger.exception("❌ Dashboard conversation case error")
         return Response(
             {'error': 'Failed to fetch case submission'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -735,31 +882,39 @@ def dashboard_stats(request):
         )
     
     try:
-        # Total conversations
-        total_convs = supabase.table('conversations').select('id', count='exact').execute()
-        
-        # Completed conversations
-        completed_convs = supabase.table('conversations').select('id', count='exact').eq('is_complete', True).execute()
-        
-        # Total cases
-        total_cases = supabase.table('case_submissions').select('id', count='exact').execute()
-        
-        # High urgency cases (score >= 8)
-        high_urgency = supabase.table('case_submissions').select('id', count='exact').gte('urgency_score', 8).execute()
-        
-        # Emergency cases
-        emergency_cases = supabase.table('case_submissions').select('id', count='exact').eq('has_emergency_needs', True).execute()
-        
-        return Response({
-            'total_conversations': len(total_convs.data) if total_convs.data else 0,
-            'completed_conversations': len(completed_convs.data) if completed_convs.data else 0,
-            'total_cases': len(total_cases.data) if total_cases.data else 0,
-            'high_urgency_cases': len(high_urgency.data) if high_urgency.data else 0,
-            'emergency_cases': len(emergency_cases.data) if emergency_cases.data else 0,
-        })
-    except Exception as e:
-        print(f"❌ Dashboard stats error: {e}")
+        stats = {}
+        for name, query in dashboard_queries.stats_queries(supabase).items():
+            result = query.execute()
+            stats[name] = len(result.data) if result.data else 0
+        
+        return Response(stats)
+    except Exception:
+        logger.exception("❌ Dashboard stats error")
         return Response(
             {'error': 'Failed to fetch statistics'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['GET'])
+def dashboard_token_usage(request):
+    """
+    watsonx token usage and estimated cost across case submissions, in total,
+    per case and per intake task
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return Response(
+            {'error': 'Database connection unavailable'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    try:
+        result = dashboard_queries.token_usage_query(supabase).execute()
+        return Response(token_usage_rollup(row.get('token_usage') for row in result.data or []))
+    except Exception:
+        logger.exception("❌ Dashboard token usage error")
+        return Response(
+            {'error': 'Failed to fetch token usage'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -5,10 +5,55 @@ import { Progress } from './ui/progress';
 import { ArrowUp } from 'lucide-react';
 import claimItLogo from '../claimit.png';
 import claimItAvatar from '../claimitavatar.png';
-import { API_URL } from '../config';
+import { API_BASE_URL, API_URL } from '../config';
 
 console.log('Chat component loaded. API_URL:', API_URL);
 
+// Gateway errors and dropped connections are retried with the same Idempotency-Key,
+// so the server answers from the first attempt instead of processing the message twice
+const SEND_RETRIES = 2;
+const RETRYABLE_STATUSES = [502, 503, 504];
+
+const newIdempotencyKey = () =>
+  window.crypto?.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+const postMessage = async (conversationId, message, idempotencyKey) => {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      const response = await fetch(
+        `${API_URL}/chatbot/conversations/${conversationId}/send_message/`,
+        {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey },
+          body: JSON.stringify({ message }),
+        }
+      );
+      if (!RETRYABLE_STATUSES.includes(response.status) || attempt >= SEND_RETRIES) {
+        return response;
+      }
+    } catch (error) {
+      if (attempt >= SEND_RETRIES) throw error;
+    }
+    console.log(`Retrying message (attempt ${attempt + 2})...`);
+  }
+};
+
+// A 202 means the first attempt is still being processed: wait for it, then reload the conversation
+const waitForTurn = async (conversationId, pollUrl) => {
+  let turn = { status: 'queued' };
+  while (turn.status === 'queued' || turn.status === 'running') {
+    const response = await fetch(`${API_BASE_URL}${pollUrl}?wait=25`);
+    turn = await response.json();
+  }
+  if (turn.status === 'failed') {
+    throw new Error(turn.error || 'Message processing failed');
+  }
+  const response = await fetch(`${API_URL}/chatbot/conversations/${conversationId}/`);
+  return { ...(await response.json()), ...turn };
+};
+
 const Chat = ({ conversationId, onCreateConversation }) => {
   const [messages, setMessages] = useState([]);
   const [inputMessage, setInputMessage] = useState('');
@@ -101,12 +146,13 @@ const Chat = ({ conversationId, onCreateConversation }) => {
     };
   }, [conversationId]);
 
-  const handleSendMessage = async (e, retryAttempt = false, retryMessage = null) => {
+  const handleSendMessage = async (e, retryAttempt = false, retryMessage = null, retryKey = null) => {
     e?.preventDefault();
     if (isLoading) return;
     
     const userMessage = retryMessage || inputMessage.trim();
     if (!userMessage) return;
+    const idempotencyKey = retryKey || newIdempotencyKey();
 
     if (!retryAttempt) {
       setInputMessage('');
@@ -136,14 +182,7 @@ const Chat = ({ conversationId, onCreateConversation }) => {
       console.log('Sending message to:', `${API_URL}/chatbot/conversations/${currentConvId}/send_message/`);
       console.log('Message content:', userMessage);
       
-      const response = await fetch(
-        `${API_URL}/chatbot/conversations/${currentConvId}/send_message/`,
-        {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ message: userMessage }),
-        }
-      );
+      const response = await postMessage(currentConvId, userMessage, idempotencyKey);
 
       console.log('Response status:', response.status);
       console.log('Response headers:', Object.fromEntries(response.headers.entries()));
@@ -175,7 +214,10 @@ const Chat = ({ conversationId, onCreateConversation }) => {
         throw new Error(`Request failed with status ${response.status}: ${errorText}`);
       }
 
-      const data = await response.json();
+      let data = await response.json();
+      if (response.status === 202 && data.poll_url) {
+        data = await waitForTurn(currentConvId, data.poll_url);
+      }
       console.log('Response data:', data);
       
       if (data.messages) {
@@ -0,0 +1,54 @@
+"""
+Verify Supabase against the local database and repair drift
+Compares bucket checksums on both sides, descends only into buckets that
+differ and re-upserts the local version of every differing row:
+
+    python reconcile_supabase.py [--dry-run] [--delete-extra] [--tables messages]
+
+Needs the reconcile_* SQL functions from setup_supabase_tables.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+# Setup Django
+sys.path.append(os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from chatbot.reconcile import reconcile
+from chatbot.supabase_sync import get_supabase_client
+from chatbot.sync_engine import DEFAULT_BATCH_SIZE, SYNC_TABLES
+
+parser = argparse.ArgumentParser(description="Reconcile Supabase tables with the local database")
+parser.add_argument('--dry-run', action='store_true', help="Report differences without repairing them")
+parser.add_argument('--delete-extra', action='store_true', help="Delete rows that only exist in Supabase")
+parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows per repair request")
+parser.add_argument('--tables', nargs='+', choices=[table.name for table in SYNC_TABLES], help="Only check these tables")
+args = parser.parse_args()
+
+supabase = get_supabase_client()
+if not supabase:
+    sys.exit(1)
+
+print("🔄 Reconciling local database with Supabase...\n")
+started = time.perf_counter()
+results = reconcile(
+    supabase,
+    dry_run=args.dry_run,
+    delete_remote_extra=args.delete_extra,
+    batch_size=args.batch_size,
+    tables=args.tables,
+)
+elapsed = time.perf_counter() - started
+
+print(f"\n📊 Reconciled in {elapsed:.1f}s")
+for table, stats in results.items():
+    print(
+        f"   - {table}: {stats['stale']} {'to repair' if args.dry_run else 'repaired'}, "
+        f"{stats['extra']} only in Supabase{' (deleted)' if args.delete_extra and not args.dry_run else ''}, "
+        f"{stats['rpc_calls']} RPC calls, {stats['rows_compared']} rows compared"
+    )
@@ -0,0 +1,39 @@
+"""
+Rescore urgency for every stored case submission
+Run after changing URGENCY_RULES in app/Backend/urgency.py:
+
+    python rescore_urgency.py [--dry-run] [--no-sync] [--chunk-size N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+# Setup Django
+sys.path.append(os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from chatbot.rescoring import DEFAULT_CHUNK_SIZE, rescore_case_submissions
+
+parser = argparse.ArgumentParser(description="Re-apply urgency rules to all case submissions")
+parser.add_argument('--dry-run', action='store_true', help="Score cases without writing anything")
+parser.add_argument('--no-sync', action='store_true', help="Update the local database only")
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+args = parser.parse_args()
+
+print("🔄 Rescoring case submissions...\n")
+started = time.perf_counter()
+stats = rescore_case_submissions(
+    chunk_size=args.chunk_size,
+    dry_run=args.dry_run,
+    sync=not args.no_sync,
+)
+elapsed = time.perf_counter() - started
+
+print(f"\n📊 Scanned {stats['scanned']} cases in {stats['chunks']} chunks ({elapsed:.2f}s)")
+print(f"   - {stats['changed']} cases {'would change' if args.dry_run else 'updated'}")
+if stats['supabase_requests']:
+    print(f"   - {stats['supabase_requests']} Supabase update requests")
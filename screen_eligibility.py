@@ -0,0 +1,45 @@
+"""
+Re-screen eligibility for every stored case submission
+Run after changing PROGRAM_RULES in app/Backend/eligibility.py:
+
+    python screen_eligibility.py [--dry-run] [--no-sync] [--update-programs] [--chunk-size N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+# Setup Django
+sys.path.append(os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from app.Backend.eligibility import PROGRAM_RULES
+from chatbot.rescoring import DEFAULT_CHUNK_SIZE
+from chatbot.screening import screen_case_submissions
+
+parser = argparse.ArgumentParser(description="Apply eligibility rules to all case submissions")
+parser.add_argument('--dry-run', action='store_true', help="Screen cases without writing anything")
+parser.add_argument('--no-sync', action='store_true', help="Update the local database only")
+parser.add_argument('--update-programs', action='store_true', help="Also overwrite recommended_programs")
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+args = parser.parse_args()
+
+print("🔄 Screening case submissions...\n")
+started = time.perf_counter()
+stats = screen_case_submissions(
+    chunk_size=args.chunk_size,
+    dry_run=args.dry_run,
+    sync=not args.no_sync,
+    update_programs=args.update_programs,
+)
+elapsed = time.perf_counter() - started
+
+print(f"\n📊 Screened {stats['scanned']} cases in {stats['chunks']} chunks ({elapsed:.2f}s)")
+print(f"   - {stats['changed']} cases {'would change' if args.dry_run else 'updated'}")
+if stats['supabase_requests']:
+    print(f"   - {stats['supabase_requests']} Supabase upsert requests")
+for rule in PROGRAM_RULES:
+    print(f"   - {rule.program}: {stats[rule.program]} eligible")
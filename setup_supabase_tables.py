@@ -147,6 +147,105 @@ CREATE POLICY "Allow all access to conversations" ON conversations FOR ALL USING
 CREATE POLICY "Allow all access to messages" ON messages FOR ALL USING (true);
 CREATE POLICY "Allow all access to case_submissions" ON case_submissions FOR ALL USING (true);
 CREATE POLICY "Allow all access to employees" ON employees FOR ALL USING (true);
+
+-- Reconciliation checksums (used by reconcile_supabase.py)
+-- Row text must match row_expr_sql() in chatbot/reconcile.py (every synced column)
+CREATE OR REPLACE FUNCTION reconcile_us(ts TIMESTAMPTZ) RETURNS BIGINT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT extract(epoch FROM date_trunc('second', ts))::bigint * 1000000
+         + extract(microseconds FROM ts)::bigint % 1000000
+$$;
+
+CREATE OR REPLACE FUNCTION reconcile_row_expr(p_table TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE p_table
+        WHEN 'conversations' THEN
+            $e$coalesce(id::text, '')
+               || '|' || coalesce(reconcile_us(created_at)::text, '')
+               || '|' || coalesce(reconcile_us(updated_at)::text, '')
+               || '|' || coalesce(is_complete::int::text, '')$e$
+        WHEN 'messages' THEN
+            $e$coalesce(id::text, '')
+               || '|' || coalesce(conversation_id::text, '')
+               || '|' || md5(coalesce(role, ''))
+               || '|' || md5(coalesce(content, ''))
+               || '|' || coalesce(reconcile_us(created_at)::text, '')$e$
+        WHEN 'case_submissions' THEN
+            $e$coalesce(id::text, '')
+               || '|' || coalesce(conversation_id::text, '')
+               || '|' || coalesce(reconcile_us(submitted_at)::text, '')
+               || '|' || coalesce(urgency_score::text, '')
+               || '|' || md5(coalesce(urgency_reasoning, ''))
+               || '|' || md5(coalesce(full_name, ''))
+               || '|' || coalesce(date_of_birth::text, '')
+               || '|' || coalesce(age::text, '')
+               || '|' || md5(coalesce(phone_number, ''))
+               || '|' || md5(coalesce(email, ''))
+               || '|' || coalesce(household_size::text, '')
+               || '|' || md5(coalesce(household_members::text, ''))
+               || '|' || coalesce(has_children::int::text, '')
+               || '|' || coalesce((monthly_income * 100)::bigint::text, '')
+               || '|' || md5(coalesce(income_sources::text, ''))
+               || '|' || coalesce((total_assets * 100)::bigint::text, '')
+               || '|' || md5(coalesce(monthly_expenses::text, ''))
+               || '|' || md5(coalesce(employment_status, ''))
+               || '|' || md5(coalesce(current_employer, ''))
+               || '|' || md5(coalesce(job_title, ''))
+               || '|' || md5(coalesce(employment_duration, ''))
+               || '|' || md5(coalesce(housing_situation, ''))
+               || '|' || md5(coalesce(address, ''))
+               || '|' || coalesce((monthly_rent * 100)::bigint::text, '')
+               || '|' || coalesce(at_risk_of_homelessness::int::text, '')
+               || '|' || coalesce(has_disability::int::text, '')
+               || '|' || md5(coalesce(disability_details, ''))
+               || '|' || coalesce(has_medical_expenses::int::text, '')
+               || '|' || coalesce((monthly_medical_costs * 100)::bigint::text, '')
+               || '|' || coalesce(has_health_insurance::int::text, '')
+               || '|' || md5(coalesce(citizenship_status, ''))
+               || '|' || md5(coalesce(immigration_status, ''))
+               || '|' || md5(coalesce(current_benefits::text, ''))
+               || '|' || coalesce(has_emergency_needs::int::text, '')
+               || '|' || md5(coalesce(emergency_details, ''))
+               || '|' || md5(coalesce(structured_summary::text, ''))
+               || '|' || md5(coalesce(ai_summary, ''))
+               || '|' || md5(coalesce(recommended_programs::text, ''))
+               || '|' || md5(coalesce(recommended_actions, ''))
+               || '|' || md5(coalesce(additional_data::text, ''))$e$
+    END
+$$;
+
+-- Row count and checksum of each child bucket of an id prefix
+CREATE OR REPLACE FUNCTION reconcile_buckets(p_table TEXT, p_prefix TEXT)
+RETURNS TABLE (bucket TEXT, row_count BIGINT, checksum TEXT)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    IF p_table NOT IN ('conversations', 'messages', 'case_submissions') THEN
+        RAISE EXCEPTION 'unknown table %', p_table;
+    END IF;
+    RETURN QUERY EXECUTE format(
+        $q$SELECT substr(id::text, 1, %s), count(*),
+                  sum(('x' || substr(md5(%s), 1, 15))::bit(60)::bigint::numeric)::text
+             FROM %I WHERE id BETWEEN %L::uuid AND %L::uuid GROUP BY 1$q$,
+        length(p_prefix) + 1, reconcile_row_expr(p_table), p_table,
+        rpad(p_prefix, 32, '0'), rpad(p_prefix, 32, 'f'));
+END
+$$;
+
+-- Row hashes under an id prefix (differing leaf buckets only)
+CREATE OR REPLACE FUNCTION reconcile_rows(p_table TEXT, p_prefix TEXT)
+RETURNS TABLE (id TEXT, digest TEXT)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    IF p_table NOT IN ('conversations', 'messages', 'case_submissions') THEN
+        RAISE EXCEPTION 'unknown table %', p_table;
+    END IF;
+    RETURN QUERY EXECUTE format(
+        $q$SELECT id::text, (('x' || substr(md5(%s), 1, 15))::bit(60)::bigint)::text
+             FROM %I WHERE id BETWEEN %L::uuid AND %L::uuid$q$,
+        reconcile_row_expr(p_table), p_table,
+        rpad(p_prefix, 32, '0'), rpad(p_prefix, 32, 'f'));
+END
+$$;
 """
 
 print("\n" + "="*60)